@@ -0,0 +1,63 @@
+"""网格回测引擎基准：向量化实现 vs 逐日循环参考实现。
+
+在项目根目录运行::
+
+    python -m api.benchmarks.bench_backtest_engine --funds 50 --days 2520
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ..services.backtest_engine import GridParams, run_grid_backtest
+
+
+def make_series(n_funds: int, n_days: int, seed: int = 42):
+    """生成 n_funds 只基金、每只 n_days 个交易日的随机游走净值。"""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset(np.datetime64("2014-01-01"), np.arange(n_days), roll="forward")
+    series = {}
+    for i in range(n_funds):
+        navs = np.round(np.exp(np.cumsum(rng.normal(0.0002, 0.012, n_days))), 4)
+        series[f"{i:06d}"] = (dates, navs)
+    return series
+
+
+def _time(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--funds", type=int, default=50)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--grid-count", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    series = make_series(args.funds, args.days)
+    params = GridParams(
+        rise_ratio=0.03, fall_ratio=0.03, multiplier=1.2, grid_count=args.grid_count, fee_rate=0.0015
+    )
+
+    fast_s, fast = _time(lambda: run_grid_backtest(series, params, vectorized=True), args.repeat)
+    slow_s, slow = _time(lambda: run_grid_backtest(series, params, vectorized=False), 1)
+
+    np.testing.assert_allclose(fast.equity, slow.equity, rtol=1e-9)
+    assert fast.metrics["total_trades"] == slow.metrics["total_trades"]
+
+    print(f"funds={args.funds} days={args.days} grid_count={args.grid_count}")
+    print(f"vectorized: {fast_s * 1000:9.1f} ms")
+    print(f"reference : {slow_s * 1000:9.1f} ms")
+    print(f"speedup   : {slow_s / fast_s:9.1f}x  (results match)")
+
+
+if __name__ == "__main__":
+    main()
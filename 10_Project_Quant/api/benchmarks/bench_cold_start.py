@@ -0,0 +1,91 @@
+"""API 冷启动基准：``import api.main`` 耗时与应用启动（startup 钩子）耗时。
+
+每次测量都在新的子进程中进行，避免模块缓存；取 ``--runs`` 次的中位数。启动耗时为
+``TestClient(app)`` 进入上下文（执行全部 startup 钩子）的时间，使用临时 SQLite 库并先运行
+``api.bootstrap`` 建表，定时同步关闭。同时报告导入后是否加载了 numpy 等重型依赖。
+超过 ``--max-import-ms`` / ``--max-startup-ms`` 时以非零状态退出，可放进 CI。在项目根目录运行::
+
+    python -m api.benchmarks.bench_cold_start --runs 5
+    python -m api.benchmarks.bench_cold_start --max-import-ms 2000 --max-startup-ms 200
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+HEAVY_MODULES = ("numpy", "jose", "passlib")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import api.main
+import_ms = (time.perf_counter() - t0) * 1000
+startup_ms = None
+if {startup!r}:
+    from fastapi.testclient import TestClient
+    t0 = time.perf_counter()
+    with TestClient(api.main.app):
+        startup_ms = (time.perf_counter() - t0) * 1000
+print(json.dumps({{
+    "import_ms": import_ms,
+    "startup_ms": startup_ms,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def _probe(env: dict, startup: bool) -> dict:
+    code = _PROBE.format(startup=startup, heavy=HEAVY_MODULES)
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{Path(tmp) / 'cold_start.db'}", SYNC_SCHEDULE="")
+        env.pop("DATABASE_READ_URL", None)
+        subprocess.run(
+            [sys.executable, "-m", "api.bootstrap"], cwd=PROJECT_ROOT, env=env, check=True, capture_output=True
+        )
+        imports = [_probe(env, startup=False) for _ in range(runs)]
+        startups = [_probe(env, startup=True) for _ in range(runs)]
+    return {
+        "runs": runs,
+        "import_ms": statistics.median(r["import_ms"] for r in imports),
+        "startup_ms": statistics.median(r["startup_ms"] for r in startups),
+        "heavy_modules": imports[0]["heavy_modules"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-startup-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs)
+    print(f"import api.main   p50 {result['import_ms']:8.1f} ms")
+    print(f"startup hooks     p50 {result['startup_ms']:8.1f} ms")
+    print(f"heavy modules loaded at import: {', '.join(result['heavy_modules']) or 'none'}")
+
+    failures = []
+    if args.max_import_ms is not None and result["import_ms"] > args.max_import_ms:
+        failures.append(f"import {result['import_ms']:.1f} ms > {args.max_import_ms:.1f} ms")
+    if args.max_startup_ms is not None and result["startup_ms"] > args.max_startup_ms:
+        failures.append(f"startup {result['startup_ms']:.1f} ms > {args.max_startup_ms:.1f} ms")
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
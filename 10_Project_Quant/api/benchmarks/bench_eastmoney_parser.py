@@ -0,0 +1,117 @@
+"""东方财富 lsjz 响应解析基准：逐行 ``FundNavPoint`` vs 列式 ``NavColumns``。
+
+按真实接口的字段与 JSONP 包装生成若干页响应文本，分别测量「解包 + 解析」以及
+「解包 + 解析 + 构造批量 INSERT 参数行」两段耗时。列式解析有两种：JSON 解包后取列
+（``column``），以及直接在响应文本上正则取列、跳过 ``json.loads``（``text``，同步实际使用）。
+在项目根目录运行::
+
+    python -m api.benchmarks.bench_eastmoney_parser --funds 200 --days 2520 --page-size 100
+"""
+
+import argparse
+import json
+import time
+from datetime import date, timedelta
+
+from ..services.eastmoney import (
+    _loads_maybe_jsonp,
+    parse_eastmoney_lsjz,
+    parse_eastmoney_lsjz_columns,
+    parse_lsjz_text_columns,
+)
+
+
+def make_pages(n_days: int, page_size: int, seed: int = 0):
+    """生成一只基金 ``n_days`` 个交易日的分页 JSONP 响应（倒序，字段与真实接口一致）。"""
+    end = date(2024, 12, 31)
+    rows = []
+    for i in range(n_days):
+        nav = 1 + ((i + seed) % 500) / 1000
+        rows.append({
+            "FSRQ": (end - timedelta(days=i)).isoformat(), "DWJZ": f"{nav:.4f}", "LJJZ": f"{nav + 1:.4f}",
+            "SDATE": None, "ACTUALSYI": "", "NAVTYPE": "1", "JZZZL": "0.12" if i % 50 else "",
+            "SGZT": "开放申购", "SHZT": "开放赎回", "FHFCZ": "", "FHFCBZ": "", "DTYPE": None, "FHSP": "",
+        })
+    pages = []
+    for lo in range(0, n_days, page_size):
+        payload = {"Data": {"LSJZList": rows[lo:lo + page_size], "FundType": "001"}, "ErrCode": 0,
+                   "TotalCount": n_days, "PageSize": page_size, "PageIndex": lo // page_size + 1}
+        pages.append(f"jQuery18306596_{seed}({json.dumps(payload, ensure_ascii=False)})")
+    return pages
+
+
+def _rows_from_points(fund_id, pages):
+    return [
+        {"fund_id": fund_id, "nav_date": p.nav_date, "nav": p.nav, "accumulated_nav": p.accumulated_nav}
+        for points in pages
+        for p in points
+    ]
+
+
+def _rows_from_columns(fund_id, pages):
+    return [
+        {"fund_id": fund_id, "nav_date": d, "nav": n, "accumulated_nav": None if a != a else a}
+        for cols in pages
+        for d, n, a in zip(cols.dates.tolist(), cols.navs.tolist(), cols.accumulated_navs.tolist())
+    ]
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(n_funds: int, n_days: int, page_size: int, repeat: int):
+    funds = [make_pages(n_days, page_size, seed) for seed in range(n_funds)]
+    rows = n_funds * n_days
+    print(f"funds={n_funds} days={n_days} page_size={page_size} rows={rows:,} pages={sum(map(len, funds)):,}")
+
+    def unwrap_only():
+        return [[_loads_maybe_jsonp(text) for text in pages] for pages in funds]
+
+    def parse(parser, build_rows=None):
+        def go():
+            for fund_id, pages in enumerate(funds):
+                if parser is parse_lsjz_text_columns:
+                    parsed = [parser(text)[0] for text in pages]
+                else:
+                    parsed = [parser(_loads_maybe_jsonp(text)) for text in pages]
+                if build_rows is not None:
+                    build_rows(fund_id, parsed)
+        return go
+
+    cases = [
+        ("json unwrap only", unwrap_only),
+        ("rows   parse", parse(parse_eastmoney_lsjz)),
+        ("column parse", parse(parse_eastmoney_lsjz_columns)),
+        ("text   parse", parse(parse_lsjz_text_columns)),
+        ("rows   parse+insert rows", parse(parse_eastmoney_lsjz, _rows_from_points)),
+        ("text   parse+insert rows", parse(parse_lsjz_text_columns, _rows_from_columns)),
+    ]
+    timings = {}
+    for name, fn in cases:
+        timings[name] = _best_of(fn, repeat)
+        print(f"{name:26s}: {timings[name] * 1000:9.1f} ms  {timings[name] / rows * 1e9:7.0f} ns/row")
+    print(f"speedup (parse, text path) : {timings['rows   parse'] / timings['text   parse']:9.1f}x")
+    print(
+        f"speedup (parse+insert rows): "
+        f"{timings['rows   parse+insert rows'] / timings['text   parse+insert rows']:9.1f}x"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--funds", type=int, default=50)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    run(args.funds, args.days, args.page_size, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
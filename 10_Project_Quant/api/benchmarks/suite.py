@@ -0,0 +1,331 @@
+"""Quant API 性能基准套件。
+
+用固定随机种子生成 N 只基金 × M 个交易日的合成数据库，依次测量热点路径：
+
+- ``GET /api/funds/``：默认排序与 ``FUND_LIST_SORT_COLUMNS`` 中的每个排序键
+- ``GET /api/funds/{code}``：大 ``limit``，分冷（清空净值缓存）/热两种
+- ``upsert_fund_navs``：逐基金追加一个交易日；整段历史批量写入新基金
+- 同步：本地东方财富桩服务 → 并发拉取 → 列式解析 → 落库
+- 回测：``execute_backtest`` 完整执行（读净值、计算、写结果）
+
+每个用例报告 p50/p95/平均延迟、吞吐量与单次执行的峰值内存（tracemalloc），结果写成 JSON
+（默认 ``api/benchmarks/results/<时间>-<提交>.json``，不入库；需要固定基线时另存为
+``results/baseline.json`` 并提交）。``--compare`` 与之前的结果逐项对比 p50，超过 ``--threshold``
+视为回归。在项目根目录运行::
+
+    python -m api.benchmarks.suite --funds 200 --days 1260
+    python -m api.benchmarks.suite --compare baseline --fail-on-regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import sqlalchemy
+from sqlalchemy.orm import sessionmaker
+
+from .. import crud, models, schemas
+from ..database import Base, make_engine
+from ..services.backtest_worker import execute_backtest
+from ..services.eastmoney import NavColumns
+from ..services.nav_cache import nav_cache
+from ..services.nav_sync import NavSyncEngine
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+FUND_TYPES = ("股票型", "混合型", "债券型", "指数型", "QDII")
+START = np.datetime64("2014-01-01")
+
+
+@dataclass
+class CaseResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    mean_ms: float
+    ops_per_s: float
+    rows_per_s: Optional[float]
+    peak_mem_mb: float
+
+
+def measure(name: str, fn: Callable[[int], Optional[int]], iterations: int, warmup: int = 1) -> CaseResult:
+    """调用 ``fn(i)`` ``iterations`` 次计时；返回值视为本次处理的行数。另用 tracemalloc 单独跑一次取峰值内存。"""
+    for i in range(warmup):
+        fn(-1 - i)
+    latencies, rows = [], 0
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        rows += fn(i) or 0
+        latencies.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    try:
+        fn(iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    lat = np.array(latencies)
+    result = CaseResult(
+        name=name,
+        iterations=iterations,
+        p50_ms=float(np.percentile(lat, 50) * 1000),
+        p95_ms=float(np.percentile(lat, 95) * 1000),
+        mean_ms=float(lat.mean() * 1000),
+        ops_per_s=float(iterations / lat.sum()),
+        rows_per_s=float(rows / lat.sum()) if rows else None,
+        peak_mem_mb=peak / 2**20,
+    )
+    rows_text = f"{result.rows_per_s:12,.0f} rows/s" if result.rows_per_s else " " * 19
+    print(
+        f"{name:36s} p50 {result.p50_ms:9.2f} ms  p95 {result.p95_ms:9.2f} ms  "
+        f"{result.ops_per_s:9.1f} ops/s  {rows_text}  peak {result.peak_mem_mb:8.1f} MiB"
+    )
+    return result
+
+
+def synthetic_columns(rng: np.random.Generator, n_days: int, offset: int = 0) -> NavColumns:
+    dates = np.busday_offset(START, np.arange(offset, offset + n_days), roll="forward")
+    navs = np.round(np.exp(np.cumsum(rng.normal(0.0002, 0.012, n_days))), 4)
+    return NavColumns(dates, navs, np.round(navs + 1.0, 4))
+
+
+def build_database(factory, n_funds: int, n_days: int, seed: int, spare_funds: int) -> List[int]:
+    """N 只有完整历史的基金，另加 ``spare_funds`` 只空基金供写入用例使用。"""
+    rng = np.random.default_rng(seed)
+    db = factory()
+    db.add_all([
+        models.Fund(code=f"{i:06d}", name=f"合成基金{i}号", fund_type=FUND_TYPES[i % len(FUND_TYPES)])
+        for i in range(1, n_funds + spare_funds + 1)
+    ])
+    db.commit()
+    for lo in range(1, n_funds + 1, 50):
+        crud.bulk_upsert_nav_columns(
+            db, {fid: synthetic_columns(rng, n_days) for fid in range(lo, min(lo + 50, n_funds + 1))}
+        )
+    db.add(models.User(username="bench", email="bench@example.com", password_hash="-"))
+    db.commit()
+    db.close()
+    return list(range(n_funds + 1, n_funds + spare_funds + 1))
+
+
+def run_suite(factory, n_funds: int, n_days: int, seed: int, iterations: int) -> List[CaseResult]:
+    from fastapi.testclient import TestClient
+
+    from .. import database
+    from ..main import app
+    from ..tests.eastmoney_stub import EastmoneyStub
+
+    spare = build_database(factory, n_funds, n_days, seed, spare_funds=iterations + 2)
+
+    def override_db():
+        session = factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_db
+    client = TestClient(app)
+    results: List[CaseResult] = []
+    pages = max(n_funds // 20, 1)
+
+    def list_case(sort_by):
+        def call(i):
+            params = {"skip": (i % pages) * 20, "limit": 20}
+            if sort_by:
+                params["sort_by"] = sort_by
+            assert client.get("/api/funds/", params=params).status_code == 200
+        return call
+
+    try:
+        for sort_by in [None, *crud.FUND_LIST_SORT_COLUMNS]:
+            results.append(measure(f"fund_list[sort={sort_by or 'default'}]", list_case(sort_by), iterations))
+
+        def detail(cold):
+            def call(i):
+                code = f"{i % n_funds + 1:06d}"
+                if cold:
+                    nav_cache.invalidate()
+                resp = client.get(f"/api/funds/{code}", params={"limit": n_days})
+                assert resp.status_code == 200
+                return len(resp.json()["navs"])
+            return call
+
+        results.append(measure(f"fund_detail[limit={n_days},cold]", detail(True), iterations))
+        results.append(measure(f"fund_detail[limit={n_days},warm]", detail(False), iterations))
+
+        db = factory()
+        rng = np.random.default_rng(seed + 1)
+        day = [n_days]
+
+        def append_day(i):
+            day[0] += 1
+            cols = synthetic_columns(rng, 1, offset=day[0])
+            return crud.upsert_fund_navs(db, i % n_funds + 1, cols.to_points())
+
+        results.append(measure("upsert_fund_navs[append 1 day]", append_day, iterations))
+
+        def full_history(i):
+            return crud.bulk_upsert_nav_columns(db, {spare[i]: synthetic_columns(rng, n_days)})
+
+        results.append(measure(f"bulk_upsert[{n_days} days, new fund]", full_history, iterations))
+
+        sync_funds = min(20, n_funds)
+        codes = [f"{i:06d}" for i in range(1, sync_funds + 1)]
+        ids = crud.get_fund_ids_by_codes(db, codes)
+        with EastmoneyStub() as stub:
+            engine = NavSyncEngine(workers=8, url=stub.url, columnar=True)
+
+            def sync(i):
+                # 每轮请求更早的一年，保证都是新数据
+                end = date(2013, 12, 31) - timedelta(days=366 * (i + 2))
+                jobs = [(code, end - timedelta(days=364), end) for code in codes]
+                return sum(
+                    crud.bulk_upsert_nav_columns(db, {ids[code]: columns})
+                    for code, _, _, columns in engine.fetch_ranges(jobs)
+                )
+
+            results.append(measure(f"sync[stub, {sync_funds} funds x 1y]", sync, max(iterations // 5, 3)))
+            engine.close()
+
+        backtest_codes = [f"{i:06d}" for i in range(1, min(10, n_funds) + 1)]
+        payload = schemas.BacktestCreate(
+            fund_codes=backtest_codes,
+            start_date=date(2014, 1, 1),
+            end_date=date(2030, 1, 1),
+            strategy_params={"rise_ratio": 0.03, "fall_ratio": 0.03, "multiplier": 1.2, "grid_count": 20},
+        )
+
+        def backtest(i):
+            task_id = f"bench-{i}-{time.perf_counter_ns()}"
+            crud.create_backtest(db, payload, user_id=1, task_id=task_id)
+            assert execute_backtest(task_id, session_factory=factory) == models.BacktestStatus.completed.value
+
+        results.append(measure(f"backtest[{len(backtest_codes)} funds]", backtest, max(iterations // 5, 3)))
+        db.close()
+    finally:
+        app.dependency_overrides.clear()
+    return results
+
+
+def _git(*args) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment(args, url: str, setup_s: float) -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "db": url.split(":", 1)[0],
+        "funds": args.funds,
+        "days": args.days,
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "total_s": setup_s,
+        # Linux 上 ru_maxrss 单位为 KiB
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """按 p50 对比，返回回归的用例名。"""
+    regressions = []
+    print(f"\n{'case':36s} {'base p50':>10s} {'now p50':>10s} {'change':>8s}")
+    for name, now in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = now["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:36s} {base['p50_ms']:10.2f} {now['p50_ms']:10.2f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def _resolve_baseline(spec: str, exclude: Path) -> Optional[Path]:
+    if spec == "baseline":
+        path = RESULTS_DIR / "baseline.json"
+        return path if path.exists() else None
+    if spec != "latest":
+        return Path(spec)
+    candidates = sorted(p for p in RESULTS_DIR.glob("*.json") if p != exclude and p.name != "baseline.json")
+    return candidates[-1] if candidates else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--funds", type=int, default=200)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="数据库 URL，默认使用临时 SQLite 文件（会清空表）")
+    parser.add_argument("--output", help=f"结果 JSON 路径，默认 {RESULTS_DIR}/<时间>-<提交>.json")
+    parser.add_argument(
+        "--compare", help="与之前的结果对比：JSON 路径，latest（结果目录中最新一份）或 baseline（results/baseline.json）"
+    )
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 变慢超过该比例视为回归，默认 0.2")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.db or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = make_engine(url)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        nav_cache.invalidate()
+        print(f"db={engine.dialect.name} funds={args.funds} days={args.days} seed={args.seed}")
+        t0 = time.perf_counter()
+        results = run_suite(sessionmaker(bind=engine), args.funds, args.days, args.seed, args.iterations)
+        elapsed = time.perf_counter() - t0
+        engine.dispose()
+
+    report = {
+        "environment": environment(args, url, elapsed),
+        "cases": {r.name: asdict(r) for r in results},
+    }
+    env = report["environment"]
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{(env['git_commit'] or 'nogit')[:8]}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        baseline_path = _resolve_baseline(args.compare, output)
+        if baseline_path is None:
+            print("no baseline to compare against")
+            return
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        base_env = baseline["environment"]
+        print(f"baseline: {baseline_path} ({(base_env.get('git_commit') or '')[:8]})")
+        mismatched = [k for k in ("db", "funds", "days", "seed", "iterations") if base_env.get(k) != env[k]]
+        if mismatched:
+            print(f"warning: baseline was run with different {', '.join(mismatched)}; numbers are not comparable")
+        regressions = compare(report["cases"], baseline["cases"], args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
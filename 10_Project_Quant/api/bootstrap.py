@@ -0,0 +1,99 @@
+"""数据库初始化命令：迁移到最新版本、写入种子基金、补建派生表。
+
+应用导入与 worker 启动时不再建表、不再访问数据库做初始化；部署时在启动 uvicorn 之前运行一次::
+
+    python -m api.bootstrap              # 迁移 + 种子数据 + 派生表
+    python -m api.bootstrap --no-seed    # 只迁移与补建派生表
+
+由旧版本 ``create_all`` 建出、没有 ``alembic_version`` 的库：先标记为基线版本 ``0001``，再正常升级
+（``0002`` 逐项检查，只补齐缺失的表、字段与约束）。
+新增表/字段时用 ``alembic -c api/alembic.ini revision --autogenerate -m "..."`` 生成迁移。
+"""
+
+import argparse
+from pathlib import Path
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import crud, models
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+# 迁移引入前的表结构，对应最初由 create_all 建出的库
+BASELINE_REVISION = "0001"
+
+SEED_FUNDS = [
+    ("000001", "华夏成长", "混合型"),
+    ("000002", "华夏大盘精选", "混合型"),
+    ("110011", "易方达中小盘", "混合型"),
+]
+
+
+def alembic_config() -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return config
+
+
+def migrate(engine: Engine) -> str:
+    """把数据库迁移到 head，返回执行的动作（``upgrade``，或旧库先标记基线时为 ``stamp``）。"""
+    tables = set(inspect(engine).get_table_names())
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        action = "upgrade"
+        if "alembic_version" not in tables and "funds" in tables:
+            command.stamp(config, BASELINE_REVISION)
+            action = "stamp"
+        command.upgrade(config, "head")
+        return action
+
+
+def seed_funds(db: Session) -> int:
+    if db.query(models.Fund.id).first() is not None:
+        return 0
+    db.add_all([models.Fund(code=code, name=name, fund_type=fund_type) for code, name, fund_type in SEED_FUNDS])
+    db.commit()
+    return len(SEED_FUNDS)
+
+
+def rebuild_derived_tables(db: Session) -> bool:
+    """已有净值但快照表/指标表为空时全量重建一次（这两张表晚于净值表加入）。"""
+    if db.query(models.FundNav.id).first() is None:
+        return False
+    rebuilt = False
+    if db.query(models.FundNavSnapshot.fund_id).first() is None:
+        crud.refresh_nav_snapshots(db)
+        rebuilt = True
+    if db.query(models.FundMetrics.fund_id).first() is None:
+        crud.refresh_fund_metrics(db)
+        rebuilt = True
+    db.commit()
+    return rebuilt
+
+
+def bootstrap(engine: Engine, seed: bool = True) -> dict:
+    action = migrate(engine)
+    with Session(bind=engine) as db:
+        seeded = seed_funds(db) if seed else 0
+        rebuilt = rebuild_derived_tables(db)
+    return {"migration": action, "seeded_funds": seeded, "rebuilt_derived": rebuilt}
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--no-seed", action="store_true", help="不写入种子基金")
+    args = parser.parse_args(argv)
+
+    from .database import engine
+
+    result = bootstrap(engine, seed=not args.no_seed)
+    print(", ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,45 @@
-from datetime import date
+import heapq
+from datetime import date, timedelta
 from decimal import Decimal
-from typing import List, Optional
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from . import models, schemas
-from passlib.context import CryptContext
 
-from .services.eastmoney import FundNavPoint
+from .services.backtest_cache import backtest_cache_key
+from .services.eastmoney import FundNavPoint, NavColumns
+from .services.fund_metrics import LOOKBACK_DAYS, METRIC_COLUMNS, metrics_from_rows
+from .services.fund_search import MAX_RESULTS as MAX_SEARCH_RESULTS, fund_search_index
+from .services.leases import lease_deadline, utcnow, worker_id
+from .services.nav_archive import iter_archived_rows, read_archive
+from .services.nav_cache import nav_cache
+from .services.principal_cache import principal_cache
+from .services.signal_store import (
+    ARTIFACT_FORMAT,
+    STORAGE_COLUMNAR,
+    SignalArchive,
+    pack_backtest_output,
+    signal_storage_mode,
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=None)
+def _pwd_context():
+    # passlib/bcrypt 只有登录、注册用到，首次调用时再导入
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return _pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return _pwd_context().hash(password)
 
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
@@ -31,6 +55,18 @@ def create_user(db: Session, user: schemas.UserCreate):
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
+def get_user(db: Session, user_id: int):
+    return db.get(models.User, user_id)
+
+def update_user(db: Session, user: models.User, update: schemas.UserUpdate):
+    """修改角色/启用状态并使该用户的认证缓存失效。"""
+    for field, value in update.model_dump(exclude_unset=True).items():
+        setattr(user, field, value)
+    db.commit()
+    db.refresh(user)
+    principal_cache.invalidate(user.username)
+    return user
+
 def get_funds(
     db: Session, 
     skip: int = 0, 
@@ -38,14 +74,29 @@ def get_funds(
     fund_type: Optional[str] = None,
     search: Optional[str] = None
 ):
+    if search:
+        fund_search_index.ensure_fresh(db)
+        ids = fund_search_index.search(search, fund_type=fund_type)[skip:skip + limit]
+        funds = {fund.id: fund for fund in db.query(models.Fund).filter(models.Fund.id.in_(ids))} if ids else {}
+        return [funds[fund_id] for fund_id in ids if fund_id in funds]
     query = db.query(models.Fund)
     if fund_type:
         query = query.filter(models.Fund.fund_type == fund_type)
-    if search:
-        query = query.filter(models.Fund.name.contains(search) | models.Fund.code.contains(search))
     return query.offset(skip).limit(limit).all()
 
 
+FUND_LIST_SORT_COLUMNS = {
+    "nav": models.FundNavSnapshot.nav,
+    "nav_date": models.FundNavSnapshot.nav_date,
+    "daily_change_pct": models.FundNavSnapshot.daily_change_pct,
+    "code": models.Fund.code,
+    "name": models.Fund.name,
+    **{name: getattr(models.FundMetrics, name) for name in METRIC_COLUMNS},
+}
+
+_METRIC_FILTER_OPS = {">=": "__ge__", "<=": "__le__", ">": "__gt__", "<": "__lt__"}
+
+
 def get_fund_list(
     db: Session,
     skip: int = 0,
@@ -54,72 +105,345 @@ def get_fund_list(
     search: Optional[str] = None,
     sort_by: Optional[str] = None,
     sort_order: str = "desc",
+    metric_filters: Optional[List[Tuple[str, str, float]]] = None,
 ):
-    query = db.query(models.Fund)
+    """基金列表：与净值快照表、指标表单次 JOIN，排序、筛选与分页都在数据库侧完成。
+
+    ``metric_filters`` 为 ``(指标列, 比较符, 值)`` 列表，如 ``("return_1y", ">=", 0.1)``。
+
+    有 ``search`` 时先查进程内搜索索引得到候选 id（按相关度排序），未指定 ``sort_by``
+    则按相关度分页，``total`` 为全部命中数；否则取相关度最高的 ``MAX_SEARCH_RESULTS`` 个候选在数据库侧
+    排序/筛选，命中数超过上限时返回 ``truncated=True``。
+    """
+    filters = []
+    ranked_ids = None
+    truncated = False
+    column = FUND_LIST_SORT_COLUMNS.get(sort_by)
     if fund_type:
-        query = query.filter(models.Fund.fund_type == fund_type)
+        filters.append(models.Fund.fund_type == fund_type)
     if search:
-        query = query.filter(models.Fund.name.contains(search) | models.Fund.code.contains(search))
+        fund_search_index.ensure_fresh(db)
+        ranked_ids = fund_search_index.search(search, fund_type=fund_type, limit=None)
+        if column is not None or metric_filters:
+            # 候选以 IN 列表下发给数据库，限制其长度
+            truncated = len(ranked_ids) > MAX_SEARCH_RESULTS
+            ranked_ids = ranked_ids[:MAX_SEARCH_RESULTS]
+            filters.append(models.Fund.id.in_(ranked_ids))
+    metrics = models.FundMetrics
+    for name, op, value in metric_filters or []:
+        filters.append(getattr(getattr(metrics, name), _METRIC_FILTER_OPS[op])(value))
 
-    total = query.count()
-    funds = query.offset(skip).limit(limit).all()
-
-    items: List[dict] = []
-    for fund in funds:
-        navs = (
-            db.query(models.FundNav)
-            .filter(models.FundNav.fund_id == fund.id)
-            .order_by(models.FundNav.nav_date.desc())
-            .limit(2)
-            .all()
+    if metric_filters:
+        total = (
+            db.query(func.count(models.Fund.id))
+            .join(metrics, metrics.fund_id == models.Fund.id)
+            .filter(*filters)
+            .scalar()
         )
-        latest = navs[0] if len(navs) >= 1 else None
-        prev = navs[1] if len(navs) >= 2 else None
-
-        nav_val = float(latest.nav) if latest and latest.nav is not None else None
-        nav_date_val = latest.nav_date if latest else None
-
-        daily_change_pct = None
-        if latest and prev and latest.nav and prev.nav:
-            prev_nav = Decimal(prev.nav)
-            if prev_nav != 0:
-                daily_change_pct = float((Decimal(latest.nav) - prev_nav) / prev_nav * Decimal("100"))
+    elif ranked_ids is not None:
+        total = len(ranked_ids)
+    else:
+        total = db.query(func.count(models.Fund.id)).filter(*filters).scalar()
 
-        items.append(
-            {
-                "id": fund.id,
-                "code": fund.code,
-                "name": fund.name,
-                "fund_type": fund.fund_type,
-                "nav": nav_val,
-                "nav_date": nav_date_val,
-                "daily_change_pct": daily_change_pct,
-            }
+    snapshot = models.FundNavSnapshot
+    query = (
+        db.query(
+            models.Fund.id,
+            models.Fund.code,
+            models.Fund.name,
+            models.Fund.fund_type,
+            snapshot.nav,
+            snapshot.nav_date,
+            snapshot.daily_change_pct,
+            *(getattr(metrics, name) for name in METRIC_COLUMNS),
         )
+        .outerjoin(snapshot, snapshot.fund_id == models.Fund.id)
+        .outerjoin(metrics, metrics.fund_id == models.Fund.id)
+        .filter(*filters)
+    )
 
-    if sort_by in {"nav", "daily_change_pct", "code", "name"}:
-        reverse = sort_order.lower() != "asc"
-        items.sort(key=lambda x: (x.get(sort_by) is None, x.get(sort_by)), reverse=reverse)
+    if column is not None:
+        direction = column.asc() if sort_order.lower() == "asc" else column.desc()
+        # 无净值的基金始终排在最后
+        rows = query.order_by(column.is_(None), direction, models.Fund.id).offset(skip).limit(limit).all()
+    elif ranked_ids is not None:
+        page_ids = ranked_ids[skip:skip + limit]
+        by_id = {row.id: row for row in query.filter(models.Fund.id.in_(page_ids))} if page_ids else {}
+        rows = [by_id[fund_id] for fund_id in page_ids if fund_id in by_id]
+    else:
+        rows = query.order_by(models.Fund.id).offset(skip).limit(limit).all()
 
-    return {"total": total, "items": items}
+    items = [
+        {
+            "id": row.id,
+            "code": row.code,
+            "name": row.name,
+            "fund_type": row.fund_type,
+            "nav": float(row.nav) if row.nav is not None else None,
+            "nav_date": row.nav_date,
+            "daily_change_pct": row.daily_change_pct,
+            **{name: getattr(row, name) for name in METRIC_COLUMNS},
+        }
+        for row in rows
+    ]
+    return {"total": total, "items": items, "truncated": truncated}
 
 def get_fund_by_code(db: Session, code: str):
     return db.query(models.Fund).filter(models.Fund.code == code).first()
 
 
-def get_fund_navs(db: Session, fund_id: int, limit: int = 180):
-    navs = (
-        db.query(models.FundNav)
-        .filter(models.FundNav.fund_id == fund_id)
-        .order_by(models.FundNav.nav_date.desc())
-        .limit(limit)
-        .all()
+def get_fund_list_version(db: Session) -> tuple:
+    """基金列表的数据版本：基金表、净值快照表与指标表的聚合摘要（不读净值表）。"""
+    fund, snapshot, metrics = models.Fund, models.FundNavSnapshot, models.FundMetrics
+    return (
+        tuple(db.query(func.count(fund.id), func.max(fund.id), func.max(fund.updated_at)).one()),
+        tuple(db.query(func.count(snapshot.fund_id), func.sum(snapshot.generation), func.max(snapshot.nav_date)).one()),
+        tuple(db.query(func.count(metrics.fund_id), func.max(metrics.updated_at)).one()),
+    )
+
+
+def get_fund_version(db: Session, code: str) -> Optional[tuple]:
+    """单只基金的数据版本 ``(fund_id, 基金更新时间, 最新净值日期, generation)``；基金不存在返回 None。"""
+    snapshot = models.FundNavSnapshot
+    row = (
+        db.query(models.Fund.id, models.Fund.updated_at, snapshot.nav_date, snapshot.generation)
+        .outerjoin(snapshot, snapshot.fund_id == models.Fund.id)
+        .filter(models.Fund.code == code)
+        .first()
     )
+    return tuple(row) if row is not None else None
+
+
+def _latest_fund_navs(query, limit: int) -> List[models.FundNav]:
+    navs = query.order_by(models.FundNav.nav_date.desc()).limit(limit).all()
     navs.reverse()
     return navs
 
 
+def get_fund_navs(db: Session, fund_id: int, limit: int = 180):
+    """最近 ``limit`` 期净值（按日期升序）；热表不足时从归档补齐，归档部分为未加入会话的 ``FundNav``。"""
+    query = db.query(models.FundNav).filter(models.FundNav.fund_id == fund_id)
+    entry = db.get(models.FundNavArchive, fund_id)
+    if entry is None:
+        return _latest_fund_navs(query, limit)
+    navs = _latest_fund_navs(query.filter(models.FundNav.nav_date >= entry.archived_before), limit)
+    if len(navs) < limit:
+        archived = read_archive(entry)
+        lo = max(archived.size - (limit - len(navs)), 0)
+        navs[:0] = [
+            models.FundNav(fund_id=fund_id, nav_date=nav_date, nav=nav, accumulated_nav=acc)
+            for _, nav_date, nav, acc in archived.rows(fund_id, lo)
+        ]
+    if len(navs) < limit:
+        # 早于归档首日的回补仍在热表中
+        navs[:0] = _latest_fund_navs(query.filter(models.FundNav.nav_date < entry.first_date), limit - len(navs))
+    return navs
+
+
+def get_fund_ids_by_codes(db: Session, fund_codes: Optional[List[str]]) -> Dict[str, int]:
+    """``fund_codes`` 为 None 时返回全部基金。"""
+    query = db.query(models.Fund.code, models.Fund.id)
+    if fund_codes is not None:
+        query = query.filter(models.Fund.code.in_(fund_codes))
+    rows = query.all()
+    return {code: fund_id for code, fund_id in rows}
+
+
+NAV_EXPORT_CHUNK_SIZE = 5000
+
+
+def iter_fund_nav_chunks(
+    db: Session,
+    fund_ids: Optional[List[int]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    chunk_size: int = NAV_EXPORT_CHUNK_SIZE,
+):
+    """服务端游标按 ``(fund_id, nav_date)`` 顺序分块产出原始行，不物化 ORM 对象；涉及归档的基金合并两层。"""
+    archived = iter_archived_rows(db, fund_ids, start_date, end_date)
+    nav = models.FundNav
+    stmt = select(nav.fund_id, nav.nav_date, nav.nav, nav.accumulated_nav).order_by(nav.fund_id, nav.nav_date)
+    if fund_ids is not None:
+        stmt = stmt.where(nav.fund_id.in_(fund_ids))
+    if start_date:
+        stmt = stmt.where(nav.nav_date >= start_date)
+    if end_date:
+        stmt = stmt.where(nav.nav_date <= end_date)
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    try:
+        if archived is None:
+            yield from result.partitions()
+            return
+        # 两层的日期不重叠（热表可能在归档前后都有行），按 (fund_id, nav_date) 归并后重新分块
+        hot = (row for rows in result.partitions() for row in rows)
+        merged = heapq.merge(archived, hot, key=itemgetter(0, 1))
+        while True:
+            chunk = list(islice(merged, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        result.close()
+
+
+def get_nav_generations_by_id(db: Session, fund_ids: List[int]) -> Dict[int, Tuple[date, int]]:
+    """按 fund_id 取快照表中的净值数据版本 ``(最新净值日期, generation)``（单次主键查询）。
+
+    与 ``get_nav_generations`` 相同，补录历史净值时最新日期不变但 ``generation`` 会递增。
+    """
+    snapshot = models.FundNavSnapshot
+    rows = (
+        db.query(snapshot.fund_id, snapshot.nav_date, snapshot.generation)
+        .filter(snapshot.fund_id.in_(fund_ids))
+        .all()
+    )
+    return {fund_id: (nav_date, generation) for fund_id, nav_date, generation in rows}
+
+
+def get_nav_date_bounds(db: Session, fund_ids: List[int]) -> Dict[int, Tuple[date, date]]:
+    """各基金已入库净值的 ``(最早日期, 最新日期)``，含已归档的部分。"""
+    rows = (
+        db.query(models.FundNav.fund_id, func.min(models.FundNav.nav_date), func.max(models.FundNav.nav_date))
+        .filter(models.FundNav.fund_id.in_(fund_ids))
+        .group_by(models.FundNav.fund_id)
+        .all()
+    )
+    bounds = {fund_id: (first, last) for fund_id, first, last in rows}
+    archive = models.FundNavArchive
+    archived = (
+        db.query(archive.fund_id, archive.first_date, archive.last_date).filter(archive.fund_id.in_(fund_ids)).all()
+    )
+    for fund_id, first, last in archived:
+        hot = bounds.get(fund_id)
+        # 热表可能还有早于归档的回补
+        bounds[fund_id] = (min(first, hot[0]), max(last, hot[1])) if hot else (first, last)
+    return bounds
+
+
+def get_archived_ranges(db: Session, fund_ids: List[int]) -> Dict[int, Tuple[date, date]]:
+    """已归档基金的 ``(first_date, archived_before)``：该区间内的净值只在归档文件中。"""
+    archive = models.FundNavArchive
+    rows = (
+        db.query(archive.fund_id, archive.first_date, archive.archived_before)
+        .filter(archive.fund_id.in_(fund_ids))
+        .all()
+    )
+    return {fund_id: (first, before) for fund_id, first, before in rows}
+
+
+def _outside_archive(archived: Dict[int, Tuple[date, date]], fund_id: int, nav_date: date) -> bool:
+    bounds = archived.get(fund_id)
+    return bounds is None or not bounds[0] <= nav_date < bounds[1]
+
+
+def mark_funds_synced_from(db: Session, funds: List[models.Fund], start_date: date):
+    """记录已向数据源请求过的最早日期，避免对成立较晚的基金每次重复回补。"""
+    for fund in funds:
+        if fund.nav_synced_from is None or fund.nav_synced_from > start_date:
+            fund.nav_synced_from = start_date
+    db.commit()
+
+
+NAV_INSERT_BATCH_SIZE = 5000
+
+
+def _insert_ignoring_duplicates(db: Session, table):
+    """按方言构造"唯一键冲突则跳过"的 INSERT，不支持的方言返回 None。"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table).on_conflict_do_nothing(index_elements=["fund_id", "nav_date"])
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(table).on_conflict_do_nothing(index_elements=["fund_id", "nav_date"])
+    if dialect in ("mysql", "mariadb"):
+        # ON DUPLICATE KEY UPDATE 在 CLIENT_FOUND_ROWS 下会把重复行也计入 rowcount，
+        # 用 INSERT IGNORE 才能拿到准确的新增条数
+        return insert(table).prefix_with("IGNORE")
+    return None
+
+
+def bulk_upsert_fund_navs(
+    db: Session, points_by_fund: Dict[int, List[FundNavPoint]], batch_size: int = NAV_INSERT_BATCH_SIZE
+) -> int:
+    """批量写入多只基金的净值，依赖 (fund_id, nav_date) 唯一键跳过已存在的记录，返回新增条数。
+
+    落在归档区间 ``[first_date, archived_before)`` 内的净值视为已存在（归档部分不可变）；更早的回补写入热表。
+    """
+    archived = get_archived_ranges(db, list(points_by_fund))
+    if archived:
+        points_by_fund = {
+            fund_id: [p for p in points if _outside_archive(archived, fund_id, p.nav_date)]
+            for fund_id, points in points_by_fund.items()
+        }
+    stmt = _insert_ignoring_duplicates(db, models.FundNav.__table__)
+    if stmt is None:
+        return sum(_upsert_fund_navs_by_select(db, fund_id, points) for fund_id, points in points_by_fund.items())
+
+    rows_by_fund = {
+        fund_id: [
+            {"fund_id": fund_id, "nav_date": p.nav_date, "nav": p.nav, "accumulated_nav": p.accumulated_nav}
+            for p in points
+        ]
+        for fund_id, points in points_by_fund.items()
+    }
+    inserted = _insert_nav_rows(db, stmt, rows_by_fund, batch_size)
+    for fund_id in inserted:
+        nav_cache.on_upsert(fund_id, points_by_fund[fund_id])
+    return sum(inserted.values())
+
+
+def bulk_upsert_nav_columns(
+    db: Session, columns_by_fund: Dict[int, NavColumns], batch_size: int = NAV_INSERT_BATCH_SIZE
+) -> int:
+    """同 ``bulk_upsert_fund_navs``，输入为列式解析结果，不经过逐行的 ``FundNavPoint``/``Decimal``。"""
+    stmt = _insert_ignoring_duplicates(db, models.FundNav.__table__)
+    if stmt is None:
+        return bulk_upsert_fund_navs(db, {fund_id: cols.to_points() for fund_id, cols in columns_by_fund.items()})
+
+    archived = get_archived_ranges(db, list(columns_by_fund))
+    rows_by_fund = {
+        fund_id: [
+            {"fund_id": fund_id, "nav_date": d, "nav": n, "accumulated_nav": None if a != a else a}
+            for d, n, a in zip(cols.dates.tolist(), cols.navs.tolist(), cols.accumulated_navs.tolist())
+            if _outside_archive(archived, fund_id, d)
+        ]
+        for fund_id, cols in columns_by_fund.items()
+    }
+    inserted = _insert_nav_rows(db, stmt, rows_by_fund, batch_size)
+    for fund_id in inserted:
+        cols = columns_by_fund[fund_id]
+        nav_cache.on_upsert_columns(fund_id, cols.dates, cols.navs, cols.accumulated_navs)
+    return sum(inserted.values())
+
+
+def _insert_nav_rows(db: Session, stmt, rows_by_fund: Dict[int, List[dict]], batch_size: int) -> Dict[int, int]:
+    """按基金分批执行冲突跳过的 INSERT，返回有新增的基金及其新增条数。
+
+    只为真正写入了新行的基金刷新快照与指标（``generation`` 随之加一），全部重复的基金数据版本不变。
+    """
+    inserted: Dict[int, int] = {}
+    for fund_id, rows in rows_by_fund.items():
+        # 每只基金单独执行，才能从 rowcount 得知哪些基金有新增
+        count = sum(db.execute(stmt, rows[lo:lo + batch_size]).rowcount for lo in range(0, len(rows), batch_size))
+        if count:
+            inserted[fund_id] = count
+    if inserted:
+        refresh_nav_snapshots(db, list(inserted))
+        refresh_fund_metrics(db, list(inserted))
+    db.commit()
+    return inserted
+
+
 def upsert_fund_navs(db: Session, fund_id: int, points: List[FundNavPoint]) -> int:
+    if not points:
+        return 0
+    return bulk_upsert_fund_navs(db, {fund_id: points})
+
+
+def _upsert_fund_navs_by_select(db: Session, fund_id: int, points: List[FundNavPoint]) -> int:
     if not points:
         return 0
 
@@ -146,13 +470,128 @@ def upsert_fund_navs(db: Session, fund_id: int, points: List[FundNavPoint]) -> i
         )
         inserted += 1
     if inserted:
+        db.flush()
+        refresh_nav_snapshots(db, [fund_id])
+        refresh_fund_metrics(db, [fund_id])
         db.commit()
+        nav_cache.on_upsert(fund_id, points)
     return inserted
 
-def create_backtest(db: Session, backtest: schemas.BacktestCreate, user_id: int, task_id: str):
+
+def refresh_nav_snapshots(db: Session, fund_ids: Optional[List[int]] = None) -> int:
+    """用窗口函数取每只基金最新两期净值并写入快照表；``fund_ids`` 为空时全量重建。不提交事务。
+
+    涉及的基金 ``generation`` 加一，作为该基金净值数据的版本号。
+    """
+    nav = models.FundNav
+    rank = func.row_number().over(partition_by=nav.fund_id, order_by=nav.nav_date.desc()).label("rn")
+    ranked = select(nav.fund_id, nav.nav_date, nav.nav, rank)
+    if fund_ids is not None:
+        ranked = ranked.where(nav.fund_id.in_(fund_ids))
+    ranked = ranked.subquery()
+    rows = db.execute(
+        select(ranked.c.fund_id, ranked.c.nav_date, ranked.c.nav)
+        .where(ranked.c.rn <= 2)
+        .order_by(ranked.c.fund_id, ranked.c.rn)
+    ).all()
+
+    latest: Dict[int, list] = {}
+    for fund_id, nav_date, nav_value in rows:
+        latest.setdefault(fund_id, []).append((nav_date, nav_value))
+
+    query = db.query(models.FundNavSnapshot)
+    if fund_ids is not None:
+        query = query.filter(models.FundNavSnapshot.fund_id.in_(list(latest)))
+    snapshots = {s.fund_id: s for s in query.all()}
+    for fund_id, points in latest.items():
+        snap = snapshots.get(fund_id)
+        if snap is None:
+            snap = models.FundNavSnapshot(fund_id=fund_id)
+            db.add(snap)
+        snap.nav_date, snap.nav = points[0]
+        snap.generation = (snap.generation or 0) + 1
+        snap.prev_nav_date, snap.prev_nav = points[1] if len(points) > 1 else (None, None)
+        snap.daily_change_pct = None
+        if snap.prev_nav:
+            prev_nav = Decimal(snap.prev_nav)
+            snap.daily_change_pct = float((Decimal(snap.nav) - prev_nav) / prev_nav * Decimal("100"))
+    return len(latest)
+
+def refresh_fund_metrics(db: Session, fund_ids: Optional[List[int]] = None) -> int:
+    """一次读取相关净值、向量化重算业绩指标并写入 ``fund_metrics``；``fund_ids`` 为空时全量。不提交事务。"""
+    nav = models.FundNav
+    last_dates = db.query(nav.fund_id, func.max(nav.nav_date)).group_by(nav.fund_id)
+    if fund_ids is not None:
+        last_dates = last_dates.filter(nav.fund_id.in_(fund_ids))
+    last_dates = last_dates.all()
+    if not last_dates:
+        return 0
+    cutoff = min(last for _, last in last_dates) - timedelta(days=LOOKBACK_DAYS)
+
+    stmt = (
+        select(nav.fund_id, nav.nav_date, nav.nav, nav.accumulated_nav)
+        .where(nav.nav_date >= cutoff)
+        .order_by(nav.fund_id, nav.nav_date)
+    )
+    if fund_ids is not None:
+        stmt = stmt.where(nav.fund_id.in_(fund_ids))
+    computed = metrics_from_rows(db.execute(stmt).all())
+
+    query = db.query(models.FundMetrics)
+    if fund_ids is not None:
+        query = query.filter(models.FundMetrics.fund_id.in_(list(computed)))
+    existing = {m.fund_id: m for m in query.all()}
+    for fund_id, values in computed.items():
+        row = existing.get(fund_id)
+        if row is None:
+            row = models.FundMetrics(fund_id=fund_id)
+            db.add(row)
+        for name, value in values.items():
+            setattr(row, name, value)
+    return len(computed)
+
+def get_nav_generations(db: Session, fund_codes: List[str]) -> Dict[str, Tuple[date, int]]:
+    """各基金的净值数据版本 ``(最新净值日期, generation)``；无净值的基金不出现在结果中。"""
+    snapshot = models.FundNavSnapshot
+    rows = (
+        db.query(models.Fund.code, snapshot.nav_date, snapshot.generation)
+        .join(snapshot, snapshot.fund_id == models.Fund.id)
+        .filter(models.Fund.code.in_(fund_codes))
+        .all()
+    )
+    return {code: (nav_date, generation) for code, nav_date, generation in rows}
+
+
+def get_backtest_cache_key(
+    db: Session, fund_codes: List[str], start_date: date, end_date: date, params
+) -> str:
+    """``params`` 为校验后的 ``GridParams``。"""
+    return backtest_cache_key(fund_codes, start_date, end_date, params, get_nav_generations(db, fund_codes))
+
+
+def find_reusable_backtest(db: Session, cache_key: str) -> Optional[models.Backtest]:
+    """同一缓存键下优先返回已完成的任务，其次是仍在排队/执行中的任务。"""
+    status = models.BacktestStatus
+    candidates = (
+        db.query(models.Backtest)
+        .filter(models.Backtest.cache_key == cache_key)
+        .filter(models.Backtest.status.in_([status.completed, status.running, status.pending]))
+        .order_by(models.Backtest.id.desc())
+        .all()
+    )
+    for backtest in candidates:
+        if backtest.status == status.completed:
+            return backtest
+    return candidates[0] if candidates else None
+
+
+def create_backtest(
+    db: Session, backtest: schemas.BacktestCreate, user_id: int, task_id: str, cache_key: Optional[str] = None
+):
     db_backtest = models.Backtest(
         user_id=user_id,
         task_id=task_id,
+        cache_key=cache_key,
         strategy_params=backtest.strategy_params,
         start_date=backtest.start_date,
         end_date=backtest.end_date,
@@ -163,3 +602,350 @@ def create_backtest(db: Session, backtest: schemas.BacktestCreate, user_id: int,
     db.commit()
     db.refresh(db_backtest)
     return db_backtest
+
+
+def get_backtest_by_task_id(db: Session, task_id: str):
+    return db.query(models.Backtest).filter(models.Backtest.task_id == task_id).first()
+
+
+def get_backtests_by_status(db: Session, status: models.BacktestStatus):
+    return db.query(models.Backtest).filter(models.Backtest.status == status).all()
+
+
+def claim_backtest(db: Session, task_id: str) -> bool:
+    """把 pending 任务原子地置为 running 并记下本进程的租约，返回是否抢占成功。"""
+    claimed = (
+        db.query(models.Backtest)
+        .filter(models.Backtest.task_id == task_id)
+        .filter(models.Backtest.status == models.BacktestStatus.pending)
+        .update(
+            {
+                models.Backtest.status: models.BacktestStatus.running,
+                models.Backtest.worker_id: worker_id(),
+                models.Backtest.lease_expires_at: lease_deadline(),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def renew_backtest_lease(db: Session, task_id: str) -> bool:
+    """续期本进程持有的 running 任务，返回 False 表示租约已不属于本进程。"""
+    renewed = (
+        db.query(models.Backtest)
+        .filter(models.Backtest.task_id == task_id)
+        .filter(models.Backtest.status == models.BacktestStatus.running)
+        .filter(models.Backtest.worker_id == worker_id())
+        .update({models.Backtest.lease_expires_at: lease_deadline()}, synchronize_session=False)
+    )
+    db.commit()
+    return renewed == 1
+
+
+
+def finish_backtest(
+    db: Session,
+    task_id: str,
+    status: models.BacktestStatus,
+    error_message: Optional[str] = None,
+    commit: bool = True,
+) -> bool:
+    """结束本进程持有的 running 任务，返回 False 表示租约已被收回（任务已失败或被重新排队）。
+
+    ``commit=False`` 时不提交，调用方在同一事务中继续写入回测结果。
+    """
+    finished = (
+        db.query(models.Backtest)
+        .filter(models.Backtest.task_id == task_id)
+        .filter(models.Backtest.status == models.BacktestStatus.running)
+        .filter(models.Backtest.worker_id == worker_id())
+        .update(
+            {models.Backtest.status: status, models.Backtest.error_message: error_message},
+            synchronize_session=False,
+        )
+    )
+    if commit:
+        db.commit()
+    return finished == 1
+
+def get_stale_backtests(db: Session) -> List[models.Backtest]:
+    """租约已过期（或没有租约）的 running 任务：持有它的进程已经退出。"""
+    return (
+        db.query(models.Backtest)
+        .filter(models.Backtest.status == models.BacktestStatus.running)
+        .filter(or_(models.Backtest.lease_expires_at.is_(None), models.Backtest.lease_expires_at < utcnow()))
+        .all()
+    )
+
+
+def update_backtest_status(
+    db: Session,
+    backtest: models.Backtest,
+    status: models.BacktestStatus,
+    error_message: Optional[str] = None,
+):
+    backtest.status = status
+    backtest.error_message = error_message
+    db.commit()
+    db.refresh(backtest)
+    return backtest
+
+
+def _round_or_none(value, ndigits: int):
+    return round(value, ndigits) if value is not None else None
+
+
+def save_backtest_result(
+    db: Session, backtest: models.Backtest, output, storage: Optional[str] = None
+) -> models.BacktestResult:
+    """保存回测指标与交易信号。
+
+    ``rows`` 模式：净值曲线写入 ``detail_metrics``，信号用一次 executemany 写入 ``trade_signals``；
+    ``columnar`` 模式：信号与净值曲线打包成一个压缩列式存档写入 ``backtest_artifacts``。
+    """
+    storage = storage or signal_storage_mode()
+    metrics = output.metrics
+    detail_metrics = {"closed_trades": metrics["closed_trades"], "funds": output.fund_metrics}
+    if storage != STORAGE_COLUMNAR:
+        detail_metrics["equity_curve"] = {
+            "dates": [d.isoformat() for d in output.dates.tolist()],
+            "values": [round(v, 2) for v in output.equity.tolist()],
+        }
+    db_result = models.BacktestResult(
+        backtest_id=backtest.id,
+        total_return=_round_or_none(metrics["total_return"], 4),
+        annual_return=_round_or_none(metrics["annual_return"], 4),
+        max_drawdown=_round_or_none(metrics["max_drawdown"], 4),
+        sharpe_ratio=_round_or_none(metrics["sharpe_ratio"], 4),
+        win_rate=_round_or_none(metrics["win_rate"], 2),
+        profit_factor=_round_or_none(metrics["profit_factor"], 4),
+        total_trades=metrics["total_trades"],
+        detail_metrics=detail_metrics,
+    )
+    db.add(db_result)
+    db.flush()
+
+    if storage == STORAGE_COLUMNAR:
+        db.add(
+            models.BacktestArtifact(
+                backtest_id=backtest.id,
+                format=ARTIFACT_FORMAT,
+                signal_count=output.total_signals(),
+                payload=pack_backtest_output(output),
+            )
+        )
+    else:
+        rows = [
+            {**signal, "backtest_id": backtest.id, "signal_type": models.SignalType(signal["signal_type"])}
+            for signal in output.iter_signals()
+        ]
+        if rows:
+            db.execute(insert(models.TradeSignal), rows)
+    db.commit()
+    db.refresh(db_result)
+    return db_result
+
+
+def _get_archive(db: Session, backtest_id: int) -> Optional[SignalArchive]:
+    payload = (
+        db.query(models.BacktestArtifact.payload).filter(models.BacktestArtifact.backtest_id == backtest_id).scalar()
+    )
+    return SignalArchive(payload) if payload is not None else None
+
+
+def get_backtest_signals(db: Session, backtest: models.Backtest, skip: int = 0, limit: int = 100):
+    """分页读取交易信号，兼容两种存储方式，返回 ``{total, items}``。"""
+    archive = _get_archive(db, backtest.id)
+    if archive is not None:
+        return {"total": archive.total, "items": archive.signals(skip, limit)}
+
+    signal = models.TradeSignal
+    total = db.query(func.count(signal.id)).filter(signal.backtest_id == backtest.id).scalar()
+    rows = (
+        db.query(
+            signal.signal_date, signal.fund_code, signal.signal_type, signal.price, signal.quantity, signal.portfolio_value
+        )
+        .filter(signal.backtest_id == backtest.id)
+        .order_by(signal.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    items = [
+        {
+            "signal_date": row.signal_date,
+            "fund_code": row.fund_code,
+            "signal_type": row.signal_type.value,
+            "price": float(row.price),
+            "quantity": row.quantity,
+            "portfolio_value": float(row.portfolio_value) if row.portfolio_value is not None else None,
+        }
+        for row in rows
+    ]
+    return {"total": total, "items": items}
+
+
+def get_backtest_equity_curve(db: Session, backtest: models.Backtest) -> Optional[dict]:
+    archive = _get_archive(db, backtest.id)
+    if archive is not None:
+        return archive.equity_curve()
+    if backtest.result is None:
+        return None
+    return (backtest.result.detail_metrics or {}).get("equity_curve")
+
+
+def sync_job_active_key(days: int, full: bool) -> str:
+    return f"{days}:{int(full)}"
+
+
+def create_sync_job(db: Session, job_id: str, days: int, full: bool = False, trigger: str = "manual"):
+    """新建 pending 任务；参数相同的任务尚未结束时唯一键冲突，抛出 ``IntegrityError``。"""
+    job = models.SyncJob(
+        job_id=job_id,
+        trigger=trigger,
+        days=days,
+        full=full,
+        status=models.SyncJobStatus.pending,
+        active_key=sync_job_active_key(days, full),
+        failures={},
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_sync_job(db: Session, job_id: str) -> Optional[models.SyncJob]:
+    return db.query(models.SyncJob).filter(models.SyncJob.job_id == job_id).first()
+
+
+def get_sync_jobs(db: Session, skip: int = 0, limit: int = 20):
+    """按创建时间倒序分页，返回 ``{total, items}``。"""
+    query = db.query(models.SyncJob)
+    items = query.order_by(models.SyncJob.id.desc()).offset(skip).limit(limit).all()
+    return {"total": query.count(), "items": items}
+
+
+def get_sync_jobs_by_status(db: Session, *statuses: models.SyncJobStatus):
+    return db.query(models.SyncJob).filter(models.SyncJob.status.in_(statuses)).order_by(models.SyncJob.id).all()
+
+
+def find_active_sync_job(db: Session, days: int, full: bool) -> Optional[models.SyncJob]:
+    """参数相同且尚未结束的任务，重复提交时直接复用。"""
+    return (
+        db.query(models.SyncJob)
+        .filter(models.SyncJob.status.in_((models.SyncJobStatus.pending, models.SyncJobStatus.running)))
+        .filter(models.SyncJob.days == days, models.SyncJob.full == full)
+        .order_by(models.SyncJob.id)
+        .first()
+    )
+
+
+def claim_sync_job(db: Session, job_id: str) -> bool:
+    """把 pending 任务原子地置为 running 并记下本进程的租约，返回是否抢占成功。"""
+    claimed = (
+        db.query(models.SyncJob)
+        .filter(models.SyncJob.job_id == job_id)
+        .filter(models.SyncJob.status == models.SyncJobStatus.pending)
+        .update(
+            {
+                models.SyncJob.status: models.SyncJobStatus.running,
+                models.SyncJob.started_at: func.now(),
+                models.SyncJob.worker_id: worker_id(),
+                models.SyncJob.lease_expires_at: lease_deadline(),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def renew_sync_job_lease(db: Session, job_id: str) -> bool:
+    """续期本进程持有的 running 任务，返回 False 表示租约已不属于本进程。"""
+    renewed = (
+        db.query(models.SyncJob)
+        .filter(models.SyncJob.job_id == job_id)
+        .filter(models.SyncJob.status == models.SyncJobStatus.running)
+        .filter(models.SyncJob.worker_id == worker_id())
+        .update({models.SyncJob.lease_expires_at: lease_deadline()}, synchronize_session=False)
+    )
+    db.commit()
+    return renewed == 1
+
+
+def get_stale_sync_jobs(db: Session) -> List[models.SyncJob]:
+    """租约已过期（或没有租约）的 running 任务：持有它的进程已经退出。"""
+    return (
+        db.query(models.SyncJob)
+        .filter(models.SyncJob.status == models.SyncJobStatus.running)
+        .filter(or_(models.SyncJob.lease_expires_at.is_(None), models.SyncJob.lease_expires_at < utcnow()))
+        .order_by(models.SyncJob.id)
+        .all()
+    )
+
+
+def start_sync_job(db: Session, job: models.SyncJob, start_date: date, end_date: date, total_funds: int, total_shards: int):
+    job.start_date = start_date
+    job.end_date = end_date
+    job.total_funds = total_funds
+    job.total_shards = total_shards
+    db.commit()
+
+
+def record_sync_shard(
+    db: Session, job: models.SyncJob, funds: int, inserted: int, requests: int, failures: Dict[str, str]
+):
+    """累加一个分片的进度；在该分片净值落库之后调用，进度不会领先于已入库的数据。"""
+    job.done_shards += 1
+    job.done_funds += funds
+    job.failed_funds += len(failures)
+    job.inserted += inserted
+    job.requests += requests
+    if failures:
+        # JSON 列需要整体赋值才会被识别为修改
+        job.failures = {**(job.failures or {}), **failures}
+    db.commit()
+
+
+def finish_sync_job(
+    db: Session,
+    job: models.SyncJob,
+    status: models.SyncJobStatus,
+    error_message: Optional[str] = None,
+    fetch_stats: Optional[dict] = None,
+):
+    job.status = status
+    job.error_message = error_message
+    job.active_key = None
+    if fetch_stats is not None:
+        job.fetch_stats = fetch_stats
+    job.finished_at = func.now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def acquire_job_lock(db: Session, name: str, seconds: Optional[float] = None) -> bool:
+    """获取或续期具名锁：锁不存在、已过期或本就由本进程持有时成功，有效期 ``seconds``（默认租约时长）。"""
+    lock = models.JobLock
+    owner, expires_at = worker_id(), lease_deadline(seconds)
+    taken = (
+        db.query(lock)
+        .filter(lock.name == name)
+        .filter(or_(lock.owner == owner, lock.expires_at < utcnow()))
+        .update({lock.owner: owner, lock.expires_at: expires_at}, synchronize_session=False)
+    )
+    if taken:
+        db.commit()
+        return True
+    try:
+        db.add(lock(name=name, owner=owner, expires_at=expires_at))
+        db.commit()
+    except IntegrityError:
+        # 锁行已存在且由其他进程持有（或同时被其他进程插入）
+        db.rollback()
+        return False
+    return True
@@ -1,16 +1,60 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import Depends
 import os
 
 # Default to SQLite for local development if DATABASE_URL is not set
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fund_quant.db")
+# 只读副本；配置后列表/详情/导出/分析等只读接口走副本，写入仍走主库
+SQLALCHEMY_READ_DATABASE_URL = os.getenv("DATABASE_READ_URL")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
-)
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """SQLite 连接参数：WAL 让读不被写阻塞，synchronous=NORMAL 在 WAL 下仍保证一致性。"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')}")
+    cursor.execute(f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}")
+    cursor.execute(f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+    cursor.execute(f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_MB', '256')) * 2**20}")
+    cursor.execute(f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_MB', '64')) * 1024}")
+    cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    """按方言返回 ``create_engine`` 参数（连接池、检测与回收）。"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+    }
+
+
+def make_engine(url: str, **overrides):
+    """按配置档创建引擎；SQLite 文件库额外在每个新连接上设置 WAL 等 pragma。"""
+    options = {**engine_options(url), **overrides}
+    engine = create_engine(url, **options)
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:"):
+        event.listen(engine, "connect", _sqlite_pragmas)
+    return engine
+
+
+engine = make_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = make_engine(SQLALCHEMY_READ_DATABASE_URL) if SQLALCHEMY_READ_DATABASE_URL else None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine else None
+
 Base = declarative_base()
 
 def get_db():
@@ -19,3 +63,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db(db: Session = Depends(get_db)):
+    """只读接口使用的会话：配置了 ``DATABASE_READ_URL`` 时连副本，否则复用主库会话。"""
+    if ReadSessionLocal is None:
+        yield db
+        return
+    replica = ReadSessionLocal()
+    try:
+        yield replica
+    finally:
+        replica.close()
@@ -1,8 +1,8 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from . import crud, models, schemas, database
+from .services.principal_cache import Principal, principal_cache
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-keep-it-secret")
@@ -11,6 +11,9 @@ ALGORITHM = "HS256"
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    # jose 连带导入 cryptography，只在第一次校验 token 时加载
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -24,17 +27,21 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         token_data = schemas.TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_username(db, username=token_data.username)
-    if user is None:
-        raise credentials_exception
-    return user
+    principal = principal_cache.get(token_data.username)
+    if principal is None:
+        user = crud.get_user_by_username(db, username=token_data.username)
+        if user is None:
+            raise credentials_exception
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+    return principal
 
-def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+def get_current_active_user(current_user: Principal = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_current_admin_user(current_user: models.User = Depends(get_current_active_user)):
+def get_current_admin_user(current_user: Principal = Depends(get_current_active_user)):
     if current_user.role != models.UserRole.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,12 +1,13 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base, SessionLocal
-from .routers import auth, funds, backtest, users
-from .models import Fund
-
-# Create tables
-Base.metadata.create_all(bind=engine)
+from .database import SessionLocal
+from .routers import analytics, auth, funds, backtest, users
+from .services.backtest_worker import backtest_queue
+from .services.request_metrics import MetricsMiddleware, install_query_hooks, metrics_registry
+from .services.sync_jobs import sync_job_queue, sync_scheduler
 
+# 建表、种子数据与派生表补建放在 `python -m api.bootstrap`，导入本模块与 worker 启动不访问数据库做初始化
 app = FastAPI(title="Fund Quant Platform API")
 
 # CORS
@@ -24,28 +25,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 最外层：计时覆盖 CORS 等中间件，SQL 计数覆盖依赖注入中的查询
+install_query_hooks()
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(funds.router)
 app.include_router(backtest.router)
+app.include_router(analytics.router)
+
+
+@app.on_event("startup")
+def recover_backtests():
+    db = SessionLocal()
+    try:
+        backtest_queue.recover(db)
+    finally:
+        db.close()
 
 
 @app.on_event("startup")
-def ensure_seed_data():
+def start_sync_jobs():
     db = SessionLocal()
     try:
-        has_funds = db.query(Fund.id).first() is not None
-        if not has_funds:
-            db.add_all(
-                [
-                    Fund(code="000001", name="华夏成长", fund_type="混合型"),
-                    Fund(code="000002", name="华夏大盘精选", fund_type="混合型"),
-                    Fund(code="110011", name="易方达中小盘", fund_type="混合型"),
-                ]
-            )
-            db.commit()
+        sync_job_queue.recover(db)
     finally:
         db.close()
+    sync_scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_backtest_workers():
+    backtest_queue.shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+def stop_sync_jobs():
+    sync_scheduler.stop()
+    sync_job_queue.shutdown(wait=False)
 
 @app.get("/")
 def read_root():
@@ -54,3 +72,8 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus 文本格式：按路由的请求数、延迟、每请求 SQL 条数与耗时直方图。"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
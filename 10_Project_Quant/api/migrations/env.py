@@ -0,0 +1,63 @@
+"""Alembic 迁移环境。
+
+- 目标元数据为 ``api.models`` 中的全部表，``alembic revision --autogenerate`` 据此生成迁移
+- 连接优先使用调用方通过 ``config.attributes["connection"]`` 传入的连接（``python -m api.bootstrap``、测试），
+  否则按 ``DATABASE_URL`` 创建
+- SQLite 不支持大多数 ``ALTER TABLE``，对其使用 batch 模式
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+
+from api import models  # noqa: F401  注册全部表
+from api.database import SQLALCHEMY_DATABASE_URL, Base, make_engine
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _configure(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+        compare_type=True,
+    )
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url") or SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    engine = make_engine(config.get_main_option("sqlalchemy.url") or SQLALCHEMY_DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            _configure(connection)
+            with context.begin_transaction():
+                context.run_migrations()
+    finally:
+        engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
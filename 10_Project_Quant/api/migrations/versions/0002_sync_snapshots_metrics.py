@@ -0,0 +1,192 @@
+"""nav sync watermarks, nav unique key, snapshots, metrics, artifacts, sync jobs
+
+基线之后加入的表与字段。此前由启动时 ``create_all`` 建出的库可能已经有其中一部分（取决于当时的
+代码版本），每一步都先检查再执行。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 05:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _has_table(table: str) -> bool:
+    return table in _inspector().get_table_names()
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c['name'] for c in _inspector().get_columns(table)}
+
+
+def _has_index(table: str, index: str) -> bool:
+    return index in {i['name'] for i in _inspector().get_indexes(table)}
+
+
+def _has_unique(table: str, name: str) -> bool:
+    return name in {u['name'] for u in _inspector().get_unique_constraints(table)}
+
+
+def upgrade() -> None:
+    if not _has_column('funds', 'nav_synced_from'):
+        with op.batch_alter_table('funds', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('nav_synced_from', sa.Date(), nullable=True))
+
+    if not _has_column('backtests', 'cache_key'):
+        with op.batch_alter_table('backtests', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('cache_key', sa.String(length=64), nullable=True))
+    if not _has_index('backtests', 'ix_backtests_cache_key'):
+        with op.batch_alter_table('backtests', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_backtests_cache_key'), ['cache_key'], unique=False)
+
+    if not _has_unique('fund_navs', 'uq_fund_navs_fund_date'):
+        # 旧的"先查再插"写入在并发同步下可能插入重复的 (fund_id, nav_date)，保留最早的一行
+        op.execute(
+            'DELETE FROM fund_navs WHERE id NOT IN ('
+            'SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM fund_navs GROUP BY fund_id, nav_date) AS keep)'
+        )
+        with op.batch_alter_table('fund_navs', schema=None) as batch_op:
+            batch_op.create_unique_constraint('uq_fund_navs_fund_date', ['fund_id', 'nav_date'])
+
+    if not _has_table('fund_nav_snapshots'):
+        op.create_table('fund_nav_snapshots',
+        sa.Column('fund_id', sa.Integer(), nullable=False),
+        sa.Column('nav_date', sa.Date(), nullable=False),
+        sa.Column('nav', sa.Numeric(precision=10, scale=4), nullable=False),
+        sa.Column('prev_nav_date', sa.Date(), nullable=True),
+        sa.Column('prev_nav', sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column('daily_change_pct', sa.Float(), nullable=True),
+        sa.Column('generation', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['fund_id'], ['funds.id'], ),
+        sa.PrimaryKeyConstraint('fund_id')
+        )
+        with op.batch_alter_table('fund_nav_snapshots', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_fund_nav_snapshots_daily_change_pct'), ['daily_change_pct'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_nav_snapshots_nav'), ['nav'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_nav_snapshots_nav_date'), ['nav_date'], unique=False)
+    elif not _has_column('fund_nav_snapshots', 'generation'):
+        with op.batch_alter_table('fund_nav_snapshots', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('generation', sa.Integer(), server_default='0', nullable=False))
+
+    if not _has_table('fund_metrics'):
+        op.create_table('fund_metrics',
+        sa.Column('fund_id', sa.Integer(), nullable=False),
+        sa.Column('as_of_date', sa.Date(), nullable=False),
+        sa.Column('return_1m', sa.Float(), nullable=True),
+        sa.Column('return_3m', sa.Float(), nullable=True),
+        sa.Column('return_1y', sa.Float(), nullable=True),
+        sa.Column('return_3y', sa.Float(), nullable=True),
+        sa.Column('volatility_1y', sa.Float(), nullable=True),
+        sa.Column('max_drawdown_1y', sa.Float(), nullable=True),
+        sa.Column('sharpe_1y', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['fund_id'], ['funds.id'], ),
+        sa.PrimaryKeyConstraint('fund_id')
+        )
+        with op.batch_alter_table('fund_metrics', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_fund_metrics_max_drawdown_1y'), ['max_drawdown_1y'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_metrics_return_1m'), ['return_1m'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_metrics_return_1y'), ['return_1y'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_metrics_return_3m'), ['return_3m'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_metrics_return_3y'), ['return_3y'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_metrics_sharpe_1y'), ['sharpe_1y'], unique=False)
+            batch_op.create_index(batch_op.f('ix_fund_metrics_volatility_1y'), ['volatility_1y'], unique=False)
+
+    if not _has_table('backtest_artifacts'):
+        op.create_table('backtest_artifacts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('backtest_id', sa.Integer(), nullable=False),
+        sa.Column('format', sa.String(length=20), nullable=False),
+        sa.Column('signal_count', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['backtest_id'], ['backtests.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('backtest_id')
+        )
+        with op.batch_alter_table('backtest_artifacts', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_backtest_artifacts_id'), ['id'], unique=False)
+
+    if not _has_table('sync_jobs'):
+        op.create_table('sync_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.String(length=36), nullable=False),
+        sa.Column('trigger', sa.String(length=20), nullable=False),
+        sa.Column('days', sa.Integer(), nullable=False),
+        sa.Column('full', sa.Boolean(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'running', 'completed', 'partial', 'failed', name='syncjobstatus'), nullable=True),
+        sa.Column('start_date', sa.Date(), nullable=True),
+        sa.Column('end_date', sa.Date(), nullable=True),
+        sa.Column('total_funds', sa.Integer(), nullable=False),
+        sa.Column('total_shards', sa.Integer(), nullable=False),
+        sa.Column('done_shards', sa.Integer(), nullable=False),
+        sa.Column('done_funds', sa.Integer(), nullable=False),
+        sa.Column('failed_funds', sa.Integer(), nullable=False),
+        sa.Column('inserted', sa.Integer(), nullable=False),
+        sa.Column('requests', sa.Integer(), nullable=False),
+        sa.Column('failures', sa.JSON(), nullable=True),
+        sa.Column('fetch_stats', sa.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id')
+        )
+        with op.batch_alter_table('sync_jobs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_sync_jobs_id'), ['id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_sync_jobs_status'), ['status'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sync_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sync_jobs_status'))
+        batch_op.drop_index(batch_op.f('ix_sync_jobs_id'))
+
+    op.drop_table('sync_jobs')
+    with op.batch_alter_table('backtest_artifacts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_backtest_artifacts_id'))
+
+    op.drop_table('backtest_artifacts')
+    with op.batch_alter_table('fund_metrics', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_fund_metrics_volatility_1y'))
+        batch_op.drop_index(batch_op.f('ix_fund_metrics_sharpe_1y'))
+        batch_op.drop_index(batch_op.f('ix_fund_metrics_return_3y'))
+        batch_op.drop_index(batch_op.f('ix_fund_metrics_return_3m'))
+        batch_op.drop_index(batch_op.f('ix_fund_metrics_return_1y'))
+        batch_op.drop_index(batch_op.f('ix_fund_metrics_return_1m'))
+        batch_op.drop_index(batch_op.f('ix_fund_metrics_max_drawdown_1y'))
+
+    op.drop_table('fund_metrics')
+    with op.batch_alter_table('fund_nav_snapshots', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_fund_nav_snapshots_nav_date'))
+        batch_op.drop_index(batch_op.f('ix_fund_nav_snapshots_nav'))
+        batch_op.drop_index(batch_op.f('ix_fund_nav_snapshots_daily_change_pct'))
+
+    op.drop_table('fund_nav_snapshots')
+    with op.batch_alter_table('fund_navs', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_fund_navs_fund_date', type_='unique')
+
+    with op.batch_alter_table('backtests', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_backtests_cache_key'))
+        batch_op.drop_column('cache_key')
+
+    with op.batch_alter_table('funds', schema=None) as batch_op:
+        batch_op.drop_column('nav_synced_from')
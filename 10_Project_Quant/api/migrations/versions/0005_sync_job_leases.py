@@ -0,0 +1,43 @@
+"""sync job leases, active key and job locks
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 08:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('job_locks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('owner', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('sync_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active_key', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('worker_id', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_unique_constraint('uq_sync_jobs_active_key', ['active_key'])
+    # 升级前未结束的任务不占用 active_key（可能已有重复），由启动时的 recover 收尾
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sync_jobs', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_sync_jobs_active_key', type_='unique')
+        batch_op.drop_column('lease_expires_at')
+        batch_op.drop_column('worker_id')
+        batch_op.drop_column('active_key')
+
+    op.drop_table('job_locks')
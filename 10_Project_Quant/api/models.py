@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Enum, ForeignKey, Text, JSON, Numeric
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Enum, ForeignKey, Text, JSON, Numeric, UniqueConstraint, LargeBinary, Index
+from sqlalchemy.dialects.mysql import LONGBLOB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -15,6 +16,13 @@ class BacktestStatus(str, enum.Enum):
     completed = "completed"
     failed = "failed"
 
+class SyncJobStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    partial = "partial"
+    failed = "failed"
+
 class SignalType(str, enum.Enum):
     buy = "buy"
     sell = "sell"
@@ -40,13 +48,21 @@ class Fund(Base):
     code = Column(String(10), unique=True, index=True, nullable=False)
     name = Column(String(100), nullable=False)
     fund_type = Column(String(20))
+    nav_synced_from = Column(Date)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     navs = relationship("FundNav", back_populates="fund")
+    snapshot = relationship("FundNavSnapshot", back_populates="fund", uselist=False)
+    metrics = relationship("FundMetrics", back_populates="fund", uselist=False)
 
 class FundNav(Base):
     __tablename__ = "fund_navs"
+    __table_args__ = (
+        UniqueConstraint("fund_id", "nav_date", name="uq_fund_navs_fund_date"),
+        # 覆盖索引：按基金读净值序列只扫索引，不回表
+        Index("ix_fund_navs_fund_date_nav", "fund_id", "nav_date", "nav", "accumulated_nav"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     fund_id = Column(Integer, ForeignKey("funds.id"), nullable=False)
@@ -57,6 +73,54 @@ class FundNav(Base):
 
     fund = relationship("Fund", back_populates="navs")
 
+class FundNavArchive(Base):
+    """已归档到列式文件的净值目录：``archived_before`` 之前的净值只在归档文件中，不在 ``fund_navs``。"""
+
+    __tablename__ = "fund_nav_archives"
+
+    fund_id = Column(Integer, ForeignKey("funds.id"), primary_key=True)
+    archived_before = Column(Date, nullable=False)
+    format = Column(String(20), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    first_date = Column(Date, nullable=False)
+    last_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class FundNavSnapshot(Base):
+    """每只基金最新两期净值的快照，随 ``upsert_fund_navs`` 维护，供列表页单表排序分页。"""
+
+    __tablename__ = "fund_nav_snapshots"
+
+    fund_id = Column(Integer, ForeignKey("funds.id"), primary_key=True)
+    nav_date = Column(Date, nullable=False, index=True)
+    nav = Column(Numeric(10, 4), nullable=False, index=True)
+    prev_nav_date = Column(Date)
+    prev_nav = Column(Numeric(10, 4))
+    daily_change_pct = Column(Float, index=True)
+    # 每次该基金有净值写入时 +1，作为回测结果缓存等的数据版本
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    fund = relationship("Fund", back_populates="snapshot")
+
+class FundMetrics(Base):
+    """每只基金的预计算业绩指标（小数），随 ``upsert_fund_navs`` 对受影响的基金重算，供列表页排序筛选。"""
+
+    __tablename__ = "fund_metrics"
+
+    fund_id = Column(Integer, ForeignKey("funds.id"), primary_key=True)
+    as_of_date = Column(Date, nullable=False)
+    return_1m = Column(Float, index=True)
+    return_3m = Column(Float, index=True)
+    return_1y = Column(Float, index=True)
+    return_3y = Column(Float, index=True)
+    volatility_1y = Column(Float, index=True)
+    max_drawdown_1y = Column(Float, index=True)
+    sharpe_1y = Column(Float, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    fund = relationship("Fund", back_populates="metrics")
+
 class Backtest(Base):
     __tablename__ = "backtests"
 
@@ -68,6 +132,11 @@ class Backtest(Base):
     end_date = Column(Date, nullable=False)
     fund_codes = Column(JSON, nullable=False)
     status = Column(Enum(BacktestStatus), default=BacktestStatus.pending, index=True)
+    # 请求参数 + 数据版本的规范化哈希，相同的提交直接复用已有结果
+    cache_key = Column(String(64), index=True)
+    # 执行中任务的持有进程与租约到期时间，由心跳续期；过期说明持有进程已退出
+    worker_id = Column(String(64))
+    lease_expires_at = Column(DateTime(timezone=True))
     error_message = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -75,6 +144,7 @@ class Backtest(Base):
     user = relationship("User", back_populates="backtests")
     result = relationship("BacktestResult", back_populates="backtest", uselist=False)
     signals = relationship("TradeSignal", back_populates="backtest")
+    artifact = relationship("BacktestArtifact", back_populates="backtest", uselist=False)
 
 class BacktestResult(Base):
     __tablename__ = "backtest_results"
@@ -107,3 +177,62 @@ class TradeSignal(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     backtest = relationship("Backtest", back_populates="signals")
+
+class BacktestArtifact(Base):
+    """列式存储的回测信号与净值曲线（``BACKTEST_SIGNAL_STORAGE=columnar`` 时代替 ``trade_signals``）。"""
+
+    __tablename__ = "backtest_artifacts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    backtest_id = Column(Integer, ForeignKey("backtests.id"), unique=True, nullable=False)
+    format = Column(String(20), nullable=False)
+    signal_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    backtest = relationship("Backtest", back_populates="artifact")
+
+class SyncJob(Base):
+    """净值同步后台任务；基金按分片拉取落库，每完成一个分片更新一次进度。"""
+
+    __tablename__ = "sync_jobs"
+    __table_args__ = (
+        # 未结束的任务占用 "days:full"，结束时清空；同参数的任务同一时刻只能有一个
+        UniqueConstraint("active_key", name="uq_sync_jobs_active_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(36), unique=True, nullable=False)
+    trigger = Column(String(20), nullable=False, default="manual")
+    days = Column(Integer, nullable=False)
+    full = Column(Boolean, nullable=False, default=False)
+    status = Column(Enum(SyncJobStatus), default=SyncJobStatus.pending, index=True)
+    start_date = Column(Date)
+    end_date = Column(Date)
+    total_funds = Column(Integer, nullable=False, default=0)
+    total_shards = Column(Integer, nullable=False, default=0)
+    done_shards = Column(Integer, nullable=False, default=0)
+    done_funds = Column(Integer, nullable=False, default=0)
+    failed_funds = Column(Integer, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    requests = Column(Integer, nullable=False, default=0)
+    # 基金代码 → 失败原因
+    failures = Column(JSON)
+    fetch_stats = Column(JSON)
+    error_message = Column(Text)
+    active_key = Column(String(32))
+    worker_id = Column(String(64))
+    lease_expires_at = Column(DateTime(timezone=True))
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class JobLock(Base):
+    """多进程间的具名锁（如定时同步的触发权），持有者到期未续期时可被其他进程接管。"""
+
+    __tablename__ = "job_locks"
+
+    name = Column(String(50), primary_key=True)
+    owner = Column(String(64), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from .. import crud, database, schemas
+from ..services.analytics import FILL_MODES, analyze, load_nav_matrix
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+MAX_FUNDS = 1000
+
+
+@router.post("/correlation", response_model=schemas.CorrelationResponse)
+def correlation(req: schemas.CorrelationRequest, db: Session = Depends(database.get_read_db)):
+    codes = list(dict.fromkeys(req.fund_codes))
+    if not 1 <= len(codes) <= MAX_FUNDS:
+        raise HTTPException(status_code=400, detail=f"fund_codes must contain 1 to {MAX_FUNDS} funds")
+    if req.start_date > req.end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if req.fill not in FILL_MODES:
+        raise HTTPException(status_code=400, detail=f"fill must be one of: {', '.join(FILL_MODES)}")
+    if req.rolling_window < 2:
+        raise HTTPException(status_code=400, detail="rolling_window must be at least 2")
+    benchmark = req.benchmark_code or codes[0]
+    if benchmark not in codes:
+        codes.append(benchmark)
+
+    ids_by_code = crud.get_fund_ids_by_codes(db, codes)
+    missing = [code for code in codes if code not in ids_by_code]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Fund not found: {', '.join(missing)}")
+
+    matrix = load_nav_matrix(db, [ids_by_code[code] for code in codes], req.start_date, req.end_date, req.fill)
+    return analyze(matrix, codes, codes.index(benchmark), req.rolling_window, req.include_rolling)
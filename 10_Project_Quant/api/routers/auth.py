@@ -4,7 +4,6 @@ from datetime import timedelta
 from .. import crud, schemas, database, models
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
 import os
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
@@ -16,6 +15,8 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
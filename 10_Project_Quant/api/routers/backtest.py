@@ -1,17 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from .. import crud, schemas, database
+from ..services.backtest_engine import (
+    SWEEP_METRICS,
+    GridParams,
+    expand_param_grid,
+    load_nav_arrays,
+    rank_sweep_results,
+)
+from ..services.backtest_worker import backtest_queue
+from ..services.downsample import MIN_POINTS, downsample_curve
+from typing import Optional
 import uuid
 
 router = APIRouter(prefix="/api/backtest", tags=["backtest"])
 
 @router.post("/run", response_model=schemas.BacktestResponse)
-def run_backtest(backtest: schemas.BacktestCreate, db: Session = Depends(database.get_db)):
+def run_backtest(
+    backtest: schemas.BacktestCreate,
+    force: bool = Query(default=False, description="忽略结果缓存，强制重新计算"),
+    db: Session = Depends(database.get_db),
+):
     # Mock user_id for now or get from auth
     # In real app, we would get user from token dependency
     # For now, let's assume user_id=1 (admin) if user exists, else need to handle it
     # But since we haven't implemented full auth dependency injection here yet
     # We will assume a default user for testing or raise error if not found
-    user_id = 1 
+    try:
+        params = GridParams.from_dict(backtest.strategy_params)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if backtest.start_date > backtest.end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    cache_key = crud.get_backtest_cache_key(
+        db, backtest.fund_codes, backtest.start_date, backtest.end_date, params
+    )
+    if not force:
+        existing = crud.find_reusable_backtest(db, cache_key)
+        if existing is not None:
+            return {"task_id": existing.task_id, "status": existing.status, "created_at": existing.created_at, "cached": True}
+
+    user_id = 1
     task_id = str(uuid.uuid4())
-    return crud.create_backtest(db=db, backtest=backtest, user_id=user_id, task_id=task_id)
+    db_backtest = crud.create_backtest(db=db, backtest=backtest, user_id=user_id, task_id=task_id, cache_key=cache_key)
+    backtest_queue.submit(task_id)
+    return db_backtest
+
+
+@router.post("/sweep", response_model=schemas.BacktestSweepResponse)
+async def sweep_backtest(sweep: schemas.BacktestSweepCreate, db: Session = Depends(database.get_db)):
+    # 协程路由：读库放到线程池，计算在寻优进程池，等待结果期间不占用请求线程
+    if sweep.start_date > sweep.end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if sweep.sort_by not in SWEEP_METRICS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(SWEEP_METRICS)}")
+    try:
+        combos = expand_param_grid(sweep.strategy_params, sweep.param_grid)
+        params_list = [GridParams.from_dict(combo) for combo in combos]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    series = await run_in_threadpool(load_nav_arrays, db, sweep.fund_codes, sweep.start_date, sweep.end_date)
+    missing = [code for code in sweep.fund_codes if code not in series]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"No NAV data for funds: {', '.join(missing)}")
+    try:
+        metrics = await backtest_queue.run_sweep(series, params_list)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    rows = [{"strategy_params": combo, "metrics": m} for combo, m in zip(combos, metrics)]
+    ranked = rank_sweep_results(rows, sort_by=sweep.sort_by, sort_order=sweep.sort_order)
+    items = [
+        {"rank": i + 1, "strategy_params": row["strategy_params"], **row["metrics"]}
+        for i, row in enumerate(ranked[: sweep.limit])
+    ]
+    return {"total": len(rows), "items": items}
+
+
+@router.get("/{task_id}", response_model=schemas.BacktestDetailResponse)
+def read_backtest(task_id: str, db: Session = Depends(database.get_db)):
+    return _get_backtest_or_404(db, task_id)
+
+
+def _get_backtest_or_404(db: Session, task_id: str):
+    db_backtest = crud.get_backtest_by_task_id(db, task_id)
+    if db_backtest is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    return db_backtest
+
+
+@router.get("/{task_id}/signals", response_model=schemas.TradeSignalListResponse)
+def read_backtest_signals(
+    task_id: str,
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=10000),
+    db: Session = Depends(database.get_db),
+):
+    return crud.get_backtest_signals(db, _get_backtest_or_404(db, task_id), skip=skip, limit=limit)
+
+
+@router.get("/{task_id}/equity", response_model=schemas.EquityCurveResponse)
+def read_backtest_equity(
+    task_id: str,
+    max_points: Optional[int] = Query(default=None, ge=MIN_POINTS),
+    db: Session = Depends(database.get_db),
+):
+    curve = crud.get_backtest_equity_curve(db, _get_backtest_or_404(db, task_id))
+    if curve is None:
+        raise HTTPException(status_code=404, detail="Backtest result not ready")
+    if max_points:
+        curve = downsample_curve(task_id, curve, max_points)
+    return curve
@@ -1,26 +1,52 @@
-from datetime import date, timedelta
+from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from .. import crud, database
 from .. import schemas
 from ..schemas import FundDetailResponse
-from ..services.eastmoney import fetch_fund_nav_history
+from ..services.downsample import MIN_POINTS, downsample_nav_records
+from ..services.fund_metrics import parse_metric_filter
+from ..services.fund_search import fund_search_index
+from ..services.http_cache import cache_headers, etag_matches, make_etag, normalized_query, not_modified
+from ..services.nav_cache import nav_cache
+from ..services.nav_export import ENCODERS, EXPORT_MEDIA_TYPES, available_formats
+from ..services.sync_jobs import sync_job_queue
 
 router = APIRouter(prefix="/api/funds", tags=["funds"])
 
 @router.get("/", response_model=schemas.FundListResponse)
 def read_funds(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
     type: Optional[str] = None,
     search: Optional[str] = None,
     sort_by: Optional[str] = None,
     sort_order: str = "desc",
-    db: Session = Depends(database.get_db)
+    filter: List[str] = Query(default=[], description="指标筛选，如 return_1y>=0.1，可重复"),
+    db: Session = Depends(database.get_read_db)
 ):
+    try:
+        metric_filters = [parse_metric_filter(expr) for expr in filter]
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if search:
+        # 搜索结果来自进程内索引，索引版本也是表示的一部分
+        fund_search_index.ensure_fresh(db)
+    etag = make_etag(
+        "funds",
+        crud.get_fund_list_version(db),
+        fund_search_index.version if search else None,
+        normalized_query(request.query_params.multi_items()),
+    )
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
     return crud.get_fund_list(
         db,
         skip=skip,
@@ -29,14 +55,77 @@ def read_funds(
         search=search,
         sort_by=sort_by,
         sort_order=sort_order,
+        metric_filters=metric_filters,
+    )
+
+@router.get("/cache/stats")
+def read_nav_cache_stats():
+    return nav_cache.stats()
+
+@router.get("/export")
+def export_navs(
+    codes: Optional[str] = Query(default=None, description="逗号分隔的基金代码，缺省导出全部基金"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    fmt: str = Query(default="csv", alias="format"),
+    db: Session = Depends(database.get_read_db),
+):
+    if fmt not in available_formats():
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(available_formats())}")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+
+    if codes:
+        wanted = [code.strip() for code in codes.split(",") if code.strip()]
+        ids_by_code = crud.get_fund_ids_by_codes(db, wanted)
+        missing = [code for code in wanted if code not in ids_by_code]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Fund not found: {', '.join(missing)}")
+        fund_ids = list(ids_by_code.values())
+    else:
+        ids_by_code = crud.get_fund_ids_by_codes(db, None)
+        fund_ids = None
+    code_by_id = {fund_id: code for code, fund_id in ids_by_code.items()}
+
+    def body():
+        # 请求作用域的会话可能在响应开始前就被关闭，游标使用独立会话
+        stream_db = Session(bind=db.get_bind())
+        try:
+            chunks = crud.iter_fund_nav_chunks(stream_db, fund_ids, start_date, end_date)
+            yield from ENCODERS[fmt](chunks, code_by_id)
+        finally:
+            stream_db.close()
+
+    filename = f"fund_navs.{fmt}"
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 @router.get("/{code}", response_model=FundDetailResponse)
-def read_fund(code: str, limit: int = 180, db: Session = Depends(database.get_db)):
-    fund = crud.get_fund_by_code(db, code=code)
-    if fund is None:
+def read_fund(
+    request: Request,
+    response: Response,
+    code: str,
+    limit: int = 180,
+    max_points: Optional[int] = Query(default=None, ge=MIN_POINTS, description="按 LTTB 降采样到的最大点数"),
+    db: Session = Depends(database.get_read_db),
+):
+    version = crud.get_fund_version(db, code)
+    if version is None:
         raise HTTPException(status_code=404, detail="Fund not found")
-    navs = crud.get_fund_navs(db, fund_id=fund.id, limit=limit)
+    etag = make_etag("fund", code, version, normalized_query(request.query_params.multi_items()))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    fund = crud.get_fund_by_code(db, code=code)
+    # 按 ETag 中的数据版本取缓存，其他进程写入后本进程缓存未过期也会重新加载
+    arrays = nav_cache.get(db, fund.id, generation=version[3])
+    if max_points:
+        navs = downsample_nav_records(fund.id, arrays, limit, max_points)
+    else:
+        navs = arrays.to_records(limit)
     return {
         "id": fund.id,
         "code": fund.code,
@@ -46,21 +135,28 @@ def read_fund(code: str, limit: int = 180, db: Session = Depends(database.get_db
         "navs": navs,
     }
 
-@router.post("/sync")
-def sync_funds(days: int = Query(default=30, ge=1, le=3650), db: Session = Depends(database.get_db)):
-    funds = crud.get_funds(db, skip=0, limit=10000)
-    if not funds:
-        return {"status": "noop", "message": "No funds in database. Please add funds first."}
+@router.post("/sync", status_code=202, response_model=schemas.SyncJobResponse)
+def sync_funds(
+    days: int = Query(default=30, ge=1, le=3650),
+    full: bool = False,
+    db: Session = Depends(database.get_db),
+):
+    """创建后台同步任务并立即返回 ``job_id``，进度通过 ``GET /api/funds/sync/jobs/{job_id}`` 查询。"""
+    return sync_job_queue.enqueue(db, days=days, full=full)
+
 
-    end = date.today()
-    start = end - timedelta(days=days)
+@router.get("/sync/jobs", response_model=schemas.SyncJobListResponse)
+def read_sync_jobs(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=200),
+    db: Session = Depends(database.get_db),
+):
+    return crud.get_sync_jobs(db, skip=skip, limit=limit)
 
-    total_inserted = 0
-    per_fund = []
-    for fund in funds:
-        points = fetch_fund_nav_history(fund.code, start_date=start, end_date=end)
-        inserted = crud.upsert_fund_navs(db, fund_id=fund.id, points=points)
-        total_inserted += inserted
-        per_fund.append({"code": fund.code, "inserted": inserted, "fetched": len(points)})
 
-    return {"status": "success", "inserted": total_inserted, "details": per_fund}
+@router.get("/sync/jobs/{job_id}", response_model=schemas.SyncJobResponse)
+def read_sync_job(job_id: str, db: Session = Depends(database.get_db)):
+    job = crud.get_sync_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from .. import crud, schemas, database, dependencies
+from ..services.principal_cache import principal_cache
 
 router = APIRouter(
     prefix="/api/users",
@@ -18,3 +19,19 @@ def read_users(
 ):
     users = crud.get_users(db, skip=skip, limit=limit)
     return users
+
+@router.patch("/{user_id}", response_model=schemas.UserResponse)
+def update_user(
+    user_id: int,
+    update: schemas.UserUpdate,
+    db: Session = Depends(database.get_db),
+    current_user: schemas.UserResponse = Depends(dependencies.get_current_admin_user)
+):
+    user = crud.get_user(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return crud.update_user(db, user, update)
+
+@router.get("/auth-cache/stats")
+def read_auth_cache_stats(current_user: schemas.UserResponse = Depends(dependencies.get_current_admin_user)):
+    return principal_cache.stats()
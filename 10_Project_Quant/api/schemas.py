@@ -1,7 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional, List, Any
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any, Dict
 from datetime import date, datetime
-from .models import UserRole, BacktestStatus
+from .models import UserRole, BacktestStatus, SyncJobStatus
 
 class UserBase(BaseModel):
     username: str
@@ -10,6 +10,10 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str
 
+class UserUpdate(BaseModel):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
 class UserLogin(BaseModel):
     username: str
     password: str
@@ -48,11 +52,20 @@ class FundListItem(FundBase):
     nav: Optional[float] = None
     nav_date: Optional[date] = None
     daily_change_pct: Optional[float] = None
+    return_1m: Optional[float] = None
+    return_3m: Optional[float] = None
+    return_1y: Optional[float] = None
+    return_3y: Optional[float] = None
+    volatility_1y: Optional[float] = None
+    max_drawdown_1y: Optional[float] = None
+    sharpe_1y: Optional[float] = None
 
 
 class FundListResponse(BaseModel):
     total: int
     items: List[FundListItem]
+    # 搜索候选超过上限、只在前 MAX_SEARCH_RESULTS 个候选中排序/筛选时为 True
+    truncated: bool = False
 
 class FundNavResponse(BaseModel):
     nav_date: date
@@ -75,6 +88,138 @@ class BacktestResponse(BaseModel):
     task_id: str
     status: BacktestStatus
     created_at: datetime
+    cached: bool = False
+
+    class Config:
+        from_attributes = True
+
+
+class BacktestResultResponse(BaseModel):
+    total_return: Optional[float] = None
+    annual_return: Optional[float] = None
+    max_drawdown: Optional[float] = None
+    sharpe_ratio: Optional[float] = None
+    win_rate: Optional[float] = None
+    profit_factor: Optional[float] = None
+    total_trades: Optional[int] = None
+    detail_metrics: Optional[dict] = None
 
     class Config:
         from_attributes = True
+
+
+class BacktestDetailResponse(BacktestResponse):
+    fund_codes: List[str]
+    start_date: date
+    end_date: date
+    strategy_params: dict
+    error_message: Optional[str] = None
+    updated_at: Optional[datetime] = None
+    result: Optional[BacktestResultResponse] = None
+
+
+class TradeSignalItem(BaseModel):
+    signal_date: date
+    fund_code: str
+    signal_type: str
+    price: float
+    quantity: int
+    portfolio_value: Optional[float] = None
+
+
+class TradeSignalListResponse(BaseModel):
+    total: int
+    items: List[TradeSignalItem]
+
+
+class EquityCurveResponse(BaseModel):
+    dates: List[date]
+    values: List[float]
+
+
+class BacktestSweepCreate(BaseModel):
+    fund_codes: List[str]
+    start_date: date
+    end_date: date
+    strategy_params: dict = {}
+    param_grid: Dict[str, Any]
+    sort_by: str = "sharpe_ratio"
+    sort_order: str = "desc"
+    limit: int = Field(default=50, ge=1, le=500)
+
+
+class BacktestSweepItem(BaseModel):
+    rank: int
+    strategy_params: dict
+    total_return: Optional[float] = None
+    annual_return: Optional[float] = None
+    max_drawdown: Optional[float] = None
+    sharpe_ratio: Optional[float] = None
+    win_rate: Optional[float] = None
+    profit_factor: Optional[float] = None
+    total_trades: int
+    closed_trades: int
+
+
+class BacktestSweepResponse(BaseModel):
+    total: int
+    items: List[BacktestSweepItem]
+
+
+class SyncJobResponse(BaseModel):
+    job_id: str
+    status: SyncJobStatus
+    trigger: str
+    days: int
+    full: bool
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    total_funds: int = 0
+    total_shards: int = 0
+    done_shards: int = 0
+    done_funds: int = 0
+    failed_funds: int = 0
+    inserted: int = 0
+    requests: int = 0
+    failures: Optional[Dict[str, str]] = None
+    fetch_stats: Optional[dict] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class SyncJobListResponse(BaseModel):
+    total: int
+    items: List[SyncJobResponse]
+
+
+class CorrelationRequest(BaseModel):
+    fund_codes: List[str]
+    start_date: date
+    end_date: date
+    benchmark_code: Optional[str] = None
+    fill: str = "ffill"
+    rolling_window: int = 60
+    include_rolling: bool = True
+
+
+class RollingBetaResponse(BaseModel):
+    window: int
+    dates: List[date]
+    values: Dict[str, List[Optional[float]]]
+
+
+class CorrelationResponse(BaseModel):
+    codes: List[str]
+    benchmark: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    observations: int
+    correlation: List[List[Optional[float]]]
+    covariance: List[List[Optional[float]]]
+    beta: Dict[str, Optional[float]]
+    rolling_beta: Optional[RollingBetaResponse] = None
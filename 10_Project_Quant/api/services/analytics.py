@@ -0,0 +1,211 @@
+"""多基金对齐净值矩阵与收益相关性分析。
+
+一次查询取出所有基金在区间内的净值，按日期并集对齐成 ``(交易日, 基金)`` 矩阵：
+
+- ``ffill``：缺失日沿用上一期净值（停牌/节假日收益记为 0）
+- ``mask``：缺失日保留 NaN，涉及缺失值的日收益不参与统计
+
+相关系数、协方差基于日收益按「两两都有数据的交易日」计算，全部用矩阵乘法完成，
+500 只基金也只是几次 500×500 的乘法。滚动 beta 用累积和做滑窗。
+
+对齐后的矩阵按 ``(基金集合, 区间, 填充方式)`` 缓存在进程内，任一基金的净值快照 ``generation``
+变化（包括补录历史净值）或超过 ``ANALYTICS_CACHE_TTL`` 秒（默认 300）后重建；总大小受 ``ANALYTICS_CACHE_MAX_MB``（默认 64）限制。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from .. import crud
+from .fund_metrics import return_basis
+from .lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+FILL_MODES = ("ffill", "mask")
+
+
+@dataclass
+class NavMatrix:
+    dates: np.ndarray  # datetime64[D]，长度 T
+    fund_ids: np.ndarray  # 长度 N，列顺序
+    values: np.ndarray  # (T, N)，缺失为 NaN
+    version: Hashable = None
+    loaded_at: float = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.fund_ids.nbytes + self.values.nbytes
+
+    def returns(self) -> np.ndarray:
+        """日收益矩阵 (T-1, N)；任一端缺失即为 NaN。"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.values[1:] / self.values[:-1] - 1.0
+
+
+def build_nav_matrix(
+    fund_ids: Sequence[int], chunks: Iterable[Sequence[tuple]], fill: str = "ffill"
+) -> NavMatrix:
+    """``chunks`` 为 ``(fund_id, nav_date, nav, accumulated_nav)`` 行块（按基金、日期排序）。"""
+    if fill not in FILL_MODES:
+        raise ValueError(f"fill must be one of: {', '.join(FILL_MODES)}")
+    rows = [row for chunk in chunks for row in chunk]
+    n = len(rows)
+    order = np.asarray(list(fund_ids), dtype=np.int64)
+    flat_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    dates = np.array([r[1] for r in rows], dtype="datetime64[D]")
+    navs = np.fromiter((float(r[2]) for r in rows), dtype=np.float64, count=n)
+    accs = np.fromiter((float(r[3]) if r[3] is not None else np.nan for r in rows), dtype=np.float64, count=n)
+
+    axis = np.unique(dates)
+    matrix = np.full((axis.size, order.size), np.nan)
+    if n:
+        starts = np.flatnonzero(np.r_[True, flat_ids[1:] != flat_ids[:-1]])
+        seg = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, n]))
+        values = return_basis(starts, seg, navs, accs)
+        sorter = np.argsort(order)
+        cols = sorter[np.searchsorted(order, flat_ids, sorter=sorter)]
+        matrix[np.searchsorted(axis, dates), cols] = values
+
+    if fill == "ffill" and axis.size:
+        # 每列取「截至当日最近一个非缺失行」的下标，一次花式索引完成前向填充
+        last_valid = np.where(~np.isnan(matrix), np.arange(axis.size)[:, None], 0)
+        np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+        matrix = matrix[last_valid, np.arange(order.size)[None, :]]
+    return NavMatrix(dates=axis, fund_ids=order, values=matrix)
+
+
+def pairwise_stats(returns: np.ndarray) -> Dict[str, np.ndarray]:
+    """两两有效样本上的协方差、相关系数与样本数（NaN 表示样本不足）。"""
+    valid = (~np.isnan(returns)).astype(np.float64)
+    x = np.where(valid > 0, returns, 0.0)
+    count = valid.T @ valid
+    sum_x = x.T @ valid  # [i, j]：i 在 (i, j) 都有效的交易日上的收益和
+    sum_xx = (x * x).T @ valid
+    sum_xy = x.T @ x
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denom = np.where(count > 1, count - 1, np.nan)
+        cov = (sum_xy - sum_x * sum_x.T / count) / denom
+        var = (sum_xx - sum_x * sum_x / count) / denom  # [i, j]：i 在配对样本上的方差
+        corr = cov / np.sqrt(var * var.T)
+    return {"covariance": cov, "correlation": np.clip(corr, -1.0, 1.0), "observations": count, "pair_variance": var}
+
+
+def rolling_beta(returns: np.ndarray, benchmark: int, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """各基金相对第 ``benchmark`` 列的滚动 beta，形状同 ``returns``；样本不足处为 NaN。"""
+    min_periods = min_periods or max(2, window // 2)
+    valid = ~np.isnan(returns)
+    both = valid & valid[:, [benchmark]]
+    x = np.where(both, returns, 0.0)
+    b = np.where(both, returns[:, [benchmark]], 0.0)
+
+    def windowed(a: np.ndarray) -> np.ndarray:
+        c = np.cumsum(np.vstack((np.zeros((1, a.shape[1])), a)), axis=0)
+        return c[1:] - c[np.maximum(np.arange(1, a.shape[0] + 1) - window, 0)]
+
+    n = windowed(both.astype(np.float64))
+    sx, sb, sxb, sbb = windowed(x), windowed(b), windowed(x * b), windowed(b * b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = (sxb - sx * sb / n) / (sbb - sb * sb / n)
+    return np.where(n >= min_periods, beta, np.nan)
+
+
+def _json_matrix(a: np.ndarray, digits: int = 6) -> List[list]:
+    rounded = np.round(a, digits)
+    return [[None if v != v else v for v in row] for row in rounded.tolist()]
+
+
+def analyze(matrix: NavMatrix, codes: List[str], benchmark: int, window: int, include_rolling: bool = True) -> dict:
+    """相关系数、协方差（日收益）、全区间 beta 与滚动 beta。"""
+    returns = matrix.returns()
+    stats = pairwise_stats(returns)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = stats["covariance"][:, benchmark] / stats["pair_variance"][benchmark, :]
+    result = {
+        "codes": codes,
+        "benchmark": codes[benchmark],
+        "start_date": matrix.dates[0].item() if matrix.dates.size else None,
+        "end_date": matrix.dates[-1].item() if matrix.dates.size else None,
+        "observations": int(returns.shape[0]),
+        "correlation": _json_matrix(stats["correlation"]),
+        "covariance": _json_matrix(stats["covariance"], digits=10),
+        "beta": dict(zip(codes, _json_matrix(beta[None, :])[0])),
+        "rolling_beta": None,
+    }
+    if include_rolling and returns.shape[0]:
+        rolling = rolling_beta(returns, benchmark, window)
+        result["rolling_beta"] = {
+            "window": window,
+            "dates": matrix.dates[1:].tolist(),
+            "values": dict(zip(codes, _json_matrix(rolling.T))),
+        }
+    return result
+
+
+class NavMatrixCache:
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_bytes = (
+            max_bytes if max_bytes is not None else int(float(os.getenv("ANALYTICS_CACHE_MAX_MB", "64")) * 2**20)
+        )
+        self.ttl = ttl if ttl is not None else float(os.getenv("ANALYTICS_CACHE_TTL", "300"))
+        self._entries: "OrderedDict[Hashable, NavMatrix]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[NavMatrix]:
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = entry is not None and entry.version == version
+            if fresh and (self.ttl <= 0 or time.monotonic() - entry.loaded_at <= self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, matrix: NavMatrix):
+        matrix.loaded_at = time.monotonic()
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if matrix.nbytes > self.max_bytes:
+                return
+            self._entries[key] = matrix
+            self._bytes += matrix.nbytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+nav_matrix_cache = NavMatrixCache()
+
+
+def load_nav_matrix(db: Session, fund_ids: Sequence[int], start_date, end_date, fill: str = "ffill") -> NavMatrix:
+    """取对齐矩阵：先查缓存（以各基金净值快照的 generation 为版本），未命中时一次查询构建。"""
+    key = (tuple(sorted(set(fund_ids))), start_date, end_date, fill)
+    version = tuple(sorted(crud.get_nav_generations_by_id(db, list(key[0])).items()))
+    cached = nav_matrix_cache.get(key, version)
+    if cached is None:
+        cached = build_nav_matrix(key[0], crud.iter_fund_nav_chunks(db, list(key[0]), start_date, end_date), fill)
+        cached.version = version
+        nav_matrix_cache.put(key, cached)
+    if list(cached.fund_ids) == list(fund_ids):
+        return cached
+    # 缓存按排序后的基金集合存放，按请求顺序重排列
+    cols = np.searchsorted(cached.fund_ids, np.asarray(list(fund_ids), dtype=np.int64))
+    return NavMatrix(dates=cached.dates, fund_ids=cached.fund_ids[cols], values=cached.values[:, cols], version=version)
@@ -0,0 +1,38 @@
+"""回测结果去重：请求参数 + 数据版本的规范化哈希。
+
+同一组基金（与顺序、重复无关）、区间与策略参数（补齐默认值、统一为浮点）在数据未变化时
+得到相同的键。数据版本取每只基金的 ``(最新净值日期, generation)``，有新净值写入时
+``generation`` 递增，旧键自然失效。
+"""
+
+import dataclasses
+import hashlib
+import json
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+CACHE_KEY_VERSION = 1
+
+
+def backtest_cache_key(
+    fund_codes: List[str],
+    start_date: date,
+    end_date: date,
+    params,
+    data_versions: Dict[str, Optional[Tuple[date, int]]],
+) -> str:
+    codes = sorted(set(fund_codes))
+    data = []
+    for code in codes:
+        version = data_versions.get(code)
+        data.append([code, version[0].isoformat(), version[1]] if version else [code])
+    payload = {
+        "v": CACHE_KEY_VERSION,
+        "fund_codes": codes,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "params": dataclasses.asdict(params),
+        "data": data,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
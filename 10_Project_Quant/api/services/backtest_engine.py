@@ -0,0 +1,511 @@
+"""网格交易回测引擎（NumPy 向量化实现）。
+
+策略参数（``strategy_params``，与前端回测配置页一致）：
+
+- ``fall_ratio``：下跌触发比例。第 k 条买入线为 ``base_price * (1 - fall_ratio) ** k``
+- ``rise_ratio``：上涨触发比例。第 k 格在价格回到 ``买入线 * (1 + rise_ratio)`` 时卖出
+- ``multiplier``：加倍投系数。第 k 格的买入金额为首格的 ``multiplier ** (k - 1)`` 倍
+- ``grid_count``：网格层数，默认 10
+- ``initial_capital``：初始资金，默认 100000，多只基金平均分配
+- ``fee_rate``：单边交易费率，默认 0
+- ``base_price``：网格基准价，默认取区间内第一个净值
+- ``risk_free_rate``：年化无风险利率（用于夏普比率），默认 0
+
+每一格的持仓状态只取决于"最近一次触及买入线"是否晚于"最近一次触及卖出线"，
+因此可以对 (网格层, 交易日) 二维数组做 ``maximum.accumulate``，无需逐日循环。
+``simulate_grid_reference`` 是逐日循环的朴素实现，仅用于正确性校验与基准测试。
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+from itertools import product
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .. import crud
+from .nav_cache import nav_cache
+from .lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+TRADING_DAYS_PER_YEAR = 252
+
+NavSeries = Tuple["np.ndarray", "np.ndarray"]
+
+
+@dataclass(frozen=True)
+class GridParams:
+    rise_ratio: float
+    fall_ratio: float
+    multiplier: float = 1.0
+    grid_count: int = 10
+    initial_capital: float = 100000.0
+    fee_rate: float = 0.0
+    base_price: Optional[float] = None
+    risk_free_rate: float = 0.0
+
+    @classmethod
+    def from_dict(cls, params: Dict[str, Any]) -> "GridParams":
+        """从 ``strategy_params`` 构造并校验参数，非法时抛出 ``ValueError``。"""
+        known = {k: params[k] for k in cls.__dataclass_fields__ if params.get(k) is not None}
+        missing = [k for k in ("rise_ratio", "fall_ratio") if k not in known]
+        if missing:
+            raise ValueError(f"Missing strategy params: {', '.join(missing)}")
+        try:
+            grid = cls(
+                rise_ratio=float(known["rise_ratio"]),
+                fall_ratio=float(known["fall_ratio"]),
+                multiplier=float(known.get("multiplier", 1.0)),
+                grid_count=int(known.get("grid_count", 10)),
+                initial_capital=float(known.get("initial_capital", 100000.0)),
+                fee_rate=float(known.get("fee_rate", 0.0)),
+                base_price=float(known["base_price"]) if "base_price" in known else None,
+                risk_free_rate=float(known.get("risk_free_rate", 0.0)),
+            )
+        except (TypeError, ValueError):
+            raise ValueError("Strategy params must be numeric")
+        if not 0 < grid.rise_ratio < 1 or not 0 < grid.fall_ratio < 1:
+            raise ValueError("rise_ratio and fall_ratio must be between 0 and 1")
+        if grid.multiplier < 1:
+            raise ValueError("multiplier must be >= 1")
+        if not 1 <= grid.grid_count <= 100:
+            raise ValueError("grid_count must be between 1 and 100")
+        if grid.initial_capital <= 0:
+            raise ValueError("initial_capital must be positive")
+        if not 0 <= grid.fee_rate < 0.1:
+            raise ValueError("fee_rate must be between 0 and 0.1")
+        if grid.base_price is not None and grid.base_price <= 0:
+            raise ValueError("base_price must be positive")
+        return grid
+
+
+@dataclass
+class GridLevels:
+    buy_lines: np.ndarray
+    sell_lines: np.ndarray
+    shares: np.ndarray
+
+
+@dataclass
+class FundRun:
+    """单只基金的模拟结果（按该基金自身的交易日对齐）。"""
+
+    code: str
+    dates: np.ndarray
+    navs: np.ndarray
+    equity: np.ndarray
+    position: np.ndarray
+    signal_idx: np.ndarray
+    signal_qty: np.ndarray
+    trade_pnl: np.ndarray
+
+
+@dataclass
+class BacktestOutput:
+    dates: np.ndarray
+    equity: np.ndarray
+    metrics: Dict[str, Optional[float]]
+    runs: Dict[str, FundRun] = field(default_factory=dict)
+    fund_metrics: Dict[str, Dict[str, Optional[float]]] = field(default_factory=dict)
+
+    def iter_signals(self) -> Iterator[Dict[str, Any]]:
+        """按基金、日期顺序产出交易信号，``portfolio_value`` 为当日组合总市值。"""
+        for code, run in self.runs.items():
+            if run.signal_idx.size == 0:
+                continue
+            sig_dates = run.dates[run.signal_idx]
+            pos = np.searchsorted(self.dates, sig_dates)
+            for i, d in enumerate(sig_dates.tolist()):
+                qty = float(run.signal_qty[i])
+                yield {
+                    "signal_date": d,
+                    "fund_code": code,
+                    "signal_type": "buy" if qty > 0 else "sell",
+                    "price": float(run.navs[run.signal_idx[i]]),
+                    "quantity": int(abs(qty)),
+                    "portfolio_value": round(float(self.equity[pos[i]]), 2),
+                }
+
+    def signal_columns(self) -> Dict[str, np.ndarray]:
+        """交易信号的列式表示（按基金、日期顺序），``fund_index`` 指向 ``fund_codes``。"""
+        codes = [code for code, run in self.runs.items() if run.signal_idx.size]
+        parts = [self.runs[code] for code in codes]
+        if not parts:
+            return {
+                "fund_codes": np.array([], dtype="U1"),
+                "signal_date": np.array([], dtype="datetime64[D]"),
+                "fund_index": np.array([], dtype=np.int32),
+                "quantity": np.array([], dtype=np.int64),
+                "price": np.array([], dtype=np.float64),
+                "portfolio_value": np.array([], dtype=np.float64),
+            }
+        sig_dates = np.concatenate([run.dates[run.signal_idx] for run in parts]).astype("datetime64[D]")
+        return {
+            "fund_codes": np.array(codes),
+            "signal_date": sig_dates,
+            "fund_index": np.repeat(np.arange(len(parts), dtype=np.int32), [run.signal_idx.size for run in parts]),
+            "quantity": np.concatenate([run.signal_qty for run in parts]).astype(np.int64),
+            "price": np.concatenate([run.navs[run.signal_idx] for run in parts]),
+            "portfolio_value": np.round(self.equity[np.searchsorted(self.dates, sig_dates)], 2),
+        }
+
+    def total_signals(self) -> int:
+        return int(sum(run.signal_idx.size for run in self.runs.values()))
+
+
+def build_grid_levels(base_price: float, params: GridParams, capital: float) -> GridLevels:
+    """计算每一格的买入线、卖出线与固定持有份额（整数份）。"""
+    k = np.arange(1, params.grid_count + 1, dtype=np.float64)
+    buy_lines = base_price * (1.0 - params.fall_ratio) ** k
+    sell_lines = buy_lines * (1.0 + params.rise_ratio)
+    weights = params.multiplier ** (k - 1.0)
+    amounts = capital * weights / weights.sum()
+    shares = np.floor(amounts / (buy_lines * (1.0 + params.fee_rate)))
+    if not shares.any():
+        raise ValueError("initial_capital is too small for the grid")
+    return GridLevels(buy_lines=buy_lines, sell_lines=sell_lines, shares=shares)
+
+
+def _grid_changes(navs: np.ndarray, buy_lines: np.ndarray, sell_lines: np.ndarray) -> np.ndarray:
+    """返回 (网格层, 交易日) 的持仓变化矩阵：+1 买入、-1 卖出、0 不变。"""
+    # 序号从 1 开始、0 表示从未触及；十年日线用 int16 即可，减少累积扫描的内存带宽
+    dtype = np.int16 if navs.size < np.iinfo(np.int16).max else np.int32
+    idx = np.arange(1, navs.size + 1, dtype=dtype)
+    last_buy = np.maximum.accumulate((navs[None, :] <= buy_lines[:, None]) * idx, axis=1)
+    last_sell = np.maximum.accumulate((navs[None, :] >= sell_lines[:, None]) * idx, axis=1)
+    held = (last_buy > last_sell).view(np.int8)
+    return np.diff(held, axis=1, prepend=np.int8(0))
+
+
+def _closed_trades(navs: np.ndarray, change: np.ndarray, shares: np.ndarray, fee_rate):
+    """配对每一格的买卖事件，返回 ``(所在行, 已平仓收益, 全部事件)``。"""
+    # np.nonzero 按行优先返回，同一格内的买卖事件严格交替，卖出事件的前一个即为对应买入
+    k_idx, t_idx = np.nonzero(change)
+    sign = change[k_idx, t_idx]
+    closes = np.flatnonzero(sign < 0)
+    rows = k_idx[closes]
+    qty = shares[rows]
+    sell_px = navs[t_idx[closes]]
+    buy_px = navs[t_idx[closes - 1]]
+    fee = fee_rate[rows] if np.ndim(fee_rate) else fee_rate
+    return rows, qty * (sell_px - buy_px) - fee * qty * (sell_px + buy_px), (k_idx, t_idx, sign)
+
+
+def simulate_grid(navs: np.ndarray, levels: GridLevels, capital: float, fee_rate: float = 0.0):
+    """向量化模拟单只基金，返回 ``(equity, position, signal_idx, signal_qty, trade_pnl)``。"""
+    navs = np.ascontiguousarray(navs, dtype=np.float64)
+    change = _grid_changes(navs, levels.buy_lines, levels.sell_lines)
+    delta = levels.shares @ change
+    gross = levels.shares @ np.abs(change)
+
+    position = np.cumsum(delta)
+    cash = capital - np.cumsum((delta + fee_rate * gross) * navs)
+    equity = cash + position * navs
+
+    signal_idx = np.flatnonzero(delta)
+    signal_qty = delta[signal_idx]
+    _, trade_pnl, _ = _closed_trades(navs, change, levels.shares, fee_rate)
+    return equity, position, signal_idx, signal_qty, trade_pnl
+
+
+def simulate_grid_batch(navs: np.ndarray, levels_list: List[GridLevels], capitals: np.ndarray, fee_rates: np.ndarray):
+    """同一净值序列上批量模拟多组参数：所有组合的网格层堆叠成一个矩阵一次计算。
+
+    返回 ``(equity, n_signals, wins, closed, gains, losses)``，第一维为参数组合。
+    """
+    navs = np.ascontiguousarray(navs, dtype=np.float64)
+    counts = np.array([lv.shares.size for lv in levels_list])
+    combo = np.repeat(np.arange(len(levels_list)), counts)
+    shares = np.concatenate([lv.shares for lv in levels_list])
+    change = _grid_changes(
+        navs,
+        np.concatenate([lv.buy_lines for lv in levels_list]),
+        np.concatenate([lv.sell_lines for lv in levels_list]),
+    )
+
+    # 事件远比 (网格层 × 交易日) 单元稀疏，按事件聚合到 (组合, 交易日)，避免稠密矩阵乘加
+    n, length = len(levels_list), navs.size
+    rows, pnl, (k_idx, t_idx, sign) = _closed_trades(navs, change, shares, fee_rates[combo])
+    cell = combo[k_idx] * length + t_idx
+    traded = shares[k_idx]
+    delta = np.bincount(cell, weights=traded * sign, minlength=n * length).reshape(n, length)
+    gross = np.bincount(cell, weights=traded, minlength=n * length).reshape(n, length)
+    position = np.cumsum(delta, axis=1)
+    cash = capitals[:, None] - np.cumsum((delta + fee_rates[:, None] * gross) * navs, axis=1)
+    equity = cash + position * navs
+
+    owner = combo[rows]
+    wins = np.bincount(owner, weights=pnl > 0, minlength=n)
+    closed = np.bincount(owner, minlength=n)
+    gains = np.bincount(owner, weights=np.where(pnl > 0, pnl, 0.0), minlength=n)
+    losses = np.bincount(owner, weights=np.where(pnl < 0, -pnl, 0.0), minlength=n)
+    return equity, np.count_nonzero(delta, axis=1), wins, closed, gains, losses
+
+
+def simulate_grid_reference(navs, levels: GridLevels, capital: float, fee_rate: float = 0.0):
+    """逐日逐格循环的朴素实现，与 ``simulate_grid`` 语义一致，仅用于校验与基准测试。"""
+    n_levels = len(levels.buy_lines)
+    held = [False] * n_levels
+    open_px = [0.0] * n_levels
+    cash = float(capital)
+    position = 0.0
+    equity, positions, signal_idx, signal_qty, trade_pnl = [], [], [], [], []
+    for t, price in enumerate(navs):
+        price = float(price)
+        day_delta = 0.0
+        for k in range(n_levels):
+            qty = float(levels.shares[k])
+            if not held[k] and price <= levels.buy_lines[k]:
+                held[k] = True
+                open_px[k] = price
+                day_delta += qty
+                cash -= qty * price * (1.0 + fee_rate)
+            elif held[k] and price >= levels.sell_lines[k]:
+                held[k] = False
+                day_delta -= qty
+                cash += qty * price * (1.0 - fee_rate)
+                trade_pnl.append(qty * (price - open_px[k]) - fee_rate * qty * (price + open_px[k]))
+        position += day_delta
+        if day_delta != 0:
+            signal_idx.append(t)
+            signal_qty.append(day_delta)
+        equity.append(cash + position * price)
+        positions.append(position)
+    return (
+        np.array(equity),
+        np.array(positions),
+        np.array(signal_idx, dtype=np.int64),
+        np.array(signal_qty),
+        np.array(trade_pnl),
+    )
+
+
+def compute_metrics_batch(
+    dates: np.ndarray,
+    equity: np.ndarray,
+    initial_capital: np.ndarray,
+    wins: np.ndarray,
+    closed: np.ndarray,
+    gains: np.ndarray,
+    losses: np.ndarray,
+    total_trades: np.ndarray,
+    risk_free_rate: np.ndarray,
+) -> List[Dict[str, Optional[float]]]:
+    """按行（参数组合）批量计算回测指标，``equity`` 形状为 (组合数, 交易日数)。"""
+    total_return = equity[:, -1] / initial_capital - 1.0
+    days = int((dates[-1] - dates[0]).astype(np.int64)) if dates.size > 1 else 0
+
+    curve = np.hstack((initial_capital[:, None], equity))
+    peak = np.maximum.accumulate(curve, axis=1)
+    max_drawdown = np.max(1.0 - curve / peak, axis=1)
+
+    daily = curve[:, 1:] / curve[:, :-1] - 1.0
+    excess = daily - (risk_free_rate / TRADING_DAYS_PER_YEAR)[:, None]
+    std = excess.std(axis=1, ddof=1) if excess.shape[1] > 1 else np.zeros(len(equity))
+    mean = excess.mean(axis=1)
+
+    results = []
+    for i in range(len(equity)):
+        tr = float(total_return[i])
+        results.append(
+            {
+                "total_return": tr,
+                "annual_return": (1.0 + tr) ** (365.0 / days) - 1.0 if days > 0 and tr > -1 else None,
+                "max_drawdown": float(max_drawdown[i]),
+                "sharpe_ratio": float(mean[i] / std[i] * math.sqrt(TRADING_DAYS_PER_YEAR)) if std[i] > 0 else None,
+                "win_rate": float(wins[i] / closed[i] * 100.0) if closed[i] else None,
+                "profit_factor": float(gains[i] / losses[i]) if losses[i] > 0 else None,
+                "total_trades": int(total_trades[i]),
+                "closed_trades": int(closed[i]),
+            }
+        )
+    return results
+
+
+def compute_metrics(
+    dates: np.ndarray,
+    equity: np.ndarray,
+    initial_capital: float,
+    trade_pnl: np.ndarray,
+    total_trades: int,
+    risk_free_rate: float = 0.0,
+) -> Dict[str, Optional[float]]:
+    """计算回测指标。收益与回撤为小数（0.1 表示 10%），胜率为百分数（0~100）。"""
+    return compute_metrics_batch(
+        dates,
+        equity[None, :],
+        np.array([initial_capital], dtype=np.float64),
+        wins=np.array([(trade_pnl > 0).sum()]),
+        closed=np.array([trade_pnl.size]),
+        gains=np.array([trade_pnl[trade_pnl > 0].sum()]),
+        losses=np.array([-trade_pnl[trade_pnl < 0].sum()]),
+        total_trades=np.array([total_trades]),
+        risk_free_rate=np.array([risk_free_rate], dtype=np.float64),
+    )[0]
+
+
+def run_grid_backtest(series: Dict[str, NavSeries], params: GridParams, vectorized: bool = True) -> BacktestOutput:
+    """对多只基金执行网格回测，资金平均分配，组合净值按所有交易日的并集前向填充。"""
+    if not series:
+        raise ValueError("No NAV data for the requested funds")
+    simulate = simulate_grid if vectorized else simulate_grid_reference
+    capital = params.initial_capital / len(series)
+
+    runs: Dict[str, FundRun] = {}
+    fund_metrics: Dict[str, Dict[str, Optional[float]]] = {}
+    for code, (dates, navs) in series.items():
+        if navs.size < 2:
+            raise ValueError(f"Not enough NAV data for fund {code}")
+        base = params.base_price or float(navs[0])
+        levels = build_grid_levels(base, params, capital)
+        equity, position, signal_idx, signal_qty, trade_pnl = simulate(navs, levels, capital, params.fee_rate)
+        runs[code] = FundRun(code, dates, navs, equity, position, signal_idx, signal_qty, trade_pnl)
+        fund_metrics[code] = compute_metrics(
+            dates, equity, capital, trade_pnl, signal_idx.size, params.risk_free_rate
+        )
+
+    all_dates = np.unique(np.concatenate([run.dates for run in runs.values()]))
+    total = np.zeros(all_dates.size, dtype=np.float64)
+    for run in runs.values():
+        pos = np.searchsorted(run.dates, all_dates, side="right") - 1
+        total += np.where(pos >= 0, run.equity[np.clip(pos, 0, None)], capital)
+
+    all_pnl = np.concatenate([run.trade_pnl for run in runs.values()])
+    n_signals = sum(run.signal_idx.size for run in runs.values())
+    metrics = compute_metrics(all_dates, total, params.initial_capital, all_pnl, n_signals, params.risk_free_rate)
+    return BacktestOutput(dates=all_dates, equity=total, metrics=metrics, runs=runs, fund_metrics=fund_metrics)
+
+
+MAX_SWEEP_COMBINATIONS = 5000
+SWEEP_METRICS = ("total_return", "annual_return", "max_drawdown", "sharpe_ratio", "win_rate", "profit_factor", "total_trades")
+# 单批堆叠的 (网格层 × 交易日) 单元数上限，控制批量模拟的内存占用
+_SWEEP_BATCH_CELLS = 4_000_000
+
+
+def _range_values(start: float, step: float, count: int) -> List[float]:
+    return [round(start + i * step, 10) for i in range(count)]
+
+
+def expand_param_grid(base: Dict[str, Any], grid: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """把参数范围展开为笛卡尔积。取值可为列表，或 ``{"start", "stop", "step"}``（含 stop）。
+
+    先按各轴取值个数校验组合总数，超过 ``MAX_SWEEP_COMBINATIONS`` 时不展开任何一轴。
+    """
+    # (参数名, 取值个数, 生成取值的函数)：范围轴在总数校验通过后才展开
+    specs = []
+    for name, spec in grid.items():
+        if isinstance(spec, dict):
+            try:
+                start, stop, step = float(spec["start"]), float(spec["stop"]), float(spec["step"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Range for {name} needs numeric start, stop and step")
+            if step <= 0 or stop < start or not math.isfinite(stop):
+                raise ValueError(f"Invalid range for {name}")
+            count = int(math.floor((stop - start) / step + 1e-9)) + 1
+            specs.append((name, count, partial(_range_values, start, step, count)))
+        else:
+            values = list(spec) if isinstance(spec, (list, tuple)) else [spec]
+            if not values:
+                raise ValueError(f"No values for {name}")
+            specs.append((name, len(values), partial(list, values)))
+
+    total = math.prod(count for _, count, _ in specs)
+    if total > MAX_SWEEP_COMBINATIONS:
+        raise ValueError(f"Too many combinations: {total} > {MAX_SWEEP_COMBINATIONS}")
+    axes = [(name, make()) for name, _, make in specs]
+    names = [name for name, _ in axes]
+    return [{**base, **dict(zip(names, combo))} for combo in product(*(values for _, values in axes))]
+
+
+def run_grid_sweep(series: Dict[str, NavSeries], params_list: List[GridParams]) -> List[Dict[str, Optional[float]]]:
+    """在同一份净值数据上评估多组参数，返回与 ``params_list`` 顺序一致的组合指标。
+
+    与逐个调用 ``run_grid_backtest`` 的组合指标一致，但按参数轴分批堆叠成矩阵计算。
+    """
+    if not series:
+        raise ValueError("No NAV data for the requested funds")
+    for code, (_, navs) in series.items():
+        if navs.size < 2:
+            raise ValueError(f"Not enough NAV data for fund {code}")
+
+    n_funds = len(series)
+    all_dates = np.unique(np.concatenate([dates for dates, _ in series.values()]))
+    positions = {
+        code: np.searchsorted(dates, all_dates, side="right") - 1 for code, (dates, _) in series.items()
+    }
+    max_rows = max(p.grid_count for p in params_list)
+    batch = max(1, _SWEEP_BATCH_CELLS // (max_rows * max(navs.size for _, navs in series.values())))
+
+    results: List[Dict[str, Optional[float]]] = []
+    for lo in range(0, len(params_list), batch):
+        chunk = params_list[lo:lo + batch]
+        n = len(chunk)
+        capital = np.array([p.initial_capital for p in chunk], dtype=np.float64) / n_funds
+        fee_rates = np.array([p.fee_rate for p in chunk], dtype=np.float64)
+        total = np.zeros((n, all_dates.size))
+        wins, closed, gains, losses, signals = (np.zeros(n) for _ in range(5))
+        for code, (dates, navs) in series.items():
+            levels = [build_grid_levels(p.base_price or float(navs[0]), p, capital[i]) for i, p in enumerate(chunk)]
+            equity, n_sig, w, c, g, l = simulate_grid_batch(navs, levels, capital, fee_rates)
+            pos = positions[code]
+            total += np.where(pos >= 0, equity[:, np.clip(pos, 0, None)], capital[:, None])
+            wins += w
+            closed += c
+            gains += g
+            losses += l
+            signals += n_sig
+        results.extend(
+            compute_metrics_batch(
+                all_dates,
+                total,
+                capital * n_funds,
+                wins,
+                closed,
+                gains,
+                losses,
+                signals,
+                np.array([p.risk_free_rate for p in chunk], dtype=np.float64),
+            )
+        )
+    return results
+
+
+def rank_sweep_results(rows: List[Dict[str, Any]], sort_by: str = "sharpe_ratio", sort_order: str = "desc"):
+    """按指标排序，缺失值（如无波动时的夏普）始终排在最后。"""
+    if sort_by not in SWEEP_METRICS:
+        raise ValueError(f"sort_by must be one of: {', '.join(SWEEP_METRICS)}")
+    reverse = sort_order.lower() != "asc"
+    present = [r for r in rows if r["metrics"][sort_by] is not None]
+    missing = [r for r in rows if r["metrics"][sort_by] is None]
+    present.sort(key=lambda r: r["metrics"][sort_by], reverse=reverse)
+    return present + missing
+
+
+def load_nav_arrays(
+    db: Session,
+    fund_codes: List[str],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    generations: Optional[Dict[str, Tuple[date, int]]] = None,
+) -> Dict[str, NavSeries]:
+    """经由进程内净值缓存加载多只基金在区间内的净值，返回 ``{code: (dates, navs)}``。
+
+    ``generations`` 为 ``crud.get_nav_generations`` 的结果，给出时缓存条目必须是同一数据版本，
+    否则重新加载（其他进程写入的净值不会通知本进程的缓存）。
+    """
+    fund_ids = crud.get_fund_ids_by_codes(db, fund_codes)
+    series: Dict[str, NavSeries] = {}
+    for code in fund_codes:
+        if code not in fund_ids:
+            continue
+        version = (generations or {}).get(code)
+        entry = nav_cache.get(db, fund_ids[code], generation=version[1] if version else None)
+        window = entry.window(start_date, end_date)
+        if window.dates.size:
+            series[code] = (window.dates, window.navs)
+    return series
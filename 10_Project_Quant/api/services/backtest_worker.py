@@ -0,0 +1,181 @@
+"""回测后台执行：有界进程池 + ``Backtest.status`` 生命周期管理。
+
+``/api/backtest/run`` 只负责落库一条 pending 记录并把 ``task_id`` 投递到进程池，
+CPU 密集的回测在独立进程中执行，不占用 FastAPI 处理 ``/api/funds`` 的线程池。
+状态流转：pending → running → completed / failed（失败原因写入 ``error_message``）。
+running 期间工作进程按 ``JOB_LEASE_SECONDS`` 续期租约（见 ``leases``），多个 API 进程共用一个库时，
+各自启动的 ``recover`` 只处理租约已过期的任务；最终状态只在本进程仍持有租约时写入，否则丢弃结果。
+
+参数寻优（``/api/backtest/sweep``）使用单独的进程池，排队中的单次回测不会被大批量寻优挤占；
+请求协程等待结果期间不占用线程。
+
+- ``BACKTEST_WORKERS``：工作进程数，默认 ``min(4, CPU 核数)``
+- ``SWEEP_WORKERS``：参数寻优的工作进程数，默认 ``max(1, BACKTEST_WORKERS // 2)``
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from .backtest_cache import backtest_cache_key
+from .backtest_engine import GridParams, NavSeries, load_nav_arrays, run_grid_backtest, run_grid_sweep
+from .leases import Heartbeat
+
+logger = logging.getLogger(__name__)
+
+
+def _renew_lease(session_factory: Callable[[], Session], task_id: str) -> bool:
+    # 心跳线程使用独立会话
+    db = session_factory()
+    try:
+        return crud.renew_backtest_lease(db, task_id)
+    finally:
+        db.close()
+
+
+def execute_backtest(task_id: str, session_factory: Optional[Callable[[], Session]] = None) -> str:
+    """在当前进程内执行一个回测任务并返回最终状态，供工作进程调用。"""
+    if session_factory is None:
+        from ..database import SessionLocal as session_factory
+
+    db = session_factory()
+    try:
+        # pending → running 用条件 UPDATE 抢占，避免多个进程重复执行同一任务
+        if not crud.claim_backtest(db, task_id):
+            backtest = crud.get_backtest_by_task_id(db, task_id)
+            return backtest.status.value if backtest else models.BacktestStatus.failed.value
+        backtest = crud.get_backtest_by_task_id(db, task_id)
+        try:
+            with Heartbeat(lambda: _renew_lease(session_factory, task_id)) as heartbeat:
+                params = GridParams.from_dict(backtest.strategy_params)
+                # 以实际使用的数据版本为准，排队期间有新净值写入时不会把结果挂到旧键上；
+                # 净值按同一版本从缓存读取，缓存落后于数据库时重新加载
+                generations = crud.get_nav_generations(db, backtest.fund_codes)
+                backtest.cache_key = backtest_cache_key(
+                    backtest.fund_codes, backtest.start_date, backtest.end_date, params, generations
+                )
+                series = load_nav_arrays(db, backtest.fund_codes, backtest.start_date, backtest.end_date, generations)
+                missing = [code for code in backtest.fund_codes if code not in series]
+                if missing:
+                    raise ValueError(f"No NAV data for funds: {', '.join(missing)}")
+                output = run_grid_backtest(series, params)
+                # 状态与结果在同一事务中写入；租约已被收回时任务可能已失败或被其他进程接手，丢弃结果
+                if heartbeat.lost or not crud.finish_backtest(
+                    db, task_id, models.BacktestStatus.completed, commit=False
+                ):
+                    db.rollback()
+                    logger.warning("Backtest %s lost its lease, result dropped", task_id)
+                else:
+                    crud.save_backtest_result(db, backtest, output)
+        except Exception as exc:
+            db.rollback()
+            if not isinstance(exc, ValueError):
+                logger.exception("Backtest %s failed", task_id)
+            if not crud.finish_backtest(db, task_id, models.BacktestStatus.failed, str(exc) or type(exc).__name__):
+                logger.warning("Backtest %s lost its lease, failure not recorded", task_id)
+        db.refresh(backtest)
+        return backtest.status.value
+    finally:
+        db.close()
+
+
+class BacktestQueue:
+    """惰性创建的有界进程池，``submit`` 只投递 ``task_id``，数据由工作进程自行加载。"""
+
+    def __init__(self, max_workers: Optional[int] = None, sweep_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("BACKTEST_WORKERS", min(4, os.cpu_count() or 1)))
+        self.sweep_workers = sweep_workers or int(os.getenv("SWEEP_WORKERS", max(1, self.max_workers // 2)))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._sweep_executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _get_sweep_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._sweep_executor is None:
+                self._sweep_executor = ProcessPoolExecutor(
+                    max_workers=self.sweep_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._sweep_executor
+
+    def submit(self, task_id: str) -> Future:
+        future = self._get_executor().submit(execute_backtest, task_id)
+        future.add_done_callback(lambda f: self._on_done(task_id, f))
+        return future
+
+    def _on_done(self, task_id: str, future: Future):
+        if future.cancelled() or future.exception() is None:
+            return
+        exc = future.exception()
+        logger.error("Backtest worker for %s crashed: %r", task_id, exc)
+        if isinstance(exc, BrokenProcessPool):
+            # 进程池损坏后无法继续提交，丢弃它，下次 submit 时重建
+            with self._lock:
+                self._executor = None
+        from ..database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            backtest = crud.get_backtest_by_task_id(db, task_id)
+            if backtest is not None and backtest.status in (models.BacktestStatus.pending, models.BacktestStatus.running):
+                crud.update_backtest_status(db, backtest, models.BacktestStatus.failed, "Worker process crashed")
+        finally:
+            db.close()
+
+    async def run_sweep(self, series: Dict[str, NavSeries], params_list: List[GridParams], min_chunk: int = 16):
+        """把参数组合切分给寻优进程池并行评估，净值数组只加载一次、随分片下发。"""
+        size = max(min_chunk, -(-len(params_list) // self.sweep_workers))
+        executor = self._get_sweep_executor()
+        futures = [
+            asyncio.wrap_future(executor.submit(run_grid_sweep, series, params_list[lo:lo + size]))
+            for lo in range(0, len(params_list), size)
+        ]
+        try:
+            chunks = await asyncio.gather(*futures)
+        except BrokenProcessPool:
+            # 与回测进程池相同：丢弃损坏的进程池，下次寻优时重建
+            with self._lock:
+                if self._sweep_executor is executor:
+                    self._sweep_executor = None
+            raise
+        return [metrics for chunk in chunks for metrics in chunk]
+
+    def recover(self, db: Session) -> List[str]:
+        """进程启动时：租约已过期的 running 任务标记为失败，pending 的任务重新入队。
+
+        其他进程正在执行的任务租约仍有效，不受影响；pending 任务可能被多个进程重复投递，由
+        ``claim_backtest`` 保证只执行一次。
+        """
+        for backtest in crud.get_stale_backtests(db):
+            crud.update_backtest_status(db, backtest, models.BacktestStatus.failed, "Worker interrupted")
+        task_ids = [b.task_id for b in crud.get_backtests_by_status(db, models.BacktestStatus.pending)]
+        for task_id in task_ids:
+            self.submit(task_id)
+        return task_ids
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            for executor in (self._executor, self._sweep_executor):
+                if executor is not None:
+                    executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = self._sweep_executor = None
+
+
+backtest_queue = BacktestQueue()
@@ -0,0 +1,122 @@
+"""图表序列降采样（Largest-Triangle-Three-Buckets）。
+
+前端图表宽度约 1000 像素，返回上千个点只会增加序列化与传输成本。LTTB 把序列分成
+``max_points - 2`` 个桶，每个桶选出与「上一个选中点、下一个桶均值」构成三角形面积最大的点，
+能保留峰谷形状。分桶与各桶均值一次向量化算出；选点依赖上一个桶的结果，逐桶进行：
+宽桶在候选点矩阵上向量化求面积 argmax，窄桶（典型的几千点 → 1000 点）用标量循环。
+
+降采样结果按 ``(序列标识, 区间, 分辨率)`` 缓存在进程内 LRU 中，源数据版本变化时自动失效。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from .lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+MIN_POINTS = 3
+_SCALAR_BUCKET_WIDTH = 16
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """返回降采样后保留点的下标（升序，包含首尾点）。"""
+    n = y.size
+    if max_points >= n or n <= MIN_POINTS:
+        return np.arange(n)
+    if max_points < MIN_POINTS:
+        raise ValueError(f"max_points must be at least {MIN_POINTS}")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    n_buckets = max_points - 2
+    # 中间 n-2 个点均分到各桶：edges[i]..edges[i+1]
+    edges = (1 + np.arange(n_buckets + 1) * (n - 2) / n_buckets).astype(np.int64)
+    edges[-1] = n - 1
+    sizes = np.diff(edges)
+    width = int(sizes.max())
+    cand = edges[:-1, None] + np.arange(width)[None, :]
+    valid = np.arange(width)[None, :] < sizes[:, None]
+    cand = np.where(valid, cand, edges[:-1, None])
+
+    # 每个桶对应的「下一个桶均值」；最后一个桶用末点
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    next_x = np.append(sums_x[1:] / sizes[1:], x[-1])
+    next_y = np.append(sums_y[1:] / sizes[1:], y[-1])
+
+    out = np.empty(max_points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    if width <= _SCALAR_BUCKET_WIDTH:
+        # 桶很窄时逐桶调用 NumPy 的固定开销远大于计算本身，改用 Python 标量
+        xs, ys, cands = x.tolist(), y.tolist(), cand.tolist()
+        for i, (nx, ny, row, size) in enumerate(zip(next_x.tolist(), next_y.tolist(), cands, sizes.tolist())):
+            ax, ay = xs[a], ys[a]
+            a = max(row[:size], key=lambda j: abs((ax - nx) * (ys[j] - ay) - (ax - xs[j]) * (ny - ay)))
+            out[i + 1] = a
+        return out
+    cx_all, cy_all = x[cand], y[cand]
+    for i in range(n_buckets):
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (cy_all[i] - ay) - (ax - cx_all[i]) * (next_y[i] - ay))
+        area[~valid[i]] = -1.0
+        a = int(cand[i, int(np.argmax(area))])
+        out[i + 1] = a
+    return out
+
+
+class DownsampleCache:
+    """降采样结果的 LRU 缓存；``version`` 不同视为源数据已变化。"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, version: Hashable, compute: Callable[[], object]):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] == version:
+                self._entries.move_to_end(key)
+                return hit[1]
+        value = compute()
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+downsample_cache = DownsampleCache()
+
+
+def downsample_nav_records(fund_id: int, arrays, limit: Optional[int], max_points: int):
+    """基金最近 ``limit`` 条净值按单位净值形状降采样为 ``max_points`` 个点的记录列表。"""
+    lo = max(arrays.dates.size - limit, 0) if limit is not None else 0
+    version = (arrays.loaded_at, arrays.dates.size)
+
+    def compute():
+        idx = lo + lttb_indices(arrays.dates[lo:].astype(np.int64), arrays.navs[lo:], max_points)
+        return arrays.take(idx).to_records()
+
+    return downsample_cache.get_or_compute(("fund", fund_id, limit, max_points), version, compute)
+
+
+def downsample_curve(key: Hashable, curve: dict, max_points: int) -> dict:
+    """``{dates, values}`` 形式的曲线（如回测组合净值）降采样；结果不可变，按 key 缓存。"""
+
+    def compute():
+        dates = np.array(curve["dates"], dtype="datetime64[D]")
+        idx = lttb_indices(dates.astype(np.int64), np.asarray(curve["values"], dtype=np.float64), max_points)
+        return {"dates": [curve["dates"][i] for i in idx.tolist()], "values": [curve["values"][i] for i in idx.tolist()]}
+
+    return downsample_cache.get_or_compute(("curve", key, max_points), len(curve["dates"]), compute)
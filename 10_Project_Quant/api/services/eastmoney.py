@@ -1,11 +1,20 @@
+from __future__ import annotations
+
 import json
+import math
 import re
+from concurrent.futures import Executor
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
-from typing import Any, Iterable, List, Optional
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
 
 import requests
+import requests.adapters
+
+from .lazy_import import lazy_module
+
+np = lazy_module("numpy")
 
 
 @dataclass(frozen=True)
@@ -16,7 +25,45 @@ class FundNavPoint:
     daily_change_pct: Optional[Decimal] = None
 
 
-_JSONP_RE = re.compile(r"^[^(]*\((.*)\)\s*;?\s*$", re.DOTALL)
+@dataclass(frozen=True)
+class NavColumns:
+    """一页（或多页合并后）的净值列：``datetime64[D]`` 日期与 float64 净值，累计净值缺失为 NaN。"""
+
+    dates: np.ndarray
+    navs: np.ndarray
+    accumulated_navs: np.ndarray
+
+    def __len__(self) -> int:
+        return self.dates.size
+
+    @classmethod
+    def concat(cls, parts: Sequence["NavColumns"]) -> "NavColumns":
+        if not parts:
+            return cls(np.array([], dtype="datetime64[D]"), np.array([]), np.array([]))
+        return cls(
+            np.concatenate([p.dates for p in parts]),
+            np.concatenate([p.navs for p in parts]),
+            np.concatenate([p.accumulated_navs for p in parts]),
+        )
+
+    def sorted_unique(self) -> "NavColumns":
+        """按日期升序去重；同一日期出现多次时保留最后一次（与逐点解析的字典去重一致）。"""
+        rev = self.dates[::-1]
+        _, first_in_rev = np.unique(rev, return_index=True)
+        idx = self.dates.size - 1 - first_in_rev
+        return NavColumns(self.dates[idx], self.navs[idx], self.accumulated_navs[idx])
+
+    def to_points(self) -> List[FundNavPoint]:
+        return [
+            FundNavPoint(nav_date=d, nav=Decimal(str(n)), accumulated_nav=None if a != a else Decimal(str(a)))
+            for d, n, a in zip(self.dates.tolist(), self.navs.tolist(), self.accumulated_navs.tolist())
+        ]
+
+
+_MISSING_NUMBERS = {None, "", "--", "-"}
+# 真实响应中每行以 FSRQ、DWJZ、LJJZ 依次开头；快速路径只在该假设对每一行都成立时使用
+_LSJZ_ROW_RE = re.compile(r'"FSRQ":\s*"([^"]*)",\s*"DWJZ":\s*"([^"]*)",\s*"LJJZ":\s*"([^"]*)"')
+_TOTAL_COUNT_RE = re.compile(r'"TotalCount":\s*(\d+)')
 
 
 def _to_decimal(value: Any) -> Optional[Decimal]:
@@ -36,10 +83,12 @@ def _loads_maybe_jsonp(text: str) -> dict:
     text = text.strip()
     if text.startswith("{"):
         return json.loads(text)
-    match = _JSONP_RE.match(text)
-    if not match:
+    # jQuery123({...}); —— 只找首个 "(" 和末尾 ")"，不对整个响应体跑正则
+    lo = text.find("(")
+    body = text.rstrip(";").rstrip()
+    if lo < 0 or not body.endswith(")") or len(body) - 1 <= lo:
         raise ValueError("Unexpected response format")
-    return json.loads(match.group(1))
+    return json.loads(body[lo + 1:-1])
 
 
 def parse_eastmoney_lsjz(payload: dict) -> List[FundNavPoint]:
@@ -61,45 +110,125 @@ def parse_eastmoney_lsjz(payload: dict) -> List[FundNavPoint]:
     return navs
 
 
-def fetch_fund_nav_history(
+def _float_column(values: List[Any], missing: float) -> np.ndarray:
+    """字符串/数字列一次转成 float64；空值与 ``--`` 记为 ``missing``。"""
+    return np.array([missing if v in _MISSING_NUMBERS else v for v in values], dtype=np.float64)
+
+
+def parse_eastmoney_lsjz_columns(payload: dict) -> NavColumns:
+    """与 ``parse_eastmoney_lsjz`` 相同的解析规则，但直接产出列数组，不为每行构造对象。
+
+    日期由 NumPy 批量解析 ISO 字符串；单位净值缺失记 0，累计净值缺失记 NaN。``JZZZL`` 不落库，不解析。
+    """
+    data = payload.get("Data") or {}
+    items = [item for item in data.get("LSJZList") or [] if item.get("FSRQ")]
+    return NavColumns(
+        dates=np.array([item["FSRQ"] for item in items], dtype="datetime64[D]"),
+        navs=_float_column([item.get("DWJZ") for item in items], 0.0),
+        accumulated_navs=_float_column([item.get("LJJZ") for item in items], np.nan),
+    )
+
+
+def parse_lsjz_text_columns(text: str) -> Tuple[NavColumns, int]:
+    """直接从响应文本（JSON 或 JSONP）提取列与 ``TotalCount``，跳过 ``json.loads``。
+
+    用一次正则扫描取出每行的 FSRQ/DWJZ/LJJZ；行数与 ``"FSRQ"`` 出现次数不一致（字段顺序不同、
+    出现 null 等）或缺少 ``TotalCount`` 时，退回完整 JSON 解析，结果相同。
+    """
+    rows = _LSJZ_ROW_RE.findall(text)
+    total = _TOTAL_COUNT_RE.search(text)
+    if total is None or len(rows) != text.count('"FSRQ"'):
+        payload = _loads_maybe_jsonp(text)
+        return parse_eastmoney_lsjz_columns(payload), int((payload.get("TotalCount") or 0) or 0)
+    rows = [row for row in rows if row[0]]
+    return (
+        NavColumns(
+            dates=np.array([row[0] for row in rows], dtype="datetime64[D]"),
+            navs=_float_column([row[1] for row in rows], 0.0),
+            accumulated_navs=_float_column([row[2] for row in rows], np.nan),
+        ),
+        int(total.group(1)),
+    )
+
+
+EASTMONEY_LSJZ_URL = "https://api.fund.eastmoney.com/f10/lsjz"
+
+
+def make_session(pool_maxsize: int = 10) -> requests.Session:
+    """创建带 keep-alive 连接池的 Session，可在多个线程间共享。"""
+    sess = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    sess.mount("http://", adapter)
+    sess.mount("https://", adapter)
+    return sess
+
+
+def fetch_lsjz_page(
+    sess: requests.Session,
     fund_code: str,
     start_date: date,
     end_date: date,
+    page_index: int,
     page_size: int = 100,
-    session: Optional[requests.Session] = None,
-) -> List[FundNavPoint]:
-    sess = session or requests.Session()
-    url = "https://api.fund.eastmoney.com/f10/lsjz"
+    url: str = EASTMONEY_LSJZ_URL,
+    columnar: bool = False,
+) -> Tuple[Union[List[FundNavPoint], NavColumns], int]:
+    """拉取一页历史净值，返回 ``(points, TotalCount)``；``columnar=True`` 时 points 为 ``NavColumns``。"""
     headers = {
         "User-Agent": "Mozilla/5.0",
         "Referer": f"https://fundf10.eastmoney.com/jjjz_{fund_code}.html",
         "Accept": "application/json, text/javascript, */*; q=0.01",
     }
+    params = {
+        "fundCode": fund_code,
+        "pageIndex": page_index,
+        "pageSize": page_size,
+        "startDate": start_date.isoformat(),
+        "endDate": end_date.isoformat(),
+    }
+    resp = sess.get(url, headers=headers, params=params, timeout=15)
+    resp.raise_for_status()
+    if columnar:
+        return parse_lsjz_text_columns(resp.text)
+    payload = _loads_maybe_jsonp(resp.text)
+    return parse_eastmoney_lsjz(payload), int((payload.get("TotalCount") or 0) or 0)
 
-    page_index = 1
-    all_points: List[FundNavPoint] = []
-    while True:
-        params = {
-            "fundCode": fund_code,
-            "pageIndex": page_index,
-            "pageSize": page_size,
-            "startDate": start_date.isoformat(),
-            "endDate": end_date.isoformat(),
-        }
-        resp = sess.get(url, headers=headers, params=params, timeout=15)
-        resp.raise_for_status()
-        payload = _loads_maybe_jsonp(resp.text)
-
-        points = parse_eastmoney_lsjz(payload)
-        if not points:
-            break
-        all_points.extend(points)
-
-        total_count = (payload.get("TotalCount") or 0) or 0
-        if page_index * page_size >= int(total_count):
-            break
-        page_index += 1
-
-    unique = {p.nav_date: p for p in all_points}
-    return [unique[d] for d in sorted(unique.keys())]
 
+def fetch_fund_nav_history(
+    fund_code: str,
+    start_date: date,
+    end_date: date,
+    page_size: int = 100,
+    session: Optional[requests.Session] = None,
+    executor: Optional[Executor] = None,
+    url: str = EASTMONEY_LSJZ_URL,
+    columnar: bool = False,
+):
+    """拉取区间内全部历史净值（按日期升序去重）。
+
+    传入 ``executor`` 时，第一页拿到 ``TotalCount`` 后其余页并行拉取。``columnar=True`` 时
+    用列式解析并返回 ``NavColumns``，否则返回 ``FundNavPoint`` 列表。
+    """
+    sess = session or requests.Session()
+    first, total_count = fetch_lsjz_page(sess, fund_code, start_date, end_date, 1, page_size, url, columnar)
+    pages = [first]
+
+    if len(first):
+        remaining = range(2, math.ceil(total_count / page_size) + 1)
+        if executor is not None:
+            futures = [
+                executor.submit(fetch_lsjz_page, sess, fund_code, start_date, end_date, page, page_size, url, columnar)
+                for page in remaining
+            ]
+            pages.extend(future.result()[0] for future in futures)
+        else:
+            for page in remaining:
+                points, _ = fetch_lsjz_page(sess, fund_code, start_date, end_date, page, page_size, url, columnar)
+                if not len(points):
+                    break
+                pages.append(points)
+
+    if columnar:
+        return NavColumns.concat(pages).sorted_unique()
+    unique = {p.nav_date: p for page in pages for p in page}
+    return [unique[d] for d in sorted(unique.keys())]
@@ -0,0 +1,122 @@
+"""基金业绩指标批量计算。
+
+一次把所有（或指定）基金的净值读成按 ``(fund_id, nav_date)`` 排序的扁平数组，
+在 NumPy 中一次性算出各基金的：
+
+- 近 1 月 / 3 月 / 1 年 / 3 年收益（以窗口起点当日或之前最近一期净值为基准，历史不足为 None）
+- 近 1 年年化波动率、最大回撤、夏普比率（日收益，口径与回测引擎一致）
+
+收益类指标优先使用累计净值（含分红），缺失时退回单位净值。结果均为小数（0.05 即 5%）。
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+TRADING_DAYS_PER_YEAR = 252
+
+RETURN_WINDOWS = {"return_1m": 30, "return_3m": 91, "return_1y": 365, "return_3y": 1095}
+RISK_WINDOW_DAYS = 365
+METRIC_COLUMNS = tuple(RETURN_WINDOWS) + ("volatility_1y", "max_drawdown_1y", "sharpe_1y")
+# 需要读取的历史长度（多留几天以覆盖节假日）
+LOOKBACK_DAYS = max(RETURN_WINDOWS.values()) + 15
+
+# 每只基金在组合键中占用的天数空间：key = 基金序号 * _KEY_SPAN + 距 1970 的天数
+_KEY_SPAN = 1 << 20
+
+_FILTER_RE = re.compile(r"^\s*(\w+)\s*(>=|<=|>|<)\s*(-?[\d.]+(?:e-?\d+)?)\s*$")
+
+
+def parse_metric_filter(expr: str) -> Tuple[str, str, float]:
+    """解析 ``return_1y>=0.1`` 形式的筛选条件。"""
+    match = _FILTER_RE.match(expr)
+    if not match or match.group(1) not in METRIC_COLUMNS:
+        raise ValueError(f"invalid filter {expr!r}: expected <metric><op><number>, metric one of {', '.join(METRIC_COLUMNS)}")
+    return match.group(1), match.group(2), float(match.group(3))
+
+
+def _none_if_nan(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def return_basis(starts: np.ndarray, seg: np.ndarray, navs: np.ndarray, accumulated_navs: np.ndarray) -> np.ndarray:
+    """计算收益用的净值：累计净值完整的基金用累计净值（含分红），否则用单位净值。
+
+    ``starts`` 为各基金在扁平数组中的起始下标，``seg`` 为每行所属基金的序号。
+    """
+    acc_missing = np.add.reduceat(np.isnan(accumulated_navs).astype(np.int64), starts) > 0
+    return np.where(acc_missing[seg], navs, accumulated_navs)
+
+
+def compute_fund_metrics(
+    fund_ids: np.ndarray,
+    dates: np.ndarray,
+    navs: np.ndarray,
+    accumulated_navs: np.ndarray,
+    risk_free_rate: float = 0.0,
+) -> Dict[int, dict]:
+    """输入按 ``(fund_id, nav_date)`` 升序的扁平数组，返回 ``{fund_id: {as_of_date, 指标...}}``。"""
+    if fund_ids.size == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, fund_ids[1:] != fund_ids[:-1]])
+    ends = np.r_[starts[1:], fund_ids.size] - 1
+    seg = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, fund_ids.size]))
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    keys = seg * _KEY_SPAN + days
+    last_days = days[ends]
+
+    values = return_basis(starts, seg, navs, accumulated_navs)
+    last_values = values[ends]
+
+    def base_index(window_days: int) -> Tuple[np.ndarray, np.ndarray]:
+        """各基金窗口起点当日或之前最近一期的下标，以及该点是否存在。"""
+        target = np.arange(starts.size) * _KEY_SPAN + last_days - window_days
+        pos = np.searchsorted(keys, target, side="right") - 1
+        return np.maximum(pos, starts), pos >= starts
+
+    columns: Dict[str, np.ndarray] = {}
+    for name, window in RETURN_WINDOWS.items():
+        pos, ok = base_index(window)
+        columns[name] = np.where(ok, last_values / values[pos] - 1.0, np.nan)
+
+    lo, _ = base_index(RISK_WINDOW_DAYS)
+    width = int((ends - lo).max()) + 1
+    idx = ends[:, None] - (width - 1) + np.arange(width)[None, :]
+    inside = idx >= lo[:, None]
+    curve = np.where(inside, values[np.maximum(idx, 0)], np.nan)
+
+    daily = curve[:, 1:] / curve[:, :-1] - 1.0
+    excess = daily - risk_free_rate / TRADING_DAYS_PER_YEAR
+    counts = np.sum(~np.isnan(daily), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(excess, axis=1) / np.maximum(counts, 1)
+        sq = np.nansum((excess - mean[:, None]) ** 2, axis=1)
+        std = np.sqrt(sq / np.maximum(counts - 1, 1))
+        std = np.where(counts > 1, std, np.nan)
+        columns["volatility_1y"] = std * math.sqrt(TRADING_DAYS_PER_YEAR)
+        columns["sharpe_1y"] = np.where(std > 0, mean / std * math.sqrt(TRADING_DAYS_PER_YEAR), np.nan)
+        peak = np.fmax.accumulate(curve, axis=1)
+        drawdown = np.where(inside, 1.0 - curve / peak, -np.inf)
+        columns["max_drawdown_1y"] = drawdown.max(axis=1)
+
+    as_of = dates[ends].astype("datetime64[D]").tolist()
+    rows = {}
+    for i, fund_id in enumerate(fund_ids[starts].tolist()):
+        rows[fund_id] = {"as_of_date": as_of[i], **{name: _none_if_nan(columns[name][i]) for name in METRIC_COLUMNS}}
+    return rows
+
+
+def metrics_from_rows(rows: List[tuple], risk_free_rate: float = 0.0) -> Dict[int, dict]:
+    """``(fund_id, nav_date, nav, accumulated_nav)`` 行（已排序）→ 指标。"""
+    n = len(rows)
+    fund_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    dates = np.array([r[1] for r in rows], dtype="datetime64[D]")
+    navs = np.fromiter((float(r[2]) for r in rows), dtype=np.float64, count=n)
+    accs = np.fromiter((float(r[3]) if r[3] is not None else np.nan for r in rows), dtype=np.float64, count=n)
+    return compute_fund_metrics(fund_ids, dates, navs, accs, risk_free_rate)
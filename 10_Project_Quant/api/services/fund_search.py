@@ -0,0 +1,197 @@
+"""基金搜索索引（进程内）。
+
+替代 ``LIKE '%x%'`` 全表扫描，支持三种匹配并统一打分排序：
+
+- 基金代码前缀（有序数组 + 二分）
+- 名称子串（二元组倒排索引求交后校验；单字走单字倒排）
+- 拼音首字母前缀，如 ``hxcz`` → 华夏成长
+
+拼音首字母默认按 GB2312 一级汉字的拼音排序区间换算，并对基金名称中常见的多音字
+给出多个读音；安装了 ``pypinyin`` 时优先使用它。索引在启动时构建，之后按
+``FUND_SEARCH_REFRESH`` 秒（默认 60）检查 ``funds`` 表是否有新增/变更并重建。
+基金由启动时的种子数据或外部脚本写入，没有增量插入的入口：新增/改名的基金最多延迟一个刷新间隔
+才能被搜到，需要立即生效时调用 ``invalidate``。
+"""
+
+import bisect
+import os
+import threading
+import time
+from dataclasses import dataclass
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import models
+
+try:
+    from pypinyin import Style, pinyin as _pinyin
+except ImportError:  # pragma: no cover - 可选依赖
+    _pinyin = None
+
+MAX_RESULTS = 1000
+
+# GB2312 一级汉字（0xB0A1-0xD7F9）按拼音排序，各首字母的起始编码
+_GB2312_INITIALS = [
+    (0xB0A1, "a"), (0xB0C5, "b"), (0xB2C1, "c"), (0xB4EE, "d"), (0xB6EA, "e"), (0xB7A2, "f"),
+    (0xB8C1, "g"), (0xB9FE, "h"), (0xBBF7, "j"), (0xBFA6, "k"), (0xC0AC, "l"), (0xC2E8, "m"),
+    (0xC4C3, "n"), (0xC5B6, "o"), (0xC5BE, "p"), (0xC6DA, "q"), (0xC8BB, "r"), (0xC8F6, "s"),
+    (0xCBFA, "t"), (0xCDDA, "w"), (0xCEF4, "x"), (0xD1B9, "y"), (0xD4D1, "z"),
+]
+_GB2312_STARTS = [start for start, _ in _GB2312_INITIALS]
+_GB2312_LEVEL1_END = 0xD7F9
+
+# 基金名称里常见的多音字：首字母集合（GB2312 只给出其中一个读音）
+_POLYPHONES = {
+    "长": "cz", "行": "hx", "重": "zc", "乐": "ly", "调": "dt", "单": "ds", "参": "cs",
+    "传": "cz", "藏": "cz", "朝": "cz", "会": "hk", "降": "jx", "盛": "sc", "厦": "xs",
+    "率": "ls", "石": "sd", "解": "jx", "区": "qo", "曾": "cz", "都": "dd", "属": "sz",
+}
+_MAX_INITIAL_VARIANTS = 8
+
+
+def _char_initials(ch: str) -> str:
+    """单个字符的候选首字母；字母数字原样返回小写，无法识别返回空串。"""
+    if ch.isascii():
+        return ch.lower() if ch.isalnum() else ""
+    if ch in _POLYPHONES:
+        return _POLYPHONES[ch]
+    if _pinyin is not None:
+        return "".join(sorted({p[0] for p in _pinyin(ch, style=Style.FIRST_LETTER, heteronym=True)[0] if p}))
+    try:
+        encoded = ch.encode("gb2312")
+    except UnicodeEncodeError:
+        return ""
+    code = encoded[0] << 8 | encoded[1]
+    if code < _GB2312_STARTS[0] or code > _GB2312_LEVEL1_END:
+        return ""
+    return _GB2312_INITIALS[bisect.bisect_right(_GB2312_STARTS, code) - 1][1]
+
+
+def pinyin_initials(name: str) -> List[str]:
+    """名称的拼音首字母串（多音字展开为多个变体，最多 8 个）。"""
+    options = [opts for opts in (_char_initials(ch) for ch in name) if opts]
+    variants = []
+    for combo in product(*options):
+        variants.append("".join(combo))
+        if len(variants) >= _MAX_INITIAL_VARIANTS:
+            break
+    return variants
+
+
+@dataclass
+class FundEntry:
+    id: int
+    code: str
+    name: str
+    fund_type: Optional[str]
+
+
+class FundSearchIndex:
+    def __init__(self, refresh_interval: Optional[float] = None):
+        self.refresh_interval = (
+            refresh_interval if refresh_interval is not None else float(os.getenv("FUND_SEARCH_REFRESH", "60"))
+        )
+        self._lock = threading.Lock()
+        self._entries: Dict[int, FundEntry] = {}
+        self._codes: List[Tuple[str, int]] = []
+        self._initials: List[Tuple[str, int]] = []
+        self._unigrams: Dict[str, Set[int]] = {}
+        self._bigrams: Dict[str, Set[int]] = {}
+        self._version: Optional[tuple] = None
+        self._checked_at = 0.0
+
+    # ---- 构建 / 更新 ----
+
+    def build(self, funds: Sequence, version: Optional[tuple] = None):
+        """用基金列表（ORM 对象或具备 id/code/name/fund_type 的对象）重建索引。"""
+        entries = {f.id: FundEntry(f.id, f.code, f.name, f.fund_type) for f in funds}
+        codes, initials = [], []
+        unigrams: Dict[str, Set[int]] = {}
+        bigrams: Dict[str, Set[int]] = {}
+        for entry in entries.values():
+            codes.append((entry.code, entry.id))
+            initials.extend((variant, entry.id) for variant in pinyin_initials(entry.name))
+            name = entry.name.lower()
+            for ch in set(name):
+                unigrams.setdefault(ch, set()).add(entry.id)
+            for gram in {name[i:i + 2] for i in range(len(name) - 1)}:
+                bigrams.setdefault(gram, set()).add(entry.id)
+        codes.sort()
+        initials.sort()
+        with self._lock:
+            self._entries, self._codes, self._initials = entries, codes, initials
+            self._unigrams, self._bigrams = unigrams, bigrams
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def invalidate(self):
+        """下次查询时强制从数据库重建。"""
+        with self._lock:
+            self._version = None
+
+    @property
+    def version(self) -> Optional[tuple]:
+        """当前索引对应的基金表版本；未构建时为 None。"""
+        return self._version
+
+    @staticmethod
+    def _db_version(db: Session) -> tuple:
+        return tuple(db.query(func.count(models.Fund.id), func.max(models.Fund.id), func.max(models.Fund.updated_at)).one())
+
+    def ensure_fresh(self, db: Session):
+        """未构建时构建；超过刷新间隔则比对 funds 表版本，有变化时重建。"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.refresh_interval:
+            return
+        version = self._db_version(db)
+        if version != self._version:
+            self.build(db.query(models.Fund).all(), version)
+        else:
+            self._checked_at = now
+
+    # ---- 查询 ----
+
+    @staticmethod
+    def _prefix_ids(items: List[Tuple[str, int]], prefix: str) -> List[int]:
+        lo = bisect.bisect_left(items, (prefix,))
+        hi = bisect.bisect_left(items, (prefix + "￿",))
+        return [fund_id for _, fund_id in items[lo:hi]]
+
+    def _name_ids(self, query: str) -> Set[int]:
+        if len(query) == 1:
+            return set(self._unigrams.get(query, ()))
+        grams = sorted({query[i:i + 2] for i in range(len(query) - 1)}, key=lambda g: len(self._bigrams.get(g, ())))
+        ids = set(self._bigrams.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not ids:
+                break
+            ids &= self._bigrams.get(gram, set())
+        return {fund_id for fund_id in ids if query in self._entries[fund_id].name.lower()}
+
+    def search(self, query: str, fund_type: Optional[str] = None, limit: Optional[int] = MAX_RESULTS) -> List[int]:
+        """返回按相关度排序的基金 id（代码精确 > 代码前缀 > 名称前缀 > 名称包含 > 拼音首字母），``limit=None`` 不截断。"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        scores: Dict[int, int] = {}
+        with self._lock:
+            for fund_id in self._prefix_ids(self._codes, query):
+                scores[fund_id] = 100 if self._entries[fund_id].code == query else 90
+            for fund_id in self._name_ids(query):
+                score = 80 if self._entries[fund_id].name.lower().startswith(query) else 60
+                scores[fund_id] = max(scores.get(fund_id, 0), score)
+            if query.isascii() and query.isalnum():
+                for fund_id in self._prefix_ids(self._initials, query):
+                    scores[fund_id] = max(scores.get(fund_id, 0), 50)
+            entries = self._entries
+            ranked = sorted(
+                (fund_id for fund_id in scores if fund_type is None or entries[fund_id].fund_type == fund_type),
+                key=lambda fund_id: (-scores[fund_id], len(entries[fund_id].name), entries[fund_id].code),
+            )
+        return ranked[:limit]
+
+
+fund_search_index = FundSearchIndex()
@@ -0,0 +1,47 @@
+"""条件请求（ETag / If-None-Match）支持。
+
+ETag 由数据版本（快照表的最新净值日期与 ``generation``、基金表变更时间等）和规范化后的查询参数
+哈希而来，计算它只需一次小的聚合查询，不读净值表也不序列化响应体。客户端带回相同 ETag 时
+直接返回 304。
+
+- ``HTTP_CACHE_MAX_AGE``：``Cache-Control`` 的 ``max-age`` 秒数，默认 60；过期后代理/浏览器需带
+  ``If-None-Match`` 回源验证，数据未变时只收到 304
+"""
+
+import hashlib
+import os
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Response
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "60"))
+
+
+def make_etag(*parts) -> str:
+    """对任意可 ``repr`` 的版本信息取哈希，返回带引号的强 ETag。"""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def normalized_query(items: Iterable[Tuple[str, str]]) -> tuple:
+    """查询参数排序后作为表示的一部分，参数顺序不同不影响 ETag。"""
+    return tuple(sorted(items))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """按 RFC 9110 的弱比较判断 ``If-None-Match`` 是否命中（支持 ``*`` 与逗号分隔列表）。"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cache_headers(etag: str, max_age: Optional[int] = None) -> dict:
+    max_age = HTTP_CACHE_MAX_AGE if max_age is None else max_age
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max_age}, must-revalidate"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,27 @@
+"""延迟导入重型依赖（numpy 等），让 ``import api.main`` 与 worker 启动不为尚未用到的代码路径付费。
+
+``np = lazy_module("numpy")`` 返回一个占位模块，首次访问属性时才真正导入，之后把真实模块的属性
+复制到占位模块上，后续访问与普通模块属性查找一样快。使用它的模块需要
+``from __future__ import annotations``，避免类型注解在导入时求值。
+"""
+
+import importlib
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        # 只在属性缺失时调用：加载完成后属性已在 __dict__ 中，不再经过这里
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """已导入时直接返回真实模块；否则返回首次使用时才导入的占位模块（导入锁保证线程安全）。"""
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
@@ -0,0 +1,63 @@
+"""多进程部署下后台任务的租约。
+
+抢占任务时写入持有者（``主机名:PID``）与租约到期时间，执行期间由 ``Heartbeat`` 线程定期续期。
+各进程启动时的 ``recover`` 只把租约已过期的 running 任务判定为中断，其他进程正在执行的任务不受影响。
+
+- ``JOB_LEASE_SECONDS``：租约时长，默认 60；心跳间隔为其三分之一
+"""
+
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from threading import Event, Thread
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def lease_seconds() -> float:
+    return float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def lease_deadline(seconds: Optional[float] = None) -> datetime:
+    return utcnow() + timedelta(seconds=lease_seconds() if seconds is None else seconds)
+
+
+class Heartbeat:
+    """上下文管理器：后台线程每隔 ``interval`` 秒调用一次 ``renew``，``renew`` 返回 False 时停止。"""
+
+    def __init__(self, renew: Callable[[], bool], interval: Optional[float] = None):
+        self.renew = renew
+        self.interval = lease_seconds() / 3 if interval is None else interval
+        self.lost = False
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.renew():
+                    # 租约已被其他进程收回（例如本进程长时间卡住被判定为中断）
+                    self.lost = True
+                    return
+            except Exception:
+                logger.exception("Lease renewal failed")
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread = Thread(target=self._loop, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -0,0 +1,257 @@
+"""净值历史分层存储：近期净值留在 ``fund_navs``，更早的历史按基金压缩成列式 ``.npz`` 归档文件。
+
+- 每只基金一个归档文件 ``<NAV_ARCHIVE_DIR>/<fund_id>.npz``：日期为 int32 天数，净值与累计净值为
+  万分之一的 int64 定点数（与 ``Numeric(10, 4)`` 精确互转，累计净值缺失为 -1），zip + deflate 压缩
+- 目录表 ``fund_nav_archives`` 记录每只基金归档覆盖的 ``[first_date, archived_before)``：该区间内的净值
+  只在归档文件中。``archived_before`` 总是某年 1 月 1 日，且不晚于基金最新净值日期前 ``LOOKBACK_DAYS``，
+  快照与业绩指标只需读热表
+- 写入落在归档区间内的净值视为已存在，直接跳过；早于 ``first_date`` 的回补（如归档后执行全量同步）
+  写入热表，下次压缩时并入归档
+- ``nav_cache``、``crud.get_fund_navs``、``crud.iter_fund_nav_chunks`` 透明合并归档与其前后的热表行
+- 压缩时先写文件（临时文件 + 原子替换），再在一个事务里更新目录并删除热表中的行；读取时按目录中的
+  ``archived_before`` 截取文件，中途失败也不会重复或丢失。多进程部署时各进程需访问同一目录
+
+环境变量：
+
+- ``NAV_ARCHIVE_DIR``：归档文件目录，默认 ``./nav_archive``
+- ``NAV_HOT_YEARS``：热表至少保留的自然年数，默认 3（早于 ``今年 - N`` 年 1 月 1 日的净值可归档）
+
+在项目根目录定期运行（例如每月一次）::
+
+    python -m api.services.nav_archive
+    python -m api.services.nav_archive --hot-years 5 --funds 000001,110011
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .. import models
+from .fund_metrics import LOOKBACK_DAYS
+from .lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+ARCHIVE_FORMAT = "npz-v1"
+NAV_SCALE = 10_000
+_MISSING = -1  # 净值均为正数，-1 表示累计净值缺失
+_EPOCH = date(1970, 1, 1)
+
+
+def archive_dir() -> Path:
+    return Path(os.getenv("NAV_ARCHIVE_DIR", "./nav_archive"))
+
+
+def archive_path(fund_id: int) -> Path:
+    return archive_dir() / f"{fund_id}.npz"
+
+
+def hot_cutoff(today: Optional[date] = None, hot_years: Optional[int] = None) -> date:
+    """热表保留窗口的起点：``today`` 所在年份往前 ``hot_years`` 年的 1 月 1 日。"""
+    today = today or date.today()
+    hot_years = int(os.getenv("NAV_HOT_YEARS", "3")) if hot_years is None else hot_years
+    if hot_years < 1:
+        raise ValueError("NAV_HOT_YEARS must be at least 1")
+    return date(today.year - hot_years, 1, 1)
+
+
+def _to_ticks(value) -> int:
+    return _MISSING if value is None else int((Decimal(str(value)) * NAV_SCALE).to_integral_value())
+
+
+def _to_decimal(ticks: int) -> Optional[Decimal]:
+    return None if ticks == _MISSING else Decimal(ticks).scaleb(-4)
+
+
+@dataclass
+class ArchivedNavs:
+    """一只基金归档部分的列数组：日期 ``datetime64[D]``，净值为万分之一定点整数。"""
+
+    dates: np.ndarray
+    navs: np.ndarray
+    accumulated_navs: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return int(self.dates.size)
+
+    @classmethod
+    def empty(cls) -> "ArchivedNavs":
+        return cls(np.array([], dtype="datetime64[D]"), np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "ArchivedNavs":
+        """``(nav_date, nav, accumulated_nav)`` 行（数值为 ``Decimal``/None）→ 定点列数组。"""
+        n = len(rows)
+        return cls(
+            dates=np.array([r[0] for r in rows], dtype="datetime64[D]"),
+            navs=np.fromiter((_to_ticks(r[1]) for r in rows), dtype=np.int64, count=n),
+            accumulated_navs=np.fromiter((_to_ticks(r[2]) for r in rows), dtype=np.int64, count=n),
+        )
+
+    def concat(self, other: "ArchivedNavs") -> "ArchivedNavs":
+        return ArchivedNavs(
+            np.concatenate((self.dates, other.dates)),
+            np.concatenate((self.navs, other.navs)),
+            np.concatenate((self.accumulated_navs, other.accumulated_navs)),
+        )
+
+    def float_columns(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``(单位净值, 累计净值)`` 浮点数组，累计净值缺失为 NaN，与 ``nav_cache`` 的口径一致。"""
+        accs = np.where(self.accumulated_navs == _MISSING, np.nan, self.accumulated_navs / NAV_SCALE)
+        return self.navs / NAV_SCALE, accs
+
+    def rows(self, fund_id: int, lo: int = 0, hi: Optional[int] = None) -> Iterator[tuple]:
+        """``(fund_id, nav_date, nav, accumulated_nav)`` 行，数值为 ``Decimal``，与热表查询结果一致。"""
+        dates = self.dates[lo:hi].tolist()
+        navs = self.navs[lo:hi].tolist()
+        accs = self.accumulated_navs[lo:hi].tolist()
+        for nav_date, nav, acc in zip(dates, navs, accs):
+            yield fund_id, nav_date, _to_decimal(nav), _to_decimal(acc)
+
+
+def write_archive(path: Path, navs: ArchivedNavs):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez_compressed(
+            f,
+            nav_date=navs.dates.astype("datetime64[D]").astype(np.int32),
+            nav=navs.navs,
+            accumulated_nav=navs.accumulated_navs,
+        )
+    os.replace(tmp, path)
+
+
+def read_archive(entry: models.FundNavArchive) -> ArchivedNavs:
+    """按目录项读取归档文件，只保留 ``[first_date, archived_before)`` 部分（文件可能已被尚未提交的压缩替换）。"""
+    if entry.format != ARCHIVE_FORMAT:
+        raise ValueError(f"Unsupported NAV archive format: {entry.format}")
+    with np.load(archive_path(entry.fund_id)) as data:
+        days = data["nav_date"]
+        lo = int(np.searchsorted(days, (entry.first_date - _EPOCH).days))
+        hi = int(np.searchsorted(days, (entry.archived_before - _EPOCH).days))
+        return ArchivedNavs(days[lo:hi].astype("datetime64[D]"), data["nav"][lo:hi], data["accumulated_nav"][lo:hi])
+
+
+def load_archived(db: Session, fund_id: int) -> Optional[ArchivedNavs]:
+    """基金的归档部分；没有归档时返回 None。"""
+    entry = db.get(models.FundNavArchive, fund_id)
+    return read_archive(entry) if entry is not None else None
+
+
+def iter_archived_rows(
+    db: Session,
+    fund_ids: Optional[List[int]] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Optional[Iterator[tuple]]:
+    """区间内的归档净值行，按 ``(fund_id, nav_date)`` 排序、逐个基金读文件；没有相关归档时返回 None。"""
+    archive = models.FundNavArchive
+    query = db.query(archive).order_by(archive.fund_id)
+    if fund_ids is not None:
+        query = query.filter(archive.fund_id.in_(fund_ids))
+    if start_date:
+        query = query.filter(archive.archived_before > start_date)
+    if end_date:
+        query = query.filter(archive.first_date <= end_date)
+    entries = query.all()
+    if not entries:
+        return None
+    return _archived_rows(entries, start_date, end_date)
+
+
+def _archived_rows(entries: List[models.FundNavArchive], start_date: Optional[date], end_date: Optional[date]):
+    for entry in entries:
+        navs = read_archive(entry)
+        lo = int(np.searchsorted(navs.dates, np.datetime64(start_date, "D"))) if start_date else 0
+        hi = int(np.searchsorted(navs.dates, np.datetime64(end_date, "D"), side="right")) if end_date else None
+        yield from navs.rows(entry.fund_id, lo, hi)
+
+
+def compact_fund_navs(db: Session, cutoff: date, fund_ids: Optional[List[int]] = None) -> Dict[str, int]:
+    """把各基金早于 ``cutoff`` 的整年净值移入归档文件（每只基金单独提交），返回基金数与移动的行数。"""
+    nav = models.FundNav
+    bounds = db.query(nav.fund_id, func.min(nav.nav_date), func.max(nav.nav_date)).group_by(nav.fund_id)
+    if fund_ids is not None:
+        bounds = bounds.filter(nav.fund_id.in_(fund_ids))
+    stats = {"funds": 0, "rows": 0}
+    for fund_id, first, last in bounds.all():
+        # 保留业绩指标回看窗口，按自然年对齐
+        before = date(min(cutoff, last - timedelta(days=LOOKBACK_DAYS)).year, 1, 1)
+        if first >= before:
+            continue
+        stats["rows"] += _compact_fund(db, fund_id, before)
+        stats["funds"] += 1
+    return stats
+
+
+def _compact_fund(db: Session, fund_id: int, before: date) -> int:
+    nav = models.FundNav
+    entry = db.get(models.FundNavArchive, fund_id)
+    if entry is not None:
+        # 只有早于归档的回补需要压缩时，cutoff 可能比已有边界更早；边界不回退
+        before = max(before, entry.archived_before)
+    hot = (
+        db.query(nav.nav_date, nav.nav, nav.accumulated_nav)
+        .filter(nav.fund_id == fund_id, nav.nav_date < before)
+        .order_by(nav.nav_date)
+        .all()
+    )
+    if entry is None:
+        merged = ArchivedNavs.from_rows(hot)
+    else:
+        # 热表中的行不落在旧归档区间内：早于 first_date 的回补拼在前面，其余追加在后面
+        split = next((i for i, row in enumerate(hot) if row[0] >= entry.first_date), len(hot))
+        merged = (
+            ArchivedNavs.from_rows(hot[:split])
+            .concat(read_archive(entry))
+            .concat(ArchivedNavs.from_rows(hot[split:]))
+        )
+    write_archive(archive_path(fund_id), merged)
+
+    if entry is None:
+        entry = models.FundNavArchive(fund_id=fund_id)
+        db.add(entry)
+    entry.archived_before = before
+    entry.format = ARCHIVE_FORMAT
+    entry.row_count = merged.size
+    entry.first_date = merged.dates[0].item()
+    entry.last_date = merged.dates[-1].item()
+    db.query(nav).filter(nav.fund_id == fund_id, nav.nav_date < before).delete(synchronize_session=False)
+    db.commit()
+    return len(hot)
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="把早于热数据窗口的净值压缩归档")
+    parser.add_argument("--hot-years", type=int, default=None, help="热表保留的自然年数，缺省读 NAV_HOT_YEARS")
+    parser.add_argument("--funds", default=None, help="逗号分隔的基金代码，缺省处理全部基金")
+    args = parser.parse_args(argv)
+
+    from .. import crud
+    from ..database import SessionLocal
+
+    cutoff = hot_cutoff(hot_years=args.hot_years)
+    db = SessionLocal()
+    try:
+        fund_ids = None
+        if args.funds:
+            fund_ids = list(crud.get_fund_ids_by_codes(db, [c.strip() for c in args.funds.split(",")]).values())
+        stats = compact_fund_navs(db, cutoff, fund_ids)
+    finally:
+        db.close()
+    print(f"cutoff={cutoff}, funds={stats['funds']}, rows={stats['rows']}, dir={archive_dir()}")
+
+
+if __name__ == "__main__":
+    main()
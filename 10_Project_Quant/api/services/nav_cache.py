@@ -0,0 +1,208 @@
+"""进程内列式净值缓存。
+
+每只基金的完整历史以三个连续 NumPy 数组保存（日期 ``datetime64[D]``、单位净值、
+累计净值，缺失为 NaN），按内存预算做 LRU 淘汰。``crud.upsert_fund_navs`` 写入后：
+新数据全部晚于缓存末尾时直接追加，否则失效该基金。
+
+缓存只在本进程内可见，其他进程（多 worker、回测进程）的写入靠 TTL 兜底。条目记录加载时的
+``fund_nav_snapshots.generation``，调用方传入当前版本（如基金详情用于计算 ETag 的版本）时，
+版本不一致即重新加载，保证响应体与 ETag 对应同一份数据。
+
+- ``NAV_CACHE_MAX_MB``：内存预算，默认 128
+- ``NAV_CACHE_TTL``：条目最长存活秒数，默认 300，0 表示不过期
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .. import models
+from .lazy_import import lazy_module
+from .nav_archive import load_archived
+
+np = lazy_module("numpy")
+
+
+@dataclass
+class FundNavArrays:
+    dates: np.ndarray
+    navs: np.ndarray
+    accumulated_navs: np.ndarray
+    loaded_at: float = 0.0
+    # 加载时的 fund_nav_snapshots.generation；写入后原地追加的条目为 None（版本未知）
+    generation: Optional[int] = None
+
+    def __post_init__(self):
+        # 缓存中的数组会被多个请求共享，禁止原地修改
+        for arr in (self.dates, self.navs, self.accumulated_navs):
+            arr.setflags(write=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.navs.nbytes + self.accumulated_navs.nbytes
+
+    def window(self, start_date: Optional[date] = None, end_date: Optional[date] = None) -> "FundNavArrays":
+        """按日期闭区间切片（视图，不复制）。"""
+        lo = np.searchsorted(self.dates, np.datetime64(start_date, "D")) if start_date else 0
+        hi = np.searchsorted(self.dates, np.datetime64(end_date, "D"), side="right") if end_date else self.dates.size
+        return FundNavArrays(self.dates[lo:hi], self.navs[lo:hi], self.accumulated_navs[lo:hi], self.loaded_at)
+
+    def take(self, indices: np.ndarray) -> "FundNavArrays":
+        """按下标取子集（复制）。"""
+        return FundNavArrays(self.dates[indices], self.navs[indices], self.accumulated_navs[indices], self.loaded_at)
+
+    def to_records(self, limit: Optional[int] = None) -> List[dict]:
+        """最近 ``limit`` 条（按日期升序）转成接口需要的字典列表。"""
+        lo = max(self.dates.size - limit, 0) if limit is not None else 0
+        acc = self.accumulated_navs[lo:].tolist()
+        return [
+            {"nav_date": d, "nav": n, "accumulated_nav": None if a != a else a}
+            for d, n, a in zip(self.dates[lo:].tolist(), self.navs[lo:].tolist(), acc)
+        ]
+
+
+def _to_float(value) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def load_fund_nav_arrays(db: Session, fund_id: int) -> FundNavArrays:
+    """只取三列原始值构造数组，不物化 ORM 对象；已归档的历史从归档文件读出按日期拼入。"""
+    # 先读版本再读数据：期间有新写入时版本偏旧，下次按版本校验会重新加载，不会把旧数据当成新版本
+    generation = (
+        db.query(models.FundNavSnapshot.generation).filter(models.FundNavSnapshot.fund_id == fund_id).scalar()
+    )
+    rows = (
+        db.query(models.FundNav.nav_date, models.FundNav.nav, models.FundNav.accumulated_nav)
+        .filter(models.FundNav.fund_id == fund_id)
+        .order_by(models.FundNav.nav_date)
+        .all()
+    )
+    n = len(rows)
+    dates = np.array([r[0] for r in rows], dtype="datetime64[D]")
+    navs = np.fromiter((float(r[1]) for r in rows), dtype=np.float64, count=n)
+    accumulated_navs = np.fromiter((_to_float(r[2]) for r in rows), dtype=np.float64, count=n)
+    archived = load_archived(db, fund_id)
+    if archived is not None and archived.size:
+        archived_navs, archived_accs = archived.float_columns()
+        # 热表中早于归档首日的回补排在归档之前，其余在之后
+        k = int(np.searchsorted(dates, archived.dates[0]))
+        dates = np.concatenate((dates[:k], archived.dates, dates[k:]))
+        navs = np.concatenate((navs[:k], archived_navs, navs[k:]))
+        accumulated_navs = np.concatenate((accumulated_navs[:k], archived_accs, accumulated_navs[k:]))
+    return FundNavArrays(
+        dates=dates, navs=navs, accumulated_navs=accumulated_navs, loaded_at=time.monotonic(), generation=generation
+    )
+
+
+class NavCache:
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(float(os.getenv("NAV_CACHE_MAX_MB", "128")) * 2**20)
+        self.ttl = ttl if ttl is not None else float(os.getenv("NAV_CACHE_TTL", "300"))
+        self._entries: "OrderedDict[int, FundNavArrays]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, entry: FundNavArrays) -> bool:
+        return self.ttl > 0 and time.monotonic() - entry.loaded_at > self.ttl
+
+    def get(self, db: Session, fund_id: int, generation: Optional[int] = None) -> FundNavArrays:
+        """``generation`` 给出时只接受同一数据版本的条目，否则重新加载。"""
+        with self._lock:
+            entry = self._entries.get(fund_id)
+            fresh = entry is not None and not self._expired(entry)
+            if fresh and (generation is None or entry.generation == generation):
+                self._entries.move_to_end(fund_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = load_fund_nav_arrays(db, fund_id)
+        self._put(fund_id, entry)
+        return entry
+
+    def get_many(self, db: Session, fund_ids: List[int]) -> Dict[int, FundNavArrays]:
+        return {fund_id: self.get(db, fund_id) for fund_id in fund_ids}
+
+    def _put(self, fund_id: int, entry: FundNavArrays):
+        with self._lock:
+            self._discard(fund_id)
+            if entry.nbytes > self.max_bytes:
+                return
+            self._entries[fund_id] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old.nbytes
+                self.evictions += 1
+
+    def _discard(self, fund_id: int):
+        old = self._entries.pop(fund_id, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+
+    def invalidate(self, fund_ids: Optional[List[int]] = None):
+        with self._lock:
+            if fund_ids is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            for fund_id in fund_ids:
+                self._discard(fund_id)
+
+    def on_upsert(self, fund_id: int, points) -> None:
+        """写入后维护缓存：新点全部晚于缓存末尾则追加，否则失效。"""
+        with self._lock:
+            cached = fund_id in self._entries
+        if not cached or not points:
+            return
+        self.on_upsert_columns(
+            fund_id,
+            np.array([p.nav_date for p in points], dtype="datetime64[D]"),
+            np.array([float(p.nav) for p in points]),
+            np.array([_to_float(p.accumulated_nav) for p in points]),
+        )
+
+    def on_upsert_columns(self, fund_id: int, dates: np.ndarray, navs: np.ndarray, accumulated_navs: np.ndarray) -> None:
+        """同 ``on_upsert``，输入为列数组（累计净值缺失为 NaN）。"""
+        with self._lock:
+            entry = self._entries.get(fund_id)
+        if entry is None or not dates.size:
+            return
+        order = np.argsort(dates, kind="stable")
+        last = entry.dates[-1] if entry.dates.size else None
+        if last is not None and dates[order[0]] <= last:
+            self.invalidate([fund_id])
+            return
+        appended = FundNavArrays(
+            dates=np.concatenate((entry.dates, dates[order])),
+            navs=np.concatenate((entry.navs, navs[order])),
+            accumulated_navs=np.concatenate((entry.accumulated_navs, accumulated_navs[order])),
+            loaded_at=entry.loaded_at,
+        )
+        self._put(fund_id, appended)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else None,
+            }
+
+
+nav_cache = NavCache()
@@ -0,0 +1,100 @@
+"""净值批量导出：把服务端游标分块编码成 CSV / NDJSON / Arrow IPC 流。
+
+每次只在内存中保留一个分块（默认 5000 行），导出规模与内存占用无关。
+Arrow 格式需要安装 ``pyarrow``（可选依赖）。
+"""
+
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, Sequence
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - 可选依赖
+    pa = None
+
+EXPORT_COLUMNS = ("code", "nav_date", "nav", "accumulated_nav")
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def available_formats() -> Sequence[str]:
+    return tuple(fmt for fmt in EXPORT_MEDIA_TYPES if fmt != "arrow" or pa is not None)
+
+
+def _num(value):
+    return None if value is None else float(value)
+
+
+def encode_csv(chunks: Iterable[Sequence], codes: Dict[int, str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in chunks:
+        writer.writerows(
+            (codes[fund_id], nav_date.isoformat(), nav, "" if acc is None else acc)
+            for fund_id, nav_date, nav, acc in rows
+        )
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def encode_ndjson(chunks: Iterable[Sequence], codes: Dict[int, str]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(
+            json.dumps(
+                {"code": codes[fund_id], "nav_date": nav_date.isoformat(), "nav": _num(nav), "accumulated_nav": _num(acc)},
+                ensure_ascii=False,
+            )
+            + "\n"
+            for fund_id, nav_date, nav, acc in rows
+        ).encode("utf-8")
+
+
+def encode_arrow(chunks: Iterable[Sequence], codes: Dict[int, str]) -> Iterator[bytes]:
+    """Arrow IPC streaming 格式：一个 schema 头 + 每个分块一个 RecordBatch。"""
+    if pa is None:
+        raise RuntimeError("arrow export requires pyarrow")
+    schema = pa.schema(
+        [
+            ("code", pa.string()),
+            ("nav_date", pa.date32()),
+            ("nav", pa.float64()),
+            ("accumulated_nav", pa.float64()),
+        ]
+    )
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    for rows in chunks:
+        fund_ids, dates, navs, accs = zip(*rows)
+        batch = pa.record_batch(
+            [
+                pa.array([codes[fund_id] for fund_id in fund_ids], pa.string()),
+                pa.array(dates, pa.date32()),
+                pa.array([_num(v) for v in navs], pa.float64()),
+                pa.array([_num(v) for v in accs], pa.float64()),
+            ],
+            schema=schema,
+        )
+        writer.write_batch(batch)
+        yield drain()
+    writer.close()
+    yield drain()
+
+
+ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "arrow": encode_arrow}
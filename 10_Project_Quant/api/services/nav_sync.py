@@ -0,0 +1,329 @@
+"""基金净值并发同步引擎。
+
+- 有界线程池并发拉取多只基金（I/O 密集，线程即可）
+- 所有请求共享一个 keep-alive 连接池（``requests.Session`` + ``HTTPAdapter``）
+- 首页返回 ``TotalCount`` 后，剩余分页并行拉取
+- 按 host 限制同时在途的请求数，并根据延迟与限流信号自适应收缩/恢复，避免压垮数据源或被封 IP
+- 失败请求退避重试，持续失败时熔断；单只基金失败不影响其余基金
+- 连接池与线程池归引擎所有，同一引擎上并发的多次 ``fetch_ranges`` 共享；用完后调用 ``close()`` 释放
+
+环境变量：
+
+- ``SYNC_WORKERS``：同时同步的基金数，默认 16
+- ``SYNC_HOST_LIMITS``：按 host 的并发上限，如 ``api.fund.eastmoney.com=8,localhost=4``
+- ``SYNC_DEFAULT_HOST_LIMIT``：未单独配置的 host 的并发上限，默认 8
+- ``SYNC_MAX_RETRIES`` / ``SYNC_RETRY_BASE_DELAY`` / ``SYNC_RETRY_MAX_DELAY``：超时、连接错误、429/5xx 的
+  抖动指数退避重试次数与延迟（默认 3 次，0.5s 起，最长 10s）
+- ``SYNC_LATENCY_TARGET``：单请求延迟目标秒数，默认 2；超过或遇到限流时把该 host 的并发上限减半，
+  平稳时逐步加回配置值（AIMD）
+- ``SYNC_BREAKER_THRESHOLD`` / ``SYNC_BREAKER_RESET``：连续失败多少次后熔断、熔断持续秒数（默认 10 次、30s）
+- ``EASTMONEY_LSJZ_URL``：历史净值接口地址（测试时可指向本地桩服务）
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+
+from .eastmoney import EASTMONEY_LSJZ_URL, FundNavPoint, NavColumns, fetch_fund_nav_history, make_session
+from .resilience import AimdLimiter, CircuitBreaker, RetryPolicy
+
+
+def parse_host_limits(spec: Optional[str]) -> Dict[str, int]:
+    """解析 ``host=limit,host=limit`` 形式的配置。"""
+    limits: Dict[str, int] = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        host, _, value = item.partition("=")
+        limits[host.strip().lower()] = int(value)
+    return limits
+
+
+SyncRange = Tuple[str, date, date]
+
+
+def plan_sync_ranges(
+    code: str,
+    start_date: date,
+    end_date: date,
+    bounds: Optional[Tuple[date, date]] = None,
+    synced_from: Optional[date] = None,
+    full: bool = False,
+) -> List[SyncRange]:
+    """增量同步计划：只拉最新入库日期之后的数据；历史不足请求窗口时才向前回补。
+
+    ``bounds`` 为已入库净值的 ``(最早, 最新)`` 日期，``synced_from`` 为曾经请求过的最早日期。
+    """
+    if full or bounds is None:
+        return [(code, start_date, end_date)]
+    first, last = bounds
+    ranges: List[SyncRange] = []
+    covered_from = min(first, synced_from) if synced_from else first
+    if covered_from > start_date:
+        ranges.append((code, start_date, covered_from - timedelta(days=1)))
+    if last < end_date:
+        ranges.append((code, last + timedelta(days=1), end_date))
+    return ranges
+
+
+# 需要重试的响应；其中 429/503 还说明数据源在限流，立即收缩并发
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class _HostState:
+    def __init__(self, limit: int, latency_target: float, breaker_threshold: int, breaker_reset: float):
+        self.limiter = AimdLimiter(limit, latency_target=latency_target)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failed = 0
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limiter.limit, 2),
+            "max_limit": self.limiter.max_limit,
+            "limit_decreases": self.limiter.decreases,
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failed": self.failed,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.opened,
+        }
+
+
+class ResilientSession(requests.Session):
+    """按 host 自适应限制在途请求数，并对超时/连接错误/429/5xx 做退避重试与熔断的 Session。
+
+    配置的 host 并发数是上限，AIMD 在其下方根据延迟与限流信号调整。重试用尽后：
+    有响应则原样返回（调用方 ``raise_for_status``），否则抛出最后一次的异常。
+    """
+
+    def __init__(
+        self,
+        host_limits: Dict[str, int],
+        default_limit: int,
+        retry: Optional[RetryPolicy] = None,
+        latency_target: float = 2.0,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        super().__init__()
+        self.host_limits = host_limits
+        self.default_limit = default_limit
+        self.retry = retry or RetryPolicy()
+        self.latency_target = latency_target
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._sleep = sleep
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = _HostState(
+                    self.host_limits.get(host, self.default_limit),
+                    self.latency_target,
+                    self.breaker_threshold,
+                    self.breaker_reset,
+                )
+                self._hosts[host] = state
+            return state
+
+    def request(self, method, url, *args, **kwargs):
+        state = self._host((urlsplit(url).hostname or "").lower())
+        for attempt in range(self.retry.max_retries + 1):
+            state.breaker.before_request()
+            resp, error = None, None
+            with state.limiter:
+                t0 = time.monotonic()
+                try:
+                    resp = super().request(method, url, *args, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    error = exc
+                except BaseException:
+                    # 不重试的异常（如 InvalidURL、解码错误、中断）也要结束本次请求在熔断器中的状态，
+                    # 否则 HALF_OPEN 的探测请求占位不会释放，熔断器永远停在 HALF_OPEN
+                    state.breaker.record_failure()
+                    with self._lock:
+                        state.requests += 1
+                        state.failed += 1
+                    raise
+                latency = time.monotonic() - t0
+            with self._lock:
+                state.requests += 1
+            if resp is not None and resp.status_code not in RETRYABLE_STATUS:
+                state.limiter.on_success(latency)
+                state.breaker.record_success()
+                return resp
+
+            state.limiter.on_congestion()
+            state.breaker.record_failure()
+            retry_after = None
+            if resp is not None and resp.status_code in (429, 503):
+                with self._lock:
+                    state.throttled += 1
+                retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+            if attempt == self.retry.max_retries:
+                break
+            if resp is not None:
+                resp.close()
+            with self._lock:
+                state.retries += 1
+            self._sleep(self.retry.delay(attempt, retry_after))
+
+        with self._lock:
+            state.failed += 1
+        if resp is not None:
+            return resp
+        raise error
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            return {host: state.stats() for host, state in self._hosts.items()}
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None  # HTTP 日期格式的 Retry-After 不常见，按普通退避处理
+
+
+class NavSyncEngine:
+    """并发同步一批基金的历史净值；网络在线程池中进行，落库由调用方在当前线程完成。"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        host_limits: Optional[Dict[str, int]] = None,
+        default_host_limit: Optional[int] = None,
+        url: Optional[str] = None,
+        page_size: int = 100,
+        columnar: bool = False,
+        retry: Optional[RetryPolicy] = None,
+        latency_target: Optional[float] = None,
+        breaker_threshold: Optional[int] = None,
+        breaker_reset: Optional[float] = None,
+    ):
+        self.workers = workers or int(os.getenv("SYNC_WORKERS", "16"))
+        self.host_limits = host_limits if host_limits is not None else parse_host_limits(os.getenv("SYNC_HOST_LIMITS"))
+        self.default_host_limit = default_host_limit or int(os.getenv("SYNC_DEFAULT_HOST_LIMIT", "8"))
+        self.url = url or os.getenv("EASTMONEY_LSJZ_URL", EASTMONEY_LSJZ_URL)
+        self.page_size = page_size
+        # True 时产出 NavColumns（列式解析），配合 crud.bulk_upsert_nav_columns 落库
+        self.columnar = columnar
+        self.retry = retry or RetryPolicy(
+            max_retries=int(os.getenv("SYNC_MAX_RETRIES", "3")),
+            base_delay=float(os.getenv("SYNC_RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("SYNC_RETRY_MAX_DELAY", "10")),
+        )
+        self.latency_target = latency_target or float(os.getenv("SYNC_LATENCY_TARGET", "2.0"))
+        self.breaker_threshold = breaker_threshold or int(os.getenv("SYNC_BREAKER_THRESHOLD", "10"))
+        self.breaker_reset = breaker_reset if breaker_reset is not None else float(os.getenv("SYNC_BREAKER_RESET", "30"))
+        self._closed_stats: Dict[str, dict] = {}
+        self._session: Optional[ResilientSession] = None
+        self._fund_pool: Optional[ThreadPoolExecutor] = None
+        self._page_pool: Optional[ThreadPoolExecutor] = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, dict]:
+        """各 host 的请求/重试/限流/熔断统计（本引擎累计）；``close()`` 之后为关闭时的值。"""
+        with self._session_lock:
+            sess = self._session
+        return sess.stats() if sess is not None else self._closed_stats
+
+    def _make_session(self) -> requests.Session:
+        sess = ResilientSession(
+            self.host_limits,
+            self.default_host_limit,
+            retry=self.retry,
+            latency_target=self.latency_target,
+            breaker_threshold=self.breaker_threshold,
+            breaker_reset=self.breaker_reset,
+        )
+        pool_size = max([self.default_host_limit, *self.host_limits.values()])
+        template = make_session(pool_maxsize=pool_size)
+        for prefix, adapter in template.adapters.items():
+            sess.mount(prefix, adapter)
+        return sess
+
+    def _get_resources(self) -> Tuple[requests.Session, ThreadPoolExecutor, ThreadPoolExecutor]:
+        # 同一引擎上并发的多次 fetch_ranges（如同步任务的多个分片）共享 host 并发上限、熔断状态与线程池，
+        # 总并发不超过 workers。基金级任务会等待自己的分页任务，两者分池以免线程池互相占满导致死锁
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._make_session()
+                self._fund_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nav-sync")
+                self._page_pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nav-page")
+            return self._session, self._fund_pool, self._page_pool
+
+    def close(self):
+        """等待在途请求结束后关闭线程池与连接池；之后再次使用会重新创建。"""
+        with self._session_lock:
+            sess, pools = self._session, (self._fund_pool, self._page_pool)
+            self._session = self._fund_pool = self._page_pool = None
+        if sess is None:
+            return
+        for pool in pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._closed_stats = sess.stats()
+        sess.close()
+
+    def fetch_many(
+        self, fund_codes: Iterable[str], start_date: date, end_date: date
+    ) -> Iterator[Tuple[str, Union[List[FundNavPoint], NavColumns]]]:
+        """按完成顺序产出 ``(code, points)``；任一基金失败时取消剩余任务并抛出异常。"""
+        for code, _, _, points in self.fetch_ranges((code, start_date, end_date) for code in fund_codes):
+            yield code, points
+
+    def fetch_ranges(
+        self, jobs: Iterable[SyncRange], on_error: Optional[Callable[[SyncRange, Exception], None]] = None
+    ) -> Iterator[Tuple[str, date, date, Union[List[FundNavPoint], NavColumns]]]:
+        """并发拉取 ``(code, start, end)`` 任务，按完成顺序产出 ``(code, start, end, points)``。
+
+        ``columnar=True`` 时 ``points`` 为 ``NavColumns``。传入 ``on_error`` 时，单个任务（重试用尽、
+        熔断拒绝等）失败只回调 ``on_error(job, exc)`` 并继续其余任务；否则取消剩余任务并抛出异常。
+        """
+        jobs = list(jobs)
+        sess, fund_pool, page_pool = self._get_resources()
+        futures = {}
+        try:
+            futures = {
+                fund_pool.submit(
+                    fetch_fund_nav_history,
+                    code,
+                    start_date,
+                    end_date,
+                    page_size=self.page_size,
+                    session=sess,
+                    executor=page_pool,
+                    url=self.url,
+                    columnar=self.columnar,
+                ): (code, start_date, end_date)
+                for code, start_date, end_date in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    points = future.result()
+                except Exception as exc:
+                    if on_error is None:
+                        raise
+                    on_error(futures[future], exc)
+                    continue
+                yield (*futures[future], points)
+        finally:
+            # 提前退出（异常或调用方不再迭代）时只取消本次尚未开始的任务，线程池与连接仍由其他调用共享
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,99 @@
+"""认证主体缓存。
+
+``get_current_user`` 解出 JWT 的 ``sub`` 后先查这里，命中则不访问数据库。缓存的是与会话无关的
+只读快照（``Principal``），而不是 ORM 对象。用户被停用或角色变更时由 ``crud.update_user``
+显式失效；其他进程的修改靠 TTL 兜底。
+
+- ``AUTH_CACHE_TTL``：条目存活秒数，默认 30，0 表示关闭缓存
+- ``AUTH_CACHE_MAX_ENTRIES``：最多缓存的用户数，默认 10000
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from .. import models
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    email: str
+    role: models.UserRole
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("AUTH_CACHE_TTL", "30"))
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, username: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and time.monotonic() < entry[0]:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[username]
+            self.misses += 1
+            return None
+
+    def put(self, principal: Principal):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[principal.username] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username: Optional[str] = None):
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(username, None)
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / total if total else None,
+            }
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,237 @@
+"""请求级监控：按路由的延迟直方图、每请求 SQL 查询数与数据库耗时，Prometheus 文本格式导出。
+
+- ``MetricsMiddleware``（纯 ASGI）为每个请求在 contextvar 中放一个 ``RequestStats``，计时到响应体发送完毕；
+  路由标签取路由模板（``/api/funds/{code}``），未匹配的请求统一记为 ``<unmatched>``，避免标签基数膨胀
+- ``install_query_hooks`` 在 SQLAlchemy ``Engine`` 上监听 ``before/after_cursor_execute``，把查询数与耗时
+  记到当前请求；同步接口在线程池中执行时 contextvar 随上下文复制，统计对象是同一个
+- 指标为进程内累计，多 worker 部署时每个进程各自暴露，由 Prometheus 按实例聚合
+
+环境变量：
+
+- ``SLOW_REQUEST_MS``：慢请求阈值毫秒数，默认 0（关闭）；开启后超过阈值的请求以 WARNING 记录耗时与 SQL 列表
+- ``SLOW_REQUEST_MAX_QUERIES``：慢请求日志中最多保留的 SQL 条数，默认 50
+"""
+
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "statements", "max_statements")
+
+    def __init__(self, max_statements: int = 0):
+        self.queries = 0
+        self.db_time = 0.0
+        # (耗时秒, SQL)；仅开启慢请求日志时记录
+        self.statements: List[Tuple[float, str]] = []
+        self.max_statements = max_statements
+
+    def record(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.db_time += elapsed
+        if len(self.statements) < self.max_statements:
+            self.statements.append((elapsed, statement))
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def install_query_hooks(target=Engine):
+    """默认监听 ``Engine`` 类，对主库、只读副本及测试中新建的引擎都生效；重复调用无副作用。"""
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # 标签值 → [各桶计数（非累计，最后一格为 +Inf）, sum, count]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def clear(self):
+        self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                le = 'le="%s"' % (bound if bound == "+Inf" else float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def clear(self):
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self.requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Request latency until the response body is sent.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+        self.queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS
+        )
+        self.db_time = Histogram(
+            "http_request_db_duration_seconds", "Time spent in SQL statements per request.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+
+    def observe(self, method: str, route: str, status: int, duration: float, stats: RequestStats):
+        labels = (method, route)
+        with self._lock:
+            self.requests.inc((method, route, str(status)))
+            self.latency.observe(labels, duration)
+            self.queries.observe(labels, stats.queries)
+            self.db_time.observe(labels, stats.db_time)
+
+    def _metrics(self):
+        return self.requests, self.latency, self.queries, self.db_time
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [line for metric in self._metrics() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            for metric in self._metrics():
+                metric.clear()
+
+
+class MetricsMiddleware:
+    def __init__(
+        self,
+        app,
+        registry: Optional[MetricsRegistry] = None,
+        slow_request_ms: Optional[float] = None,
+        slow_request_max_queries: Optional[int] = None,
+    ):
+        self.app = app
+        self.registry = registry or metrics_registry
+        self.slow_request_ms = (
+            float(os.getenv("SLOW_REQUEST_MS", "0")) if slow_request_ms is None else slow_request_ms
+        )
+        self.slow_request_max_queries = (
+            int(os.getenv("SLOW_REQUEST_MAX_QUERIES", "50"))
+            if slow_request_max_queries is None
+            else slow_request_max_queries
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(self.slow_request_max_queries if self.slow_request_ms > 0 else 0)
+        token = _current_stats.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            _current_stats.reset(token)
+            # 路由匹配后 Starlette 把 route 写回同一个 scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "<unmatched>"
+            self.registry.observe(scope["method"], path, status, duration, stats)
+            if self.slow_request_ms > 0 and duration * 1000 >= self.slow_request_ms:
+                self._log_slow(scope, path, status, duration, stats)
+
+    def _log_slow(self, scope, path: str, status: int, duration: float, stats: RequestStats):
+        query = scope.get("query_string", b"").decode("latin-1")
+        target = scope["path"] + (f"?{query}" if query else "")
+        lines = [
+            f"slow request {scope['method']} {target} route={path} status={status} "
+            f"duration={duration * 1000:.1f}ms queries={stats.queries} db={stats.db_time * 1000:.1f}ms"
+        ]
+        lines += [f"  [{elapsed * 1000:7.2f}ms] {' '.join(sql.split())}" for elapsed, sql in stats.statements]
+        if stats.queries > len(stats.statements):
+            lines.append(f"  ... {stats.queries - len(stats.statements)} more")
+        logger.warning("\n".join(lines))
+
+
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,132 @@
+"""外部数据源调用的容错原语：抖动指数退避重试、AIMD 自适应并发、熔断器。
+
+- ``RetryPolicy``：第 n 次重试前等待 ``uniform(0, min(max_delay, base_delay * 2**n))``（full jitter），
+  响应带 ``Retry-After`` 时取两者较大值
+- ``AimdLimiter``：在途请求上限。成功且延迟低于目标时每完成约一个窗口的请求 +1（加性增），
+  遇到 429/5xx/超时或延迟超标时减半（乘性减），两次减小之间至少间隔 ``cooldown`` 秒
+- ``CircuitBreaker``：连续失败达到阈值后打开，``reset_timeout`` 秒内直接拒绝；之后放行一个探测请求，
+  成功则关闭，失败则重新打开
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开期间拒绝的请求。"""
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 10.0, rng=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> float:
+        backoff = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        if retry_after is not None:
+            backoff = max(backoff, min(retry_after, self.max_delay))
+        return backoff
+
+
+class AimdLimiter:
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial: Optional[int] = None,
+        latency_target: float = 2.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 1.0,
+    ):
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = max(min(min_limit, self.max_limit), 1)
+        self.limit = float(initial if initial is not None else self.max_limit)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency: float):
+        if latency > self.latency_target:
+            self.on_congestion()
+            return
+        with self._cond:
+            # 每完成约 limit 个请求 +1，相当于每个「往返窗口」加一
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_congestion(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self.decreases += 1
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """请求前调用；熔断打开时抛出 ``CircuitOpenError``。"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(f"circuit open, retry after {self.reset_timeout:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
@@ -0,0 +1,113 @@
+"""回测交易信号与净值曲线的列式存储。
+
+一次回测的全部信号和组合净值曲线打包成一个压缩的 ``.npz``（每列一个 NumPy 数组，
+zip + deflate），作为 ``backtest_artifacts.payload`` 一行写入，代替逐行写
+``trade_signals``。读取时只解压需要的列，分页在数组上切片完成。
+
+存储方式由 ``BACKTEST_SIGNAL_STORAGE`` 选择：``rows``（默认，逐行写 ``trade_signals``）
+或 ``columnar``。
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from typing import Dict, List, Optional
+
+from .lazy_import import lazy_module
+
+np = lazy_module("numpy")
+
+ARTIFACT_FORMAT = "npz-v1"
+STORAGE_ROWS = "rows"
+STORAGE_COLUMNAR = "columnar"
+
+
+def signal_storage_mode() -> str:
+    mode = os.getenv("BACKTEST_SIGNAL_STORAGE", STORAGE_ROWS).lower()
+    if mode not in (STORAGE_ROWS, STORAGE_COLUMNAR):
+        raise ValueError(f"BACKTEST_SIGNAL_STORAGE must be '{STORAGE_ROWS}' or '{STORAGE_COLUMNAR}'")
+    return mode
+
+
+def _days(dates: np.ndarray) -> np.ndarray:
+    """``datetime64[D]`` 的整数表示即距 1970-01-01 的天数。"""
+    return dates.astype("datetime64[D]").astype(np.int32)
+
+
+def _dates(days: np.ndarray) -> np.ndarray:
+    return days.astype("datetime64[D]")
+
+
+def pack_backtest_output(output) -> bytes:
+    """``BacktestOutput`` → 压缩列式字节串。日期以 int32 天数保存，数量带符号（正买负卖）。"""
+    cols = output.signal_columns()
+    buf = io.BytesIO()
+    np.savez_compressed(
+        buf,
+        fund_codes=cols["fund_codes"],
+        signal_date=_days(cols["signal_date"]),
+        fund_index=cols["fund_index"].astype(np.int32),
+        quantity=cols["quantity"],
+        price=cols["price"].astype(np.float64),
+        portfolio_value=cols["portfolio_value"].astype(np.float64),
+        equity_date=_days(output.dates),
+        equity_value=np.round(output.equity, 2),
+    )
+    return buf.getvalue()
+
+
+class SignalArchive:
+    """列式存档；各列按需从 zip 中解压，每次解压后即关闭 ``NpzFile``。"""
+
+    def __init__(self, payload: bytes):
+        self._payload = payload
+        self._cols: Dict[str, np.ndarray] = {}
+
+    def _load(self, *names: str):
+        missing = [name for name in names if name not in self._cols]
+        if missing:
+            with np.load(io.BytesIO(self._payload), allow_pickle=False) as npz:
+                for name in missing:
+                    self._cols[name] = npz[name]
+
+    def _col(self, name: str) -> np.ndarray:
+        self._load(name)
+        return self._cols[name]
+
+    @property
+    def total(self) -> int:
+        return int(self._col("quantity").size)
+
+    def signals(self, skip: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """按基金、日期顺序返回第 ``skip`` 条起的 ``limit`` 条信号。"""
+        stop = None if limit is None else skip + limit
+        window = slice(skip, stop)
+        self._load("fund_codes", "quantity", "signal_date", "fund_index", "price", "portfolio_value")
+        codes = self._col("fund_codes").tolist()
+        qty = self._col("quantity")[window].tolist()
+        dates = _dates(self._col("signal_date")[window]).tolist()
+        return [
+            {
+                "signal_date": d,
+                "fund_code": codes[f],
+                "signal_type": "buy" if q > 0 else "sell",
+                "price": p,
+                "quantity": abs(q),
+                "portfolio_value": v,
+            }
+            for d, f, q, p, v in zip(
+                dates,
+                self._col("fund_index")[window].tolist(),
+                qty,
+                self._col("price")[window].tolist(),
+                self._col("portfolio_value")[window].tolist(),
+            )
+        ]
+
+    def equity_curve(self) -> dict:
+        self._load("equity_date", "equity_value")
+        return {
+            "dates": [d.isoformat() for d in _dates(self._col("equity_date")).tolist()],
+            "values": self._col("equity_value").tolist(),
+        }
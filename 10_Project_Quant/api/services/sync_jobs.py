@@ -0,0 +1,323 @@
+"""净值同步后台任务：分片执行、进度落库、cron 定时触发。
+
+``POST /api/funds/sync`` 只创建一条 pending 的 ``SyncJob`` 并立即返回 ``job_id``，任务在后台线程执行：
+
+- 基金按 ``SYNC_SHARD_SIZE`` 切成分片，最多 ``SYNC_SHARD_WORKERS`` 个分片同时拉取；所有分片共享同一个
+  ``NavSyncEngine``，host 并发上限、AIMD 与熔断对整个任务生效
+- 拉取结果由任务线程逐片落库（单写者，SQLite 下不会互相锁等待），每片落库后累加一次进度
+- 单只基金失败记入 ``SyncJob.failures``，不中断任务；状态流转 pending → running → completed / partial / failed
+- 同一时刻只执行一个任务，参数相同的任务未结束时重复提交直接返回已有任务（``active_key`` 唯一键保证，
+  多进程同时提交也只会建出一个）
+- 多进程部署：执行中的任务按 ``JOB_LEASE_SECONDS`` 续期租约，各进程启动时只把租约已过期的 running
+  任务判定为中断；各进程都运行定时器，到点时通过 ``job_locks`` 中的 ``sync_scheduler`` 锁选出一个进程投递
+
+环境变量：
+
+- ``SYNC_SHARD_SIZE``：每个分片的基金数，默认 50
+- ``SYNC_SHARD_WORKERS``：同时拉取的分片数，默认 2
+- ``SYNC_SCHEDULE``：定时同步的 cron 表达式（分 时 日 月 周，服务器本地时间），默认 ``0 2 * * *``；置空关闭
+- ``SYNC_SCHEDULE_DAYS``：定时同步的 ``days``，默认 30（增量同步，只拉缺失的日期）
+"""
+
+import logging
+import os
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .. import crud, models
+from .eastmoney import NavColumns
+from .leases import Heartbeat
+from .nav_sync import NavSyncEngine, SyncRange, plan_sync_ranges
+
+logger = logging.getLogger(__name__)
+
+SYNC_SHARD_SIZE = int(os.getenv("SYNC_SHARD_SIZE", "50"))
+SYNC_SHARD_WORKERS = int(os.getenv("SYNC_SHARD_WORKERS", "2"))
+SCHEDULER_LOCK = "sync_scheduler"
+
+
+def _fetch_shard(engine: NavSyncEngine, jobs: List[SyncRange]) -> Tuple[list, Dict[str, str]]:
+    failures: Dict[str, str] = {}
+
+    def record_failure(job, exc):
+        failures[job[0]] = f"{type(exc).__name__}: {exc}"
+
+    return list(engine.fetch_ranges(jobs, on_error=record_failure)), failures
+
+
+def _store_shard(db: Session, shard: List[models.Fund], results: list, failures: Dict[str, str], start: date) -> int:
+    """一个分片一次批量写入（快照/指标只刷新一次）；失败的基金不推进 ``nav_synced_from``。"""
+    funds_by_code = {fund.code: fund for fund in shard}
+    parts: Dict[str, List[NavColumns]] = {}
+    for code, _, _, columns in results:
+        parts.setdefault(code, []).append(columns)
+    inserted = crud.bulk_upsert_nav_columns(
+        db, {funds_by_code[code].id: NavColumns.concat(cols).sorted_unique() for code, cols in parts.items()}
+    )
+    crud.mark_funds_synced_from(db, [fund for fund in shard if fund.code not in failures], start)
+    return inserted
+
+
+def _run_sync_job(db: Session, job: models.SyncJob, engine: NavSyncEngine, shard_size: int, shard_workers: int):
+    end = date.today()
+    start = end - timedelta(days=job.days)
+    funds = crud.get_funds(db, skip=0, limit=None)
+    shards = [funds[lo:lo + shard_size] for lo in range(0, len(funds), shard_size)]
+    crud.start_sync_job(db, job, start, end, len(funds), len(shards))
+
+    remaining = iter(shards)
+    in_flight: Dict[Future, Tuple[List[models.Fund], int]] = {}
+    with ThreadPoolExecutor(max_workers=shard_workers, thread_name_prefix="sync-shard") as pool:
+
+        def submit_next():
+            # 按需提交，内存中最多保留 shard_workers 个分片的拉取结果
+            shard = next(remaining, None)
+            if shard is None:
+                return
+            bounds = {} if job.full else crud.get_nav_date_bounds(db, [fund.id for fund in shard])
+            jobs = [
+                r
+                for fund in shard
+                for r in plan_sync_ranges(fund.code, start, end, bounds.get(fund.id), fund.nav_synced_from, full=job.full)
+            ]
+            in_flight[pool.submit(_fetch_shard, engine, jobs)] = (shard, len(jobs))
+
+        for _ in range(shard_workers):
+            submit_next()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                shard, n_requests = in_flight.pop(future)
+                results, failures = future.result()
+                inserted = _store_shard(db, shard, results, failures, start)
+                crud.record_sync_shard(db, job, len(shard), inserted, n_requests, failures)
+                submit_next()
+
+    if job.failed_funds == 0:
+        return models.SyncJobStatus.completed
+    if job.failed_funds < job.total_funds:
+        return models.SyncJobStatus.partial
+    return models.SyncJobStatus.failed
+
+
+def _renew_lease(session_factory: Callable[[], Session], job_id: str) -> bool:
+    # 心跳线程使用独立会话
+    db = session_factory()
+    try:
+        return crud.renew_sync_job_lease(db, job_id)
+    finally:
+        db.close()
+
+
+def execute_sync_job(
+    job_id: str,
+    session_factory: Optional[Callable[[], Session]] = None,
+    engine: Optional[NavSyncEngine] = None,
+    shard_size: Optional[int] = None,
+    shard_workers: Optional[int] = None,
+) -> str:
+    """在当前线程执行一个同步任务并返回最终状态；``engine`` 须为 ``columnar=True``，任务结束后关闭。"""
+    if session_factory is None:
+        from ..database import SessionLocal as session_factory
+
+    engine = engine or NavSyncEngine(columnar=True)
+    db = session_factory()
+    try:
+        if not crud.claim_sync_job(db, job_id):
+            job = crud.get_sync_job(db, job_id)
+            return job.status.value if job else models.SyncJobStatus.failed.value
+        job = crud.get_sync_job(db, job_id)
+        try:
+            with Heartbeat(lambda: _renew_lease(session_factory, job_id)):
+                status = _run_sync_job(
+                    db, job, engine, shard_size or SYNC_SHARD_SIZE, shard_workers or SYNC_SHARD_WORKERS
+                )
+        except Exception as exc:
+            db.rollback()
+            logger.exception("Sync job %s failed", job_id)
+            crud.finish_sync_job(
+                db, job, models.SyncJobStatus.failed, str(exc) or type(exc).__name__, fetch_stats=engine.stats
+            )
+        else:
+            crud.finish_sync_job(db, job, status, fetch_stats=engine.stats)
+        return job.status.value
+    finally:
+        engine.close()
+        db.close()
+
+
+class SyncJobQueue:
+    """单线程执行同步任务，任务之间串行；``submit`` 只投递 ``job_id``。"""
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self.session_factory = session_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sync-job")
+            return self._executor
+
+    def submit(self, job_id: str) -> Future:
+        return self._get_executor().submit(execute_sync_job, job_id, self.session_factory)
+
+    def enqueue(self, db: Session, days: int, full: bool = False, trigger: str = "manual") -> models.SyncJob:
+        """创建并投递任务；参数相同的任务尚未结束时返回已有任务。"""
+        for attempt in range(3):
+            existing = crud.find_active_sync_job(db, days, full)
+            if existing is not None:
+                return existing
+            try:
+                job = crud.create_sync_job(db, str(uuid.uuid4()), days, full=full, trigger=trigger)
+            except IntegrityError:
+                # 其他进程刚建出同参数的任务；回到开头读取它（它若已结束则重新创建）
+                db.rollback()
+                if attempt == 2:
+                    raise
+                continue
+            self.submit(job.job_id)
+            return job
+
+    def recover(self, db: Session) -> List[str]:
+        """进程启动时：租约已过期的 running 任务标记为失败，pending 的任务重新入队。
+
+        其他进程正在执行的任务租约仍有效，不受影响；pending 任务可能被多个进程重复投递，由
+        ``claim_sync_job`` 保证只执行一次。
+        """
+        for job in crud.get_stale_sync_jobs(db):
+            crud.finish_sync_job(db, job, models.SyncJobStatus.failed, "Worker interrupted")
+        job_ids = [job.job_id for job in crud.get_sync_jobs_by_status(db, models.SyncJobStatus.pending)]
+        for job_id in job_ids:
+            self.submit(job_id)
+        return job_ids
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
+
+
+def _parse_cron_field(spec: str, lo: int, hi: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in spec.split(","):
+        body, _, step = part.partition("/")
+        if body == "*":
+            first, last = lo, hi
+        elif "-" in body:
+            first, last = (int(x) for x in body.split("-", 1))
+        else:
+            first = last = int(body)
+            if step:
+                last = hi
+        step_n = int(step) if step else 1
+        if not (lo <= first <= last <= hi) or step_n < 1:
+            raise ValueError(f"invalid cron field {spec!r} (allowed {lo}-{hi})")
+        values.update(range(first, last + 1, step_n))
+    return values
+
+
+class CronSchedule:
+    """五段式 cron 表达式：分 时 日 月 周（0/7 为周日），支持 ``*``、``a-b``、``a,b``、``*/n``。"""
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = _parse_cron_field(fields[2], 1, 31)
+        self.months = _parse_cron_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _parse_cron_field(fields[4], 0, 7)}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, d: date) -> bool:
+        if d.month not in self.months:
+            return False
+        dom, dow = d.day in self.days, (d.weekday() + 1) % 7 in self.weekdays
+        # 与 cron 一致：日和周都做了限制时满足其一即可
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, now: datetime) -> datetime:
+        """严格晚于 ``now`` 的下一个触发时刻（精确到分钟）。"""
+        start = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"cron expression never fires: {self.expr!r}")
+
+
+class SyncScheduler:
+    """按 cron 表达式定时投递同步任务的后台线程；上一次定时任务未结束时不重复投递。
+
+    每个进程都有一个定时器，到点时只有拿到 ``sync_scheduler`` 锁的进程投递。锁由上次投递的进程续期，
+    该进程退出后锁过期，下一次触发时由其他进程接管。
+    """
+
+    def __init__(self, queue: SyncJobQueue):
+        self.queue = queue
+        self.schedule: Optional[CronSchedule] = None
+        self.days = 30
+        self.next_run: Optional[datetime] = None
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self, expr: Optional[str] = None, days: Optional[int] = None):
+        expr = os.getenv("SYNC_SCHEDULE", "0 2 * * *") if expr is None else expr
+        if not expr.strip() or self._thread is not None:
+            return
+        self.schedule = CronSchedule(expr)
+        self.days = days or int(os.getenv("SYNC_SCHEDULE_DAYS", "30"))
+        self._stop.clear()
+        self._thread = Thread(target=self._loop, name="sync-scheduler", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.next_run = self.schedule.next_after(datetime.now())
+            if self._stop.wait(max(0.0, (self.next_run - datetime.now()).total_seconds())):
+                return
+            self.trigger()
+
+    def trigger(self) -> Optional[models.SyncJob]:
+        session_factory = self.queue.session_factory
+        if session_factory is None:
+            from ..database import SessionLocal as session_factory
+        db = session_factory()
+        try:
+            if not crud.acquire_job_lock(db, SCHEDULER_LOCK):
+                return None
+            return self.queue.enqueue(db, self.days, trigger="schedule")
+        except Exception:
+            logger.exception("Scheduled sync failed to enqueue")
+            return None
+        finally:
+            db.close()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+sync_job_queue = SyncJobQueue()
+sync_scheduler = SyncScheduler(sync_job_queue)
@@ -0,0 +1,36 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.database import Base
+from api.services.analytics import nav_matrix_cache
+from api.services.fund_search import fund_search_index
+from api.services.nav_cache import nav_cache
+from api.services.principal_cache import principal_cache
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    # 进程内缓存/搜索索引按 fund_id 缓存，每个用例都是一个新库，需要清空
+    nav_cache.invalidate()
+    fund_search_index.invalidate()
+    nav_matrix_cache.clear()
+    principal_cache.invalidate()
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    nav_cache.invalidate()
+    fund_search_index.invalidate()
+    nav_matrix_cache.clear()
+    principal_cache.invalidate()
+    engine.dispose()
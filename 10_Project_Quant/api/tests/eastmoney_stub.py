@@ -0,0 +1,89 @@
+"""本地东方财富 lsjz 接口桩服务，供同步相关测试使用。"""
+
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+def make_rows(fund_code: str, start: date, end: date):
+    """按自然日生成 [start, end] 内的净值行（倒序，与真实接口一致）。"""
+    seed = int(fund_code) % 97
+    rows = []
+    d = end
+    while d >= start:
+        nav = 1 + ((d.toordinal() + seed) % 50) / 100
+        rows.append({"FSRQ": d.isoformat(), "DWJZ": f"{nav:.4f}", "LJJZ": f"{nav + 1:.4f}", "JZZZL": "0.10"})
+        d -= timedelta(days=1)
+    return rows
+
+
+class EastmoneyStub:
+    def __init__(self, delay: float = 0.0, fault: Optional[Callable[[dict], Optional[int]]] = None):
+        """``fault(query)`` 返回状态码时直接以该状态码空响应（429 带 ``Retry-After: 0``），用于故障注入。"""
+        self.delay = delay
+        self.fault = fault
+        self.faults = 0
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    stub.client_ports.add(self.client_address[1])
+                try:
+                    query = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+                    with stub._lock:
+                        stub.requests.append(query)
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    status = stub.fault(query) if stub.fault else None
+                    if status:
+                        with stub._lock:
+                            stub.faults += 1
+                        self.send_response(status)
+                        if status == 429:
+                            self.send_header("Retry-After", "0")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    rows = make_rows(
+                        query["fundCode"], date.fromisoformat(query["startDate"]), date.fromisoformat(query["endDate"])
+                    )
+                    size, page = int(query["pageSize"]), int(query["pageIndex"])
+                    payload = {"Data": {"LSJZList": rows[(page - 1) * size:page * size]}, "TotalCount": len(rows), "ErrCode": 0}
+                    body = f"jQuery123({json.dumps(payload)})".encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/javascript")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/f10/lsjz"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
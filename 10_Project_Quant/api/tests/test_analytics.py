@@ -0,0 +1,122 @@
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.analytics import build_nav_matrix, nav_matrix_cache, pairwise_stats, rolling_beta
+from api.services.eastmoney import FundNavPoint
+
+D0 = date(2024, 1, 1)
+
+
+def test_build_nav_matrix_aligns_and_fills():
+    rows = [
+        (1, D0, Decimal("1.0"), None),
+        (1, D0 + timedelta(days=2), Decimal("1.2"), None),
+        (2, D0 + timedelta(days=1), Decimal("2.0"), Decimal("4.0")),
+        (2, D0 + timedelta(days=2), Decimal("2.2"), Decimal("4.4")),
+    ]
+    ffill = build_nav_matrix([2, 1], [rows[:1], rows[1:]], fill="ffill")
+    assert ffill.dates.tolist() == [D0, D0 + timedelta(days=1), D0 + timedelta(days=2)]
+    # 列顺序按请求顺序；基金 2 的累计净值完整，使用累计净值
+    np.testing.assert_array_equal(ffill.values, [[np.nan, 1.0], [4.0, 1.0], [4.4, 1.2]])
+
+    masked = build_nav_matrix([1, 2], [rows], fill="mask")
+    np.testing.assert_array_equal(masked.values, [[1.0, np.nan], [np.nan, 4.0], [1.2, 4.4]])
+    with pytest.raises(ValueError):
+        build_nav_matrix([1], [rows], fill="zero")
+
+
+def test_pairwise_stats_match_numpy_and_handle_missing():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.01, (300, 4))
+    stats = pairwise_stats(returns)
+    np.testing.assert_allclose(stats["covariance"], np.cov(returns.T), rtol=1e-9)
+    np.testing.assert_allclose(stats["correlation"], np.corrcoef(returns.T), rtol=1e-9)
+
+    returns[:100, 1] = np.nan
+    stats = pairwise_stats(returns)
+    both = returns[100:][:, [0, 1]]
+    np.testing.assert_allclose(stats["correlation"][0, 1], np.corrcoef(both.T)[0, 1], rtol=1e-9)
+    np.testing.assert_allclose(stats["covariance"][0, 1], np.cov(both.T)[0, 1], rtol=1e-9)
+    assert stats["observations"][0, 1] == 200 and stats["observations"][0, 2] == 300
+
+
+def test_rolling_beta_matches_window_regression():
+    rng = np.random.default_rng(1)
+    bench = rng.normal(0, 0.01, 120)
+    returns = np.column_stack((bench, 1.5 * bench + rng.normal(0, 0.002, 120), rng.normal(0, 0.01, 120)))
+    returns[50, 2] = np.nan
+    beta = rolling_beta(returns, benchmark=0, window=20)
+    assert np.isnan(beta[:9]).all()
+    for t in (19, 60, 119):
+        window = returns[t - 19:t + 1]
+        ok = ~np.isnan(window[:, 2])
+        expected = np.cov(window[ok, 2], window[ok, 0])[0, 1] / np.var(window[ok, 0], ddof=1)
+        np.testing.assert_allclose(beta[t, 2], expected, rtol=1e-9)
+    np.testing.assert_allclose(beta[19:, 0], 1.0)
+    assert 1.3 < beta[-1, 1] < 1.7
+
+
+def test_correlation_endpoint_and_matrix_cache(session_factory):
+    from fastapi.testclient import TestClient
+
+    from api import database
+    from api.main import app
+
+    db = session_factory()
+    db.add_all([models.Fund(code=f"00000{i}", name=f"F{i}") for i in range(1, 4)])
+    db.commit()
+    rng = np.random.default_rng(2)
+    base = rng.normal(0, 0.01, 200)
+    for fund_id, scale in ((1, 1.0), (2, 2.0), (3, -1.0)):
+        navs = np.cumprod(1 + scale * base)
+        crud.upsert_fund_navs(
+            db, fund_id, [FundNavPoint(D0 + timedelta(days=i), Decimal(str(round(v, 4)))) for i, v in enumerate(navs)]
+        )
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_db
+    try:
+        client = TestClient(app)
+        payload = {"fund_codes": ["000002", "000003"], "benchmark_code": "000001", "start_date": "2024-01-01", "end_date": "2024-12-31", "rolling_window": 30}
+        body = client.post("/api/analytics/correlation", json=payload).json()
+        assert body["codes"] == ["000002", "000003", "000001"]
+        corr = np.array(body["correlation"])
+        assert corr[0, 2] == pytest.approx(1.0, abs=1e-4) and corr[1, 2] == pytest.approx(-1.0, abs=1e-4)
+        assert body["beta"]["000002"] == pytest.approx(2.0, rel=1e-2)
+        assert len(body["rolling_beta"]["dates"]) == body["observations"] == 199
+        assert body["rolling_beta"]["values"]["000003"][-1] == pytest.approx(-1.0, rel=1e-2)
+
+        misses = nav_matrix_cache.misses
+        client.post("/api/analytics/correlation", json={**payload, "fund_codes": ["000003", "000002"], "include_rolling": False})
+        assert nav_matrix_cache.misses == misses and nav_matrix_cache.hits >= 1
+
+        crud.upsert_fund_navs(db, 1, [FundNavPoint(D0 + timedelta(days=200), Decimal("1.5"))])
+        client.post("/api/analytics/correlation", json=payload)
+        assert nav_matrix_cache.misses == misses + 1
+
+        # 补录历史净值：最新净值日期不变，generation 递增，同样重建
+        crud.upsert_fund_navs(db, 2, [FundNavPoint(D0 - timedelta(days=1), Decimal("1"))])
+        client.post("/api/analytics/correlation", json=payload)
+        assert nav_matrix_cache.misses == misses + 2
+
+        assert client.post("/api/analytics/correlation", json={**payload, "fund_codes": ["999999"]}).status_code == 404
+        assert client.post("/api/analytics/correlation", json={**payload, "fill": "zero"}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
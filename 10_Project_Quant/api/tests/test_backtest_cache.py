@@ -0,0 +1,109 @@
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.backtest_cache import backtest_cache_key
+from api.services.backtest_engine import GridParams
+from api.services.backtest_worker import execute_backtest
+from api.services.eastmoney import FundNavPoint
+
+D0 = date(2024, 1, 1)
+
+
+def test_cache_key_is_canonical():
+    versions = {"000001": (D0, 3), "000002": (D0, 1)}
+    params = GridParams.from_dict({"rise_ratio": 0.03, "fall_ratio": "0.03", "multiplier": 2})
+    same = GridParams.from_dict({"multiplier": 2.0, "fall_ratio": 0.03, "rise_ratio": 0.03, "grid_count": 10})
+    key = backtest_cache_key(["000002", "000001"], D0, D0, params, versions)
+    assert key == backtest_cache_key(["000001", "000002", "000001"], D0, D0, same, versions)
+    assert key != backtest_cache_key(["000001", "000002"], D0, D0, params, {**versions, "000002": (D0, 2)})
+    assert key != backtest_cache_key(["000001", "000002"], D0, D0 + timedelta(days=1), params, versions)
+
+
+def test_identical_submissions_reuse_result_until_new_navs(session_factory, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import database
+    from api.main import app
+    from api.routers import backtest as backtest_router
+
+    db = session_factory()
+    db.add(models.Fund(code="000001", name="A"))
+    db.commit()
+    points = [FundNavPoint(D0 + timedelta(days=i), Decimal("1") + Decimal(i % 7) / 100) for i in range(60)]
+    crud.upsert_fund_navs(db, 1, points)
+
+    submitted = []
+    monkeypatch.setattr(backtest_router.backtest_queue, "submit", submitted.append)
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_db
+    try:
+        client = TestClient(app)
+        payload = {
+            "fund_codes": ["000001"],
+            "start_date": "2024-01-01",
+            "end_date": "2024-12-31",
+            "strategy_params": {"rise_ratio": 0.03, "fall_ratio": 0.03},
+        }
+        first = client.post("/api/backtest/run", json=payload).json()
+        assert first["cached"] is False and submitted == [first["task_id"]]
+
+        # 仍在排队时相同提交直接返回同一个任务
+        pending = client.post("/api/backtest/run", json=payload).json()
+        assert pending["task_id"] == first["task_id"] and pending["cached"] is True
+
+        assert execute_backtest(first["task_id"], session_factory) == "completed"
+        done = client.post("/api/backtest/run", json={**payload, "strategy_params": {"fall_ratio": 0.03, "rise_ratio": "0.03"}}).json()
+        assert done == {**first, "status": "completed", "cached": True}
+        assert client.post("/api/backtest/run?force=true", json=payload).json()["task_id"] != first["task_id"]
+
+        crud.upsert_fund_navs(db, 1, [FundNavPoint(D0 + timedelta(days=60), Decimal("1.5"))])
+        fresh = client.post("/api/backtest/run", json=payload).json()
+        assert fresh["cached"] is False and fresh["task_id"] != first["task_id"]
+        assert db.query(models.Backtest).count() == 3
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def test_worker_reloads_navs_written_by_another_process(session_factory):
+    from api import schemas
+
+    db = session_factory()
+    db.add(models.Fund(code="000001", name="A"))
+    db.commit()
+    crud.upsert_fund_navs(db, 1, [FundNavPoint(D0 + timedelta(days=i), Decimal("1") + Decimal(i % 7) / 100) for i in range(60)])
+    payload = schemas.BacktestCreate(
+        fund_codes=["000001"], start_date=D0, end_date=date(2024, 12, 31), strategy_params={"rise_ratio": 0.03, "fall_ratio": 0.03}
+    )
+    crud.create_backtest(db, payload, user_id=1, task_id="before")
+    assert execute_backtest("before", session_factory) == "completed"
+
+    # 其他进程写入新净值：数据库版本前进，本进程的净值缓存未收到通知
+    db.add(models.FundNav(fund_id=1, nav_date=D0 + timedelta(days=60), nav=Decimal("2")))
+    crud.refresh_nav_snapshots(db, [1])
+    db.commit()
+    crud.create_backtest(db, payload, user_id=1, task_id="after")
+    assert execute_backtest("after", session_factory) == "completed"
+
+    db.expire_all()
+    before, after = crud.get_backtest_by_task_id(db, "before"), crud.get_backtest_by_task_id(db, "after")
+    params = GridParams.from_dict(payload.strategy_params)
+    assert after.cache_key == crud.get_backtest_cache_key(db, ["000001"], D0, date(2024, 12, 31), params) != before.cache_key
+    # 结果包含新写入的那一期净值，而不是本进程缓存里的旧数据
+    curves = [crud.get_backtest_equity_curve(db, backtest)["dates"] for backtest in (before, after)]
+    assert (len(curves[0]), len(curves[1]), curves[1][-1]) == (60, 61, (D0 + timedelta(days=60)).isoformat())
+    db.close()
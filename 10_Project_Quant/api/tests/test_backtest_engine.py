@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.services.backtest_engine import (
+    GridParams,
+    build_grid_levels,
+    expand_param_grid,
+    run_grid_backtest,
+    run_grid_sweep,
+    simulate_grid,
+    simulate_grid_reference,
+)
+
+
+def _random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    navs = np.round(np.exp(np.cumsum(rng.normal(0, 0.012, n))), 4)
+    dates = np.datetime64("2015-01-05") + np.arange(n)
+    return dates, navs
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_vectorized_matches_reference(seed):
+    _, navs = _random_walk(2500, seed)
+    params = GridParams(rise_ratio=0.04, fall_ratio=0.03, multiplier=1.5, grid_count=12, fee_rate=0.0015)
+    levels = build_grid_levels(float(navs[0]), params, params.initial_capital)
+
+    fast = simulate_grid(navs, levels, params.initial_capital, params.fee_rate)
+    slow = simulate_grid_reference(navs, levels, params.initial_capital, params.fee_rate)
+
+    np.testing.assert_allclose(fast[0], slow[0], rtol=1e-9)
+    np.testing.assert_allclose(fast[1], slow[1])
+    np.testing.assert_array_equal(fast[2], slow[2])
+    np.testing.assert_allclose(fast[3], slow[3])
+    np.testing.assert_allclose(np.sort(fast[4]), np.sort(slow[4]), rtol=1e-9)
+
+
+def test_run_grid_backtest_metrics():
+    dates = np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-01-07"))
+    navs = np.array([1.0, 0.95, 0.90, 0.95, 1.0, 1.05])
+    params = GridParams(rise_ratio=0.05, fall_ratio=0.05, grid_count=2, initial_capital=10000)
+
+    output = run_grid_backtest({"000001": (dates, navs)}, params)
+
+    assert output.metrics["total_trades"] == 4
+    assert output.metrics["closed_trades"] == 2
+    assert output.metrics["win_rate"] == 100.0
+    assert output.metrics["total_return"] > 0
+    signals = list(output.iter_signals())
+    assert [s["signal_type"] for s in signals] == ["buy", "buy", "sell", "sell"]
+
+
+def test_grid_params_validation():
+    with pytest.raises(ValueError):
+        GridParams.from_dict({"rise_ratio": 0.05})
+    with pytest.raises(ValueError):
+        GridParams.from_dict({"rise_ratio": 0.05, "fall_ratio": 1.5})
+    params = GridParams.from_dict({"rise_ratio": 0.05, "fall_ratio": 0.05, "multiplier": 2})
+    assert params.multiplier == 2.0
+
+
+def test_sweep_matches_individual_backtests():
+    series = {"000001": _random_walk(600, 7), "000002": _random_walk(400, 8)}
+    combos = expand_param_grid(
+        {"fee_rate": 0.001},
+        {"rise_ratio": [0.02, 0.05], "fall_ratio": {"start": 0.02, "stop": 0.04, "step": 0.01}, "multiplier": [1, 2]},
+    )
+    assert len(combos) == 12
+    params_list = [GridParams.from_dict(c) for c in combos]
+
+    swept = run_grid_sweep(series, params_list)
+
+    for params, metrics in zip(params_list, swept):
+        expected = run_grid_backtest(series, params).metrics
+        assert metrics.keys() == expected.keys()
+        for key, value in expected.items():
+            assert metrics[key] == pytest.approx(value, rel=1e-9, abs=1e-12)
+
+
+def test_expand_param_grid_rejects_oversized_ranges_before_expanding():
+    with pytest.raises(ValueError, match="Too many combinations"):
+        expand_param_grid({}, {"rise_ratio": {"start": 0.0, "stop": 1e12, "step": 1e-6}})
+    with pytest.raises(ValueError, match="Too many combinations"):
+        expand_param_grid({}, {"rise_ratio": list(range(100)), "fall_ratio": list(range(100))})
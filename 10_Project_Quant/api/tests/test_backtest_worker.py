@@ -0,0 +1,171 @@
+import asyncio
+import math
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models, schemas
+from api.database import Base
+from api.services.backtest_engine import GridParams, load_nav_arrays, run_grid_sweep
+from api.services.backtest_worker import BacktestQueue, execute_backtest
+from api.services.eastmoney import FundNavPoint
+from api.services.leases import lease_deadline
+
+
+def _seed(db, code="000001", days=120):
+    fund = models.Fund(code=code, name="测试基金", fund_type="混合型")
+    db.add(fund)
+    db.commit()
+    points = [
+        FundNavPoint(
+            nav_date=date(2024, 1, 1) + timedelta(days=i),
+            nav=Decimal(str(round(1 + 0.1 * math.sin(i / 5), 4))),
+        )
+        for i in range(days)
+    ]
+    crud.upsert_fund_navs(db, fund_id=fund.id, points=points)
+
+
+def _create(db, task_id, fund_codes, strategy_params=None):
+    payload = schemas.BacktestCreate(
+        fund_codes=fund_codes,
+        start_date=date(2024, 1, 1),
+        end_date=date(2024, 12, 31),
+        strategy_params=strategy_params or {"rise_ratio": 0.03, "fall_ratio": 0.03, "multiplier": 2},
+    )
+    return crud.create_backtest(db, payload, user_id=1, task_id=task_id)
+
+
+def test_execute_backtest_lifecycle(session_factory):
+    db = session_factory()
+    _seed(db)
+    _create(db, "ok", ["000001"])
+    _create(db, "missing", ["999999"])
+
+    assert execute_backtest("ok", session_factory) == "completed"
+    assert execute_backtest("missing", session_factory) == "failed"
+    # 已完成的任务不会被重复执行
+    assert execute_backtest("ok", session_factory) == "completed"
+
+    db.expire_all()
+    done = crud.get_backtest_by_task_id(db, "ok")
+    assert done.result is not None
+    assert done.result.total_trades == len(done.signals) > 0
+    failed = crud.get_backtest_by_task_id(db, "missing")
+    assert "999999" in failed.error_message
+    assert failed.result is None
+    db.close()
+
+
+def test_queue_runs_in_worker_process(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'queue.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    _seed(db)
+    _create(db, "queued", ["000001"])
+
+    queue = BacktestQueue(max_workers=1)
+    try:
+        assert queue.submit("queued").result(timeout=60) == "completed"
+    finally:
+        queue.shutdown()
+
+    db.expire_all()
+    assert crud.get_backtest_by_task_id(db, "queued").status == models.BacktestStatus.completed
+    db.close()
+    engine.dispose()
+
+
+def test_recover_only_fails_expired_leases(session_factory, monkeypatch):
+    db = session_factory()
+    _seed(db)
+    for task_id in ("live", "stale", "queued"):
+        _create(db, task_id, ["000001"])
+    assert crud.claim_backtest(db, "live") and crud.claim_backtest(db, "stale")
+    # 模拟持有 stale 的进程已退出：租约不再续期、已经过期
+    stale = crud.get_backtest_by_task_id(db, "stale")
+    stale.worker_id = "other-host:1"
+    stale.lease_expires_at = lease_deadline(-1)
+    db.commit()
+    assert crud.renew_backtest_lease(db, "live") and not crud.renew_backtest_lease(db, "stale")
+
+    queue = BacktestQueue(max_workers=1)
+    submitted = []
+    monkeypatch.setattr(queue, "submit", submitted.append)
+    assert queue.recover(db) == ["queued"] and submitted == ["queued"]
+
+    db.expire_all()
+    assert crud.get_backtest_by_task_id(db, "live").status == models.BacktestStatus.running
+    assert crud.get_backtest_by_task_id(db, "stale").status == models.BacktestStatus.failed
+    db.close()
+
+
+
+@pytest.mark.parametrize(
+    "takeover",
+    [
+        # 被判定中断并置为失败
+        {"status": models.BacktestStatus.failed, "error_message": "Worker interrupted"},
+        # 被重新排队后由其他进程接手
+        {"status": models.BacktestStatus.running, "worker_id": "other-host:1"},
+    ],
+)
+def test_worker_drops_result_after_losing_lease(session_factory, monkeypatch, takeover):
+    from api.services import backtest_worker
+
+    db = session_factory()
+    _seed(db)
+    _create(db, "slow", ["000001"])
+    run = backtest_worker.run_grid_backtest
+
+    def run_while_lease_is_taken(series, params):
+        other = session_factory()
+        other.query(models.Backtest).filter(models.Backtest.task_id == "slow").update(takeover)
+        other.commit()
+        other.close()
+        return run(series, params)
+
+    monkeypatch.setattr(backtest_worker, "run_grid_backtest", run_while_lease_is_taken)
+    assert execute_backtest("slow", session_factory) == takeover["status"].value
+
+    db.expire_all()
+    backtest = crud.get_backtest_by_task_id(db, "slow")
+    assert backtest.result is None and backtest.signals == []
+    assert (backtest.status, backtest.error_message) == (takeover["status"], takeover.get("error_message"))
+    db.close()
+
+def test_sweep_runs_on_its_own_pool(session_factory):
+    db = session_factory()
+    _seed(db)
+    series = load_nav_arrays(db, ["000001"], date(2024, 1, 1), date(2024, 12, 31))
+    params_list = [
+        GridParams.from_dict({"rise_ratio": rise, "fall_ratio": 0.03, "multiplier": 2}) for rise in (0.02, 0.03, 0.05)
+    ]
+    queue = BacktestQueue(max_workers=1, sweep_workers=1)
+    try:
+        assert asyncio.run(queue.run_sweep(series, params_list, min_chunk=2)) == run_grid_sweep(series, params_list)
+        # 寻优不占用回测任务的进程池
+        assert queue._executor is None and queue._sweep_executor is not None
+    finally:
+        queue.shutdown()
+    db.close()
+
+
+def test_sweep_request_limit_is_bounded():
+    base = {"fund_codes": ["000001"], "start_date": "2024-01-01", "end_date": "2024-12-31", "param_grid": {}}
+    assert schemas.BacktestSweepCreate(**base, limit=500).limit == 500
+    for limit in (0, 501):
+        with pytest.raises(ValidationError):
+            schemas.BacktestSweepCreate(**base, limit=limit)
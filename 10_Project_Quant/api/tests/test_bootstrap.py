@@ -0,0 +1,110 @@
+import json
+import os
+import subprocess
+import sys
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.bootstrap import BASELINE_REVISION, alembic_config, bootstrap
+from api.database import Base
+from api.services.eastmoney import FundNavPoint
+
+
+def test_import_has_no_side_effects(tmp_path):
+    db_file = tmp_path / "app.db"
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_file}")
+    env.pop("DATABASE_READ_URL", None)
+    code = (
+        "import json, sys; import api.main; "
+        "print(json.dumps([m for m in ('numpy', 'jose', 'passlib') if m in sys.modules]))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    # 导入不建表、不连库，重型依赖推迟到用到时再加载
+    assert json.loads(out.strip().splitlines()[-1]) == []
+    assert not db_file.exists()
+
+
+def test_bootstrap_migrates_and_seeds_idempotently(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+    assert bootstrap(engine) == {"migration": "upgrade", "seeded_funds": 3, "rebuilt_derived": False}
+    assert bootstrap(engine) == {"migration": "upgrade", "seeded_funds": 0, "rebuilt_derived": False}
+
+    with engine.connect() as connection:
+        # 迁移脚本与模型定义一致：新增字段忘记写迁移时这里会失败
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0005"
+    with Session(bind=engine) as db:
+        assert [f.code for f in db.query(models.Fund).order_by(models.Fund.code)] == ["000001", "000002", "110011"]
+    engine.dispose()
+
+
+def _legacy_engine(tmp_path):
+    """迁移引入前启动时 create_all 建出的库：基线表结构，没有 alembic_version。"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, BASELINE_REVISION)
+        connection.execute(text("DROP TABLE alembic_version"))
+        connection.execute(text("INSERT INTO funds (id, code, name) VALUES (1, '000001', '华夏成长')"))
+        # 旧的"先查再插"路径在并发下留下的重复行
+        for nav in ("1.2", "1.2", "1.21"):
+            connection.execute(text(f"INSERT INTO fund_navs (fund_id, nav_date, nav) VALUES (1, '2024-01-02', {nav})"))
+    return engine
+
+
+def _assert_schema_matches_models(engine):
+    with engine.connect() as connection:
+        assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+
+
+def test_bootstrap_upgrades_baseline_database(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    assert bootstrap(engine) == {"migration": "stamp", "seeded_funds": 0, "rebuilt_derived": True}
+    _assert_schema_matches_models(engine)
+    with Session(bind=engine) as db:
+        assert db.query(models.FundNavSnapshot).one().nav == Decimal("1.2")
+        assert [n.nav for n in db.query(models.FundNav)] == [Decimal("1.2")]
+        # 基线库缺少的字段与唯一键已补上：增量同步与冲突跳过的批量写入都能用
+        assert db.get(models.Fund, 1).nav_synced_from is None
+        point = FundNavPoint(nav_date=date(2024, 1, 3), nav=Decimal("1.3"), accumulated_nav=None)
+        assert crud.upsert_fund_navs(db, 1, [point]) == 1
+        assert crud.upsert_fund_navs(db, 1, [point]) == 0
+    assert bootstrap(engine)["migration"] == "upgrade"
+    engine.dispose()
+
+
+def test_bootstrap_completes_partially_upgraded_database(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    # 中间版本 create_all 建出的库：已有部分新表与字段，其余缺失
+    Base.metadata.create_all(bind=engine, tables=[models.FundMetrics.__table__, models.BacktestArtifact.__table__])
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE funds ADD COLUMN nav_synced_from DATE"))
+        # 快照表早于 generation 字段加入
+        connection.execute(
+            text(
+                "CREATE TABLE fund_nav_snapshots (fund_id INTEGER PRIMARY KEY REFERENCES funds (id), "
+                "nav_date DATE NOT NULL, nav NUMERIC(10, 4) NOT NULL, prev_nav_date DATE, prev_nav NUMERIC(10, 4), "
+                "daily_change_pct FLOAT, updated_at DATETIME DEFAULT (CURRENT_TIMESTAMP))"
+            )
+        )
+    assert bootstrap(engine)["migration"] == "stamp"
+    assert set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+    columns = {c["name"] for c in inspect(engine).get_columns("fund_nav_snapshots")}
+    assert "generation" in columns
+    engine.dispose()
@@ -0,0 +1,129 @@
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.eastmoney import FundNavPoint, NavColumns
+from api.services.nav_cache import nav_cache
+
+
+def _points(start, days):
+    return [
+        FundNavPoint(nav_date=start + timedelta(days=i), nav=Decimal("1.0000") + Decimal(i) / 1000, accumulated_nav=Decimal("2.0000"))
+        for i in range(days)
+    ]
+
+
+def test_bulk_upsert_skips_existing_rows(session_factory):
+    db = session_factory()
+    db.add_all([models.Fund(code="000001", name="A"), models.Fund(code="000002", name="B")])
+    db.commit()
+
+    assert crud.upsert_fund_navs(db, 1, _points(date(2024, 1, 1), 10)) == 10
+    assert crud.upsert_fund_navs(db, 1, _points(date(2024, 1, 6), 10)) == 5
+    inserted = crud.bulk_upsert_fund_navs(
+        db, {1: _points(date(2024, 1, 1), 20), 2: _points(date(2024, 1, 1), 3)}, batch_size=7
+    )
+    assert inserted == 5 + 3
+    assert db.query(models.FundNav).count() == 23
+
+    row = db.query(models.FundNav).filter_by(fund_id=1, nav_date=date(2024, 1, 3)).one()
+    assert row.nav == Decimal("1.0020")
+    db.close()
+
+
+def test_upsert_bumps_generation_only_for_funds_with_new_rows(session_factory):
+    db = session_factory()
+    db.add_all([models.Fund(code="000001", name="A"), models.Fund(code="000002", name="B")])
+    db.commit()
+    crud.bulk_upsert_fund_navs(db, {1: _points(date(2024, 1, 1), 5), 2: _points(date(2024, 1, 1), 5)})
+
+    def generations():
+        return dict(db.query(models.FundNavSnapshot.fund_id, models.FundNavSnapshot.generation))
+
+    before = generations()
+    # 基金 2 的净值全部已存在：不刷新快照与指标，数据版本不变
+    assert crud.bulk_upsert_fund_navs(db, {1: _points(date(2024, 1, 1), 6), 2: _points(date(2024, 1, 1), 5)}) == 1
+    assert generations() == {1: before[1] + 1, 2: before[2]}
+    db.close()
+
+
+def test_columnar_upsert_matches_point_upsert(session_factory):
+    db = session_factory()
+    db.add_all([models.Fund(code="000001", name="A"), models.Fund(code="000002", name="B")])
+    db.commit()
+    points = _points(date(2024, 1, 1), 10)
+    crud.upsert_fund_navs(db, 1, points)
+    cached = nav_cache.get(db, 2)
+
+    columns = NavColumns(
+        dates=np.array([p.nav_date for p in points], dtype="datetime64[D]"),
+        navs=np.array([float(p.nav) for p in points]),
+        accumulated_navs=np.array([2.0] * 9 + [np.nan]),
+    )
+    assert crud.bulk_upsert_nav_columns(db, {2: columns}) == 10
+    assert crud.bulk_upsert_nav_columns(db, {2: columns}) == 0
+
+    def stored(fund_id):
+        rows = db.query(models.FundNav).filter_by(fund_id=fund_id).order_by(models.FundNav.nav_date)
+        return [(r.nav_date, r.nav, r.accumulated_nav) for r in rows]
+
+    assert stored(2)[:9] == stored(1)[:9]
+    assert stored(2)[9][2] is None
+    assert db.get(models.FundNavSnapshot, 2).nav_date == date(2024, 1, 10)
+    appended = nav_cache.get(db, 2)  # 缓存在写入后直接追加，而不是失效重读
+    assert cached.dates.size == 0 and appended.dates.size == 10 and np.isnan(appended.accumulated_navs[-1])
+    db.close()
+
+
+def test_fund_nav_unique_constraint(session_factory):
+    db = session_factory()
+    db.add(models.Fund(code="000001", name="A"))
+    db.commit()
+    db.add_all([models.FundNav(fund_id=1, nav_date=date(2024, 1, 1), nav=Decimal("1")) for _ in range(2)])
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.close()
+
+
+def test_fund_list_sorts_and_pages_across_all_funds(session_factory):
+    db = session_factory()
+    db.add_all([models.Fund(code=f"00000{i}", name=f"F{i}") for i in range(1, 6)])
+    db.commit()
+    # 基金 i 的最新净值为 i，日涨跌幅为正负交替
+    for fund_id in range(1, 5):
+        latest = Decimal(fund_id)
+        prev = latest / Decimal("1.01") if fund_id % 2 else latest / Decimal("0.99")
+        crud.upsert_fund_navs(
+            db,
+            fund_id,
+            [
+                FundNavPoint(nav_date=date(2024, 1, 1), nav=prev.quantize(Decimal("0.0001"))),
+                FundNavPoint(nav_date=date(2024, 1, 2), nav=latest),
+            ],
+        )
+
+    page1 = crud.get_fund_list(db, skip=0, limit=2, sort_by="nav", sort_order="desc")
+    page2 = crud.get_fund_list(db, skip=2, limit=3, sort_by="nav", sort_order="desc")
+    assert page1["total"] == 5
+    assert [i["code"] for i in page1["items"] + page2["items"]] == ["000004", "000003", "000002", "000001", "000005"]
+    assert page2["items"][-1]["nav"] is None
+
+    by_change = crud.get_fund_list(db, limit=10, sort_by="daily_change_pct", sort_order="asc")
+    changes = [i["daily_change_pct"] for i in by_change["items"]]
+    assert changes[:2] == pytest.approx([-1.0, -1.0], abs=0.01) and changes[-1] is None
+
+    # 新净值写入后快照随之更新
+    crud.upsert_fund_navs(db, 5, [FundNavPoint(nav_date=date(2024, 1, 3), nav=Decimal("9"))])
+    top = crud.get_fund_list(db, limit=1, sort_by="nav")["items"][0]
+    assert top["code"] == "000005" and top["nav_date"] == date(2024, 1, 3)
+    db.close()
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import database
+
+
+def test_sqlite_profile_enables_wal(tmp_path):
+    engine = database.make_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    engine.dispose()
+
+
+def test_server_profile_pool_options(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "32")
+    options = database.engine_options("mysql+mysqlconnector://u:p@db/quant")
+    assert options["pool_size"] == 32 and options["pool_pre_ping"] is True and options["pool_recycle"] == 1800
+    assert database.engine_options("sqlite:///x.db") == {"connect_args": {"check_same_thread": False}}
+
+
+def test_read_sessions_route_to_replica(tmp_path, monkeypatch):
+    primary = object()
+    monkeypatch.setattr(database, "ReadSessionLocal", None)
+    assert next(database.get_read_db(primary)) is primary
+
+    replica = database.make_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "ReadSessionLocal", sessionmaker(bind=replica))
+    gen = database.get_read_db(primary)
+    session = next(gen)
+    assert session is not primary and session.get_bind() is replica
+    gen.close()
+    replica.dispose()
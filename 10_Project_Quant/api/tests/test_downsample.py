@@ -0,0 +1,79 @@
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.downsample import downsample_curve, downsample_nav_records, lttb_indices
+from api.services.eastmoney import FundNavPoint
+from api.services.nav_cache import nav_cache
+
+
+def _lttb_reference(x, y, threshold):
+    """逐点实现的经典 LTTB，用于校验向量化版本。"""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    a, out = 0, [0]
+    for i in range(threshold - 2):
+        lo, hi = int((i + 1) * every) + 1, min(int((i + 2) * every) + 1, n)
+        nx, ny = (x[n - 1], y[n - 1]) if i == threshold - 3 else (np.mean(x[lo:hi]), np.mean(y[lo:hi]))
+        start, stop = int(i * every) + 1, int((i + 1) * every) + 1
+        areas = [abs((x[a] - nx) * (y[j] - y[a]) - (x[a] - x[j]) * (ny - y[a])) for j in range(start, stop)]
+        a = start + int(np.argmax(areas))
+        out.append(a)
+    return out + [n - 1]
+
+
+@pytest.mark.parametrize("n,max_points", [(2520, 1000), (1000, 7), (5000, 120), (3000, 1000)])
+def test_lttb_matches_reference(n, max_points):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=np.float64)
+    y = np.cumsum(rng.normal(size=n))
+    assert lttb_indices(x, y, max_points).tolist() == _lttb_reference(x, y, max_points)
+
+
+def test_lttb_keeps_extremes_and_short_series():
+    x = np.arange(500, dtype=np.float64)
+    y = np.zeros(500)
+    y[137], y[351] = 5.0, -5.0
+    idx = lttb_indices(x, y, 20)
+    assert idx[0] == 0 and idx[-1] == 499 and {137, 351} <= set(idx.tolist())
+    assert lttb_indices(x[:10], y[:10], 50).tolist() == list(range(10))
+
+
+def test_nav_downsampling_is_cached_until_data_changes(session_factory):
+    db = session_factory()
+    db.add(models.Fund(code="000001", name="A"))
+    db.commit()
+    start = date(2015, 1, 1)
+    crud.upsert_fund_navs(
+        db, 1, [FundNavPoint(start + timedelta(days=i), Decimal("1") + Decimal(i % 97) / 100) for i in range(2500)]
+    )
+
+    records = downsample_nav_records(1, nav_cache.get(db, 1), 2000, 300)
+    assert len(records) == 300
+    assert records[-1]["nav_date"] == start + timedelta(days=2499)
+    assert records[0]["nav_date"] == start + timedelta(days=500)
+    assert downsample_nav_records(1, nav_cache.get(db, 1), 2000, 300) is records
+
+    crud.upsert_fund_navs(db, 1, [FundNavPoint(start + timedelta(days=2500), Decimal("3"))])
+    refreshed = downsample_nav_records(1, nav_cache.get(db, 1), 2000, 300)
+    assert refreshed is not records
+    assert refreshed[-1]["nav"] == 3.0
+    db.close()
+
+
+def test_curve_downsampling():
+    dates = [(date(2020, 1, 1) + timedelta(days=i)).isoformat() for i in range(1000)]
+    curve = {"dates": dates, "values": [float(i % 50) for i in range(1000)]}
+    small = downsample_curve("task", curve, 100)
+    assert len(small["dates"]) == len(small["values"]) == 100
+    assert small["dates"][0] == dates[0] and small["dates"][-1] == dates[-1]
+    assert downsample_curve("task", curve, 100) is small
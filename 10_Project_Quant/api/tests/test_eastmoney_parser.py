@@ -1,3 +1,4 @@
+import json
 import sys
 from pathlib import Path
 
@@ -5,7 +6,15 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from api.services.eastmoney import parse_eastmoney_lsjz
+import numpy as np
+
+from api.services.eastmoney import (
+    NavColumns,
+    _loads_maybe_jsonp,
+    parse_eastmoney_lsjz,
+    parse_eastmoney_lsjz_columns,
+    parse_lsjz_text_columns,
+)
 
 
 def test_parse_eastmoney_lsjz_basic():
@@ -26,3 +35,44 @@ def test_parse_eastmoney_lsjz_basic():
     assert str(points[0].nav) == "1.2345"
     assert str(points[0].accumulated_nav) == "2.3456"
     assert str(points[0].daily_change_pct) == "0.12"
+
+
+def test_columnar_parser_matches_row_parser():
+    rows = [
+        {"FSRQ": "2025-01-03", "DWJZ": "1.2345", "LJJZ": "2.3456", "JZZZL": "0.12"},
+        {"FSRQ": "2025-01-02", "DWJZ": "1.2330", "LJJZ": "", "JZZZL": "--"},
+        {"FSRQ": "", "DWJZ": "9.9999", "LJJZ": "9.9999"},
+        {"FSRQ": "2025-01-01", "DWJZ": "--", "LJJZ": "--"},
+        {"FSRQ": "2024-12-31", "DWJZ": 1.2, "LJJZ": None},
+    ]
+    text = "jQuery18305({});".format(json.dumps({"Data": {"LSJZList": rows}, "TotalCount": 4}))
+    payload = _loads_maybe_jsonp(text)
+
+    points = parse_eastmoney_lsjz(payload)
+    columns = parse_eastmoney_lsjz_columns(payload)
+    assert len(columns) == len(points) == 4
+    assert columns.dates.tolist() == [p.nav_date for p in points]
+    assert columns.navs.tolist() == [float(p.nav) for p in points]
+    assert [None if a != a else a for a in columns.accumulated_navs.tolist()] == [
+        None if p.accumulated_nav is None else float(p.accumulated_nav) for p in points
+    ]
+    assert columns.to_points()[0].nav == points[0].nav
+
+
+    # 含 null 的响应走完整 JSON 解析；全是字符串时走正则快速路径，两者结果一致
+    for body in (text, text.replace("1.2, \"LJJZ\": null", "\"1.2\", \"LJJZ\": \"\"")):
+        fast, total = parse_lsjz_text_columns(body)
+        assert total == 4 and fast.dates.tolist() == columns.dates.tolist()
+        assert fast.navs.tolist() == columns.navs.tolist()
+        assert np.array_equal(fast.accumulated_navs, columns.accumulated_navs, equal_nan=True)
+
+
+def test_columns_concat_sorts_and_keeps_last_duplicate():
+    def cols(dates, navs):
+        return NavColumns(np.array(dates, dtype="datetime64[D]"), np.array(navs), np.full(len(navs), np.nan))
+
+    merged = NavColumns.concat([cols(["2025-01-03", "2025-01-02"], [3.0, 2.0]), cols(["2025-01-02", "2025-01-01"], [2.5, 1.0])])
+    result = merged.sorted_unique()
+    assert result.dates.astype(str).tolist() == ["2025-01-01", "2025-01-02", "2025-01-03"]
+    assert result.navs.tolist() == [1.0, 2.5, 3.0]
+    assert len(NavColumns.concat([]).sorted_unique()) == 0
@@ -0,0 +1,104 @@
+import math
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.eastmoney import FundNavPoint
+from api.services.fund_metrics import compute_fund_metrics, parse_metric_filter
+
+END = date(2024, 6, 28)
+
+
+def _naive(dates, values):
+    """逐基金直接按定义计算，用于校验向量化版本。"""
+    last_date, last = dates[-1], values[-1]
+
+    def base(window):
+        before = [i for i, d in enumerate(dates) if d <= last_date - timedelta(days=window)]
+        return before[-1] if before else None
+
+    out = {}
+    for name, window in (("return_1m", 30), ("return_3m", 91), ("return_1y", 365), ("return_3y", 1095)):
+        i = base(window)
+        out[name] = None if i is None else last / values[i] - 1
+    curve = values[base(365) or 0:]
+    daily = np.diff(curve) / curve[:-1]
+    std = daily.std(ddof=1) if daily.size > 1 else float("nan")
+    out["volatility_1y"] = std * math.sqrt(252)
+    out["sharpe_1y"] = daily.mean() / std * math.sqrt(252)
+    out["max_drawdown_1y"] = float(np.max(1 - curve / np.maximum.accumulate(curve)))
+    return out
+
+
+def _series(seed, n_days):
+    rng = np.random.default_rng(seed)
+    dates = [END - timedelta(days=i) for i in range(n_days)][::-1]
+    dates = [d for d in dates if d.weekday() < 5]
+    return dates, np.round(np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(dates)))), 4)
+
+
+def test_vectorized_metrics_match_per_fund_definition():
+    funds = {7: _series(1, 1500), 9: _series(2, 200), 11: _series(3, 800)}
+    fund_ids = np.concatenate([np.full(len(d), fid) for fid, (d, _) in funds.items()])
+    dates = np.concatenate([np.array(d, dtype="datetime64[D]") for d, _ in funds.values()])
+    navs = np.concatenate([v for _, v in funds.values()])
+    accs = navs * 1.5
+    accs[fund_ids == 9] = np.nan  # 累计净值缺失时退回单位净值
+
+    result = compute_fund_metrics(fund_ids, dates, navs, accs)
+    assert sorted(result) == [7, 9, 11]
+    for fund_id, (d, v) in funds.items():
+        expected = _naive(d, v)
+        got = result[fund_id]
+        assert got["as_of_date"] == d[-1]
+        for name, value in expected.items():
+            if value is None:
+                assert got[name] is None, (fund_id, name)
+            else:
+                assert got[name] == pytest.approx(value, rel=1e-9), (fund_id, name)
+    assert result[9]["return_1y"] is None and result[11]["return_3y"] is None
+
+
+def test_parse_metric_filter():
+    assert parse_metric_filter("return_1y>=0.1") == ("return_1y", ">=", 0.1)
+    assert parse_metric_filter(" max_drawdown_1y < 0.2 ") == ("max_drawdown_1y", "<", 0.2)
+    for bad in ("nav>1", "return_1y=1", "return_1y>abc"):
+        with pytest.raises(ValueError):
+            parse_metric_filter(bad)
+
+
+def test_metrics_table_follows_upserts_and_drives_fund_list(session_factory):
+    db = session_factory()
+    db.add_all([models.Fund(code=f"00000{i}", name=f"F{i}") for i in range(1, 4)])
+    db.commit()
+    for fund_id, drift in ((1, 0.001), (2, -0.001), (3, 0.0)):
+        points = [
+            FundNavPoint(END - timedelta(days=399 - i), Decimal(str(round(1 + drift * i + 0.01 * (i % 3), 4))))
+            for i in range(400)
+        ]
+        crud.upsert_fund_navs(db, fund_id, points)
+    assert db.query(models.FundMetrics).count() == 3
+    before = db.get(models.FundMetrics, 1).return_1m
+
+    crud.upsert_fund_navs(db, 1, [FundNavPoint(END + timedelta(days=1), Decimal("2.0000"))])
+    db.expire_all()
+    after = db.get(models.FundMetrics, 1)
+    assert after.as_of_date == END + timedelta(days=1) and after.return_1m > before
+    assert db.get(models.FundMetrics, 2).as_of_date == END
+
+    ranked = crud.get_fund_list(db, sort_by="return_1y", sort_order="desc")
+    assert [item["code"] for item in ranked["items"]] == ["000001", "000003", "000002"]
+    assert ranked["items"][0]["sharpe_1y"] > 0
+
+    filtered = crud.get_fund_list(db, metric_filters=[("return_1y", ">", -0.05), ("return_1y", "<", 0.5)])
+    assert filtered["total"] == 1 and filtered["items"][0]["code"] == "000003"
+    db.close()
@@ -0,0 +1,149 @@
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.fund_search import FundSearchIndex, FundEntry, pinyin_initials
+
+
+def _seed(db):
+    db.add_all(
+        [
+            models.Fund(code="000001", name="华夏成长", fund_type="混合型"),
+            models.Fund(code="000002", name="华夏大盘精选", fund_type="混合型"),
+            models.Fund(code="110011", name="易方达中小盘", fund_type="混合型"),
+            models.Fund(code="001001", name="华夏债券", fund_type="债券型"),
+            models.Fund(code="519001", name="银华成长先锋", fund_type="股票型"),
+        ]
+    )
+    db.commit()
+
+
+def test_pinyin_initials_expand_polyphones():
+    assert "hxcz" in pinyin_initials("华夏成长")
+    assert "hxcc" in pinyin_initials("华夏成长")
+    assert pinyin_initials("易方达中小盘") == ["yfdzxp"]
+    assert pinyin_initials("沪深300ETF") == ["hs300etf"]
+
+
+def test_search_matches_code_prefix_name_substring_and_initials(session_factory):
+    db = session_factory()
+    _seed(db)
+
+    codes = lambda result: [fund.code for fund in result]
+    assert codes(crud.get_funds(db, search="0000")) == ["000001", "000002"]
+    assert codes(crud.get_funds(db, search="成长")) == ["000001", "519001"]
+    assert codes(crud.get_funds(db, search="hxcz")) == ["000001"]
+    assert codes(crud.get_funds(db, search="HX")) == ["000001", "001001", "000002"]
+    assert codes(crud.get_funds(db, search="华")) == ["000001", "001001", "000002", "519001"]
+    assert codes(crud.get_funds(db, search="华夏", fund_type="债券型")) == ["001001"]
+    assert crud.get_funds(db, search="不存在") == []
+    db.close()
+
+
+def test_search_ranks_exact_code_before_prefix_and_name_matches():
+    index = FundSearchIndex(refresh_interval=60)
+    index.build(
+        [
+            FundEntry(1, "000011", "华夏大盘", None),
+            FundEntry(2, "000001", "华夏成长", None),
+            FundEntry(3, "100001", "富国天惠", None),
+            FundEntry(4, "200010", "工银00001精选", None),
+        ]
+    )
+    # 代码精确 > 代码前缀 > 名称包含
+    assert index.search("000001") == [2]
+    assert index.search("00001") == [1, 4]
+    assert index.search("0000") == [2, 1, 4]
+
+    index.build(
+        [
+            FundEntry(1, "000011", "华夏大盘", None),
+            FundEntry(2, "000003", "华夏成长", None),
+            FundEntry(5, "000001", "华夏成长混合A", None),
+        ]
+    )
+    assert index.search("000001") == [5]
+    assert index.search("华夏成长") == [2, 5]
+
+
+def test_fund_list_search_uses_relevance_order_and_total(session_factory):
+    db = session_factory()
+    _seed(db)
+
+    result = crud.get_fund_list(db, skip=1, limit=2, search="华")
+    assert result["total"] == 4
+    assert [item["code"] for item in result["items"]] == ["001001", "000002"]
+
+    by_code = crud.get_fund_list(db, limit=10, search="华", sort_by="code", sort_order="asc")
+    assert [item["code"] for item in by_code["items"]] == ["000001", "000002", "001001", "519001"]
+
+    # 新增基金在刷新间隔到期后被索引感知
+    db.add(models.Fund(code="000003", name="华夏回报", fund_type="混合型"))
+    db.commit()
+    crud.fund_search_index.refresh_interval = 0
+    try:
+        assert crud.get_fund_list(db, search="华夏回报")["total"] == 1
+    finally:
+        crud.fund_search_index.refresh_interval = 60
+    db.close()
+
+
+def test_fund_list_search_total_is_not_capped(session_factory, monkeypatch):
+    db = session_factory()
+    _seed(db)
+    monkeypatch.setattr(crud, "MAX_SEARCH_RESULTS", 2)
+
+    # 按相关度分页不经过 IN 列表：total 为全部命中数，翻页可以越过候选上限
+    result = crud.get_fund_list(db, skip=2, limit=2, search="华")
+    assert (result["total"], result["truncated"]) == (4, False)
+    assert [item["code"] for item in result["items"]] == ["000002", "519001"]
+
+    # 按其他列排序时只取相关度最高的候选，并明确标出截断
+    by_code = crud.get_fund_list(db, limit=10, search="华", sort_by="code", sort_order="asc")
+    assert (by_code["total"], by_code["truncated"]) == (2, True)
+    assert [item["code"] for item in by_code["items"]] == ["000001", "001001"]
+    db.close()
+
+
+
+def test_fund_list_endpoint_reports_truncated(session_factory, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import database
+    from api.main import app
+
+    db = session_factory()
+    _seed(db)
+    db.close()
+    monkeypatch.setattr(crud, "MAX_SEARCH_RESULTS", 2)
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_db
+    try:
+        client = TestClient(app)
+        body = client.get("/api/funds/", params={"search": "华夏", "sort_by": "code", "sort_order": "asc"}).json()
+        assert (body["total"], body["truncated"]) == (2, True)
+        assert [item["code"] for item in body["items"]] == ["000001", "001001"]
+        assert client.get("/api/funds/", params={"search": "华夏"}).json()["truncated"] is False
+    finally:
+        app.dependency_overrides.clear()
+
+def test_search_on_20k_funds_is_sub_millisecond():
+    index = FundSearchIndex()
+    index.build([FundEntry(i, f"{i:06d}", f"基金{i}号成长混合", None) for i in range(1, 20001)])
+    started = time.perf_counter()
+    for _ in range(20):
+        assert index.search("012345") == [12345]
+        index.search("12345号")
+    assert (time.perf_counter() - started) / 40 < 0.05
@@ -0,0 +1,75 @@
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.eastmoney import FundNavPoint
+from api.services.http_cache import etag_matches
+
+START = date(2024, 1, 1)
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"') and not etag_matches('"abcd"', '"abc"')
+
+
+@pytest.fixture
+def seeded(session_factory):
+    from fastapi.testclient import TestClient
+
+    from api import database
+    from api.main import app
+
+    db = session_factory()
+    db.add_all([models.Fund(code="000001", name="华夏成长"), models.Fund(code="000002", name="B")])
+    db.commit()
+    for fund_id in (1, 2):
+        crud.upsert_fund_navs(db, fund_id, [FundNavPoint(START + timedelta(days=i), Decimal("1.0000")) for i in range(10)])
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_db
+    try:
+        yield TestClient(app), db
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+@pytest.mark.parametrize("path", ["/api/funds/?limit=10&sort_by=nav", "/api/funds/?search=hxcz", "/api/funds/000001?limit=5"])
+def test_conditional_get_until_new_navs(seeded, path):
+    client, db = seeded
+    first = client.get(path)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and "max-age" in first.headers["cache-control"]
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+
+    crud.upsert_fund_navs(db, 1, [FundNavPoint(START + timedelta(days=10), Decimal("1.1000"))])
+    fresh = client.get(path, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+
+
+def test_etag_varies_with_query_but_not_order(seeded):
+    client, _ = seeded
+    a = client.get("/api/funds/?limit=10&sort_by=nav").headers["etag"]
+    assert client.get("/api/funds/?sort_by=nav&limit=10").headers["etag"] == a
+    assert client.get("/api/funds/?limit=20&sort_by=nav").headers["etag"] != a
+    assert client.get("/api/funds/999999").status_code == 404
@@ -0,0 +1,169 @@
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services import sync_jobs
+from api.services.eastmoney import FundNavPoint
+from api.services.nav_archive import (
+    ArchivedNavs,
+    archive_path,
+    compact_fund_navs,
+    hot_cutoff,
+    read_archive,
+    write_archive,
+)
+from api.services.nav_cache import load_fund_nav_arrays
+from api.services.nav_sync import NavSyncEngine
+from api.tests.eastmoney_stub import EastmoneyStub
+
+START = date(2018, 1, 1)
+END = date(2024, 6, 30)
+
+
+@pytest.fixture
+def archive_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("NAV_ARCHIVE_DIR", str(tmp_path / "archive"))
+    return tmp_path / "archive"
+
+
+def _seed(db):
+    db.add_all([models.Fund(code="000001", name="A"), models.Fund(code="000002", name="B")])
+    db.commit()
+    days = (END - START).days + 1
+    for fund_id in (1, 2):
+        crud.upsert_fund_navs(
+            db,
+            fund_id,
+            [
+                FundNavPoint(
+                    nav_date=START + timedelta(days=i),
+                    nav=Decimal(10000 + (i * 37 + fund_id) % 5000) / 10000,
+                    accumulated_nav=None if i % 97 == 0 else Decimal(20000 + i) / 10000,
+                )
+                for i in range(days)
+            ],
+        )
+
+
+def _export(db, *args):
+    return [tuple(row) for chunk in crud.iter_fund_nav_chunks(db, *args, chunk_size=500) for row in chunk]
+
+
+def _snapshot(db):
+    arrays = load_fund_nav_arrays(db, 1)
+    return {
+        "dates": arrays.dates.copy(),
+        "navs": arrays.navs.copy(),
+        "accs": arrays.accumulated_navs.copy(),
+        "export": _export(db, None, None, None),
+        "window": _export(db, [2], date(2019, 12, 1), date(2021, 2, 1)),
+        "latest": [(n.nav_date, n.nav, n.accumulated_nav) for n in crud.get_fund_navs(db, 1, limit=2000)],
+        "bounds": crud.get_nav_date_bounds(db, [1, 2]),
+    }
+
+
+def test_hot_cutoff():
+    assert hot_cutoff(date(2026, 10, 18), 3) == date(2023, 1, 1)
+    with pytest.raises(ValueError):
+        hot_cutoff(date(2026, 1, 1), 0)
+
+
+def test_reads_span_both_tiers(session_factory, archive_env):
+    db = session_factory()
+    _seed(db)
+    before = _snapshot(db)
+
+    # 先归档到 2020 年，再推进到 2021 年：第二次追加到已有归档文件
+    assert compact_fund_navs(db, date(2020, 1, 1)) == {"funds": 2, "rows": 2 * 730}
+    stats = compact_fund_navs(db, hot_cutoff(END, 3))
+    assert stats == {"funds": 2, "rows": 2 * 366}
+    # 回看窗口内的净值不归档：截至 2024-06-30 最早只能归档到 2021 年初
+    assert compact_fund_navs(db, date(2024, 1, 1)) == {"funds": 0, "rows": 0}
+
+    entry = db.get(models.FundNavArchive, 1)
+    assert (entry.archived_before, entry.first_date, entry.last_date) == (date(2021, 1, 1), START, date(2020, 12, 31))
+    assert entry.row_count == (date(2021, 1, 1) - START).days and archive_path(1).exists()
+    hot_first = db.query(models.FundNav.nav_date).order_by(models.FundNav.nav_date).first()[0]
+    assert hot_first == date(2021, 1, 1)
+
+    after = _snapshot(db)
+    for key in ("dates", "navs", "accs"):
+        np.testing.assert_array_equal(after[key], before[key])
+    for key in ("export", "window", "latest", "bounds"):
+        assert after[key] == before[key], key
+    db.close()
+
+
+def test_writes_before_archive_boundary_are_skipped(session_factory, archive_env):
+    db = session_factory()
+    _seed(db)
+    compact_fund_navs(db, date(2020, 1, 1))
+    rows_before = db.query(models.FundNav).count()
+
+    old = FundNavPoint(nav_date=date(2019, 3, 1), nav=Decimal("9.9999"), accumulated_nav=None)
+    new = FundNavPoint(nav_date=END + timedelta(days=1), nav=Decimal("1.2345"), accumulated_nav=None)
+    assert crud.upsert_fund_navs(db, 1, [old, new]) == 1
+    assert db.query(models.FundNav).count() == rows_before + 1
+    exported = dict((row[1], row[2]) for row in _export(db, [1], date(2019, 3, 1), date(2019, 3, 1)))
+    assert exported[date(2019, 3, 1)] != Decimal("9.9999")
+    db.close()
+
+
+def test_full_sync_after_compaction_backfills_older_history(session_factory, archive_env, monkeypatch):
+    db = session_factory()
+    _seed(db)
+    compact_fund_navs(db, date(2020, 1, 1))
+    monkeypatch.setattr(sync_jobs, "date", type("FakeDate", (date,), {"today": staticmethod(lambda: END)}))
+    backfill_from = date(2017, 1, 1)
+    crud.create_sync_job(db, "full", days=(END - backfill_from).days, full=True)
+    with EastmoneyStub() as stub:
+        engine = NavSyncEngine(url=stub.url, columnar=True)
+        assert sync_jobs.execute_sync_job("full", session_factory, engine=engine) == "completed"
+
+    # 归档区间与热表中已有的日期跳过，只写入早于归档首日的 2017 年
+    db.expire_all()
+    assert crud.get_sync_job(db, "full").inserted == 2 * 365
+    days = (END - backfill_from).days + 1
+    arrays = load_fund_nav_arrays(db, 1)
+    assert arrays.dates.size == days and arrays.dates[0] == np.datetime64(backfill_from)
+    assert (np.diff(arrays.dates).astype(int) == 1).all()
+    navs = crud.get_fund_navs(db, 1, limit=5000)
+    assert [n.nav_date for n in navs] == arrays.dates.tolist()
+    assert len(crud.get_fund_navs(db, 1, limit=10)) == 10
+    exported = _export(db, None, None, None)
+    assert len(exported) == 2 * days and exported == sorted(exported, key=lambda row: row[:2])
+    assert crud.get_nav_date_bounds(db, [1])[1] == (backfill_from, END)
+
+    # 下次压缩把回补并入归档，边界不回退
+    before = _snapshot(db)
+    assert compact_fund_navs(db, date(2019, 1, 1)) == {"funds": 2, "rows": 2 * 365}
+    entry = db.get(models.FundNavArchive, 1)
+    assert (entry.first_date, entry.archived_before) == (backfill_from, date(2020, 1, 1))
+    after = _snapshot(db)
+    np.testing.assert_array_equal(after["dates"], before["dates"])
+    np.testing.assert_array_equal(after["navs"], before["navs"])
+    for key in ("export", "latest", "bounds"):
+        assert after[key] == before[key], key
+    db.close()
+
+
+def test_reader_ignores_rows_past_catalog_boundary(session_factory, archive_env):
+    db = session_factory()
+    _seed(db)
+    compact_fund_navs(db, date(2020, 1, 1))
+    entry = db.get(models.FundNavArchive, 2)
+    archived = read_archive(entry)
+    # 模拟压缩写完文件、提交目录前中断：文件多出的行仍在热表中，读取时按目录截掉
+    extra = ArchivedNavs.from_rows([(date(2020, 1, 1), Decimal("1.5"), None)])
+    write_archive(archive_path(2), archived.concat(extra))
+    assert read_archive(entry).size == archived.size
+    db.close()
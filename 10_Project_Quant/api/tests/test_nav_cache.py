@@ -0,0 +1,99 @@
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.eastmoney import FundNavPoint
+from api.services.nav_cache import NavCache, nav_cache
+
+
+def _points(start, days, acc=True):
+    return [
+        FundNavPoint(
+            nav_date=start + timedelta(days=i),
+            nav=Decimal("1.0000") + Decimal(i) / 1000,
+            accumulated_nav=Decimal("2.0000") if acc else None,
+        )
+        for i in range(days)
+    ]
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    session.add_all([models.Fund(code=f"00000{i}", name=f"F{i}") for i in range(1, 4)])
+    session.commit()
+    for fund_id in range(1, 4):
+        crud.upsert_fund_navs(session, fund_id, _points(date(2024, 1, 1), 100))
+    yield session
+    session.close()
+
+
+def test_hits_misses_and_readonly_arrays(db):
+    cache = NavCache(max_bytes=10 * 2**20, ttl=0)
+    first = cache.get(db, 1)
+    assert cache.get(db, 1) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first.navs[0] == 1.0 and first.accumulated_navs[-1] == 2.0
+    with pytest.raises(ValueError):
+        first.navs[0] = 0
+
+    window = first.window(date(2024, 1, 10), date(2024, 1, 19))
+    assert window.dates.size == 10 and window.dates[0] == np.datetime64("2024-01-10")
+    records = first.to_records(limit=2)
+    assert [r["nav_date"] for r in records] == [date(2024, 4, 8), date(2024, 4, 9)]
+
+
+def test_lru_eviction_respects_budget(db):
+    per_fund = NavCache(ttl=0).get(db, 1).nbytes
+    cache = NavCache(max_bytes=2 * per_fund, ttl=0)
+    cache.get(db, 1)
+    cache.get(db, 2)
+    cache.get(db, 1)
+    cache.get(db, 3)  # 淘汰最久未用的 2
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1 and stats["bytes"] <= 2 * per_fund
+    cache.get(db, 1)
+    assert cache.hits == 2
+    cache.get(db, 2)
+    assert cache.misses == 4
+
+
+def test_upsert_appends_or_invalidates_global_cache(db):
+    before = nav_cache.get(db, 1)
+    assert before.dates.size == 100
+
+    crud.upsert_fund_navs(db, 1, _points(date(2024, 4, 10), 2, acc=False))
+    appended = nav_cache.get(db, 1)
+    assert appended.dates.size == 102 and np.isnan(appended.accumulated_navs[-1])
+    misses = nav_cache.misses
+
+    # 回补更早的数据：无法追加，失效后重新加载
+    crud.upsert_fund_navs(db, 1, _points(date(2023, 12, 30), 2))
+    reloaded = nav_cache.get(db, 1)
+    assert nav_cache.misses == misses + 1
+    assert reloaded.dates.size == 104 and reloaded.dates[0] == np.datetime64("2023-12-30")
+
+
+def test_generation_mismatch_reloads_entry(db):
+    cache = NavCache(ttl=0)
+    generation = crud.get_fund_version(db, "000001")[3]
+    first = cache.get(db, 1, generation=generation)
+    assert first.generation == generation and cache.get(db, 1, generation=generation) is first
+
+    # 模拟其他进程写入：数据库版本前进，本进程缓存未收到通知
+    db.add(models.FundNav(fund_id=1, nav_date=date(2024, 4, 10), nav=Decimal("1.5")))
+    crud.refresh_nav_snapshots(db, [1])
+    db.commit()
+    assert cache.get(db, 1) is first
+    current = crud.get_fund_version(db, "000001")[3]
+    reloaded = cache.get(db, 1, generation=current)
+    assert reloaded.generation == current and reloaded.dates.size == first.dates.size + 1
@@ -0,0 +1,109 @@
+import csv
+import io
+import json
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.eastmoney import FundNavPoint
+from api.services.nav_export import encode_arrow, encode_csv
+
+START = date(2024, 1, 1)
+
+
+def _seed(db, days=30):
+    db.add_all([models.Fund(code="000001", name="A"), models.Fund(code="000002", name="B")])
+    db.commit()
+    for fund_id in (1, 2):
+        points = [
+            FundNavPoint(
+                nav_date=START + timedelta(days=i),
+                nav=Decimal("1.0000") + Decimal(i) / 1000,
+                accumulated_nav=None if i == 0 else Decimal("2.5000"),
+            )
+            for i in range(days)
+        ]
+        crud.upsert_fund_navs(db, fund_id, points)
+
+
+@pytest.fixture
+def client(session_factory):
+    from fastapi.testclient import TestClient
+
+    from api import database
+    from api.main import app
+
+    db = session_factory()
+    _seed(db)
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def test_iter_fund_nav_chunks_streams_in_fixed_size_partitions(session_factory):
+    db = session_factory()
+    _seed(db, days=25)
+    chunks = list(crud.iter_fund_nav_chunks(db, [2], START + timedelta(days=5), None, chunk_size=7))
+    assert [len(rows) for rows in chunks] == [7, 7, 6]
+    assert chunks[0][0][:2] == (2, START + timedelta(days=5))
+    db.close()
+
+
+def test_encode_csv_emits_header_once():
+    rows = [(1, START, Decimal("1.0100"), None)]
+    body = b"".join(encode_csv([rows, rows], {1: "000001"})).decode()
+    assert body == "code,nav_date,nav,accumulated_nav\n000001,2024-01-01,1.0100,\n000001,2024-01-01,1.0100,\n"
+    assert b"".join(encode_csv([], {})) == b"code,nav_date,nav,accumulated_nav\n"
+
+
+def test_export_csv_filters_codes_and_dates(client):
+    resp = client.get("/api/funds/export?codes=000002&start_date=2024-01-10&end_date=2024-01-19")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 10
+    assert {row["code"] for row in rows} == {"000002"}
+    assert rows[0] == {"code": "000002", "nav_date": "2024-01-10", "nav": "1.0090", "accumulated_nav": "2.5000"}
+
+
+def test_export_ndjson_all_funds(client):
+    resp = client.get("/api/funds/export?format=ndjson")
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(lines) == 60
+    assert lines[0] == {"code": "000001", "nav_date": "2024-01-01", "nav": 1.0, "accumulated_nav": None}
+    assert lines[-1]["code"] == "000002"
+
+
+def test_export_rejects_unknown_codes_and_formats(client):
+    assert client.get("/api/funds/export?codes=000001,999999").status_code == 404
+    assert client.get("/api/funds/export?format=xlsx").status_code == 400
+    assert client.get("/api/funds/export?start_date=2024-02-01&end_date=2024-01-01").status_code == 400
+
+
+def test_encode_arrow_roundtrip():
+    pa = pytest.importorskip("pyarrow")
+    chunks = [[(1, START, Decimal("1.0"), None)], [(2, START, Decimal("2.0"), Decimal("3.0"))]]
+    table = pa.ipc.open_stream(b"".join(encode_arrow(chunks, {1: "000001", 2: "000002"}))).read_all()
+    assert table.num_rows == 2
+    assert table.column("code").to_pylist() == ["000001", "000002"]
+    assert table.column("accumulated_nav").to_pylist() == [None, 3.0]
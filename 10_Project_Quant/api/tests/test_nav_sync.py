@@ -0,0 +1,111 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.services.eastmoney import fetch_fund_nav_history, make_session
+from api.services.nav_sync import NavSyncEngine, parse_host_limits, plan_sync_ranges
+from api.tests.eastmoney_stub import EastmoneyStub
+
+START, END = date(2024, 1, 1), date(2024, 12, 31)
+
+
+def test_parse_host_limits():
+    assert parse_host_limits("api.fund.eastmoney.com=8, LOCALHOST=2") == {
+        "api.fund.eastmoney.com": 8,
+        "localhost": 2,
+    }
+    assert parse_host_limits(None) == {}
+
+
+def test_fetch_fund_nav_history_serial_matches_stub():
+    with EastmoneyStub() as stub:
+        points = fetch_fund_nav_history("000001", START, END, session=make_session(), url=stub.url)
+    assert len(points) == 366
+    assert points[0].nav_date == START and points[-1].nav_date == END
+    assert len(stub.requests) == 4
+
+
+def test_fetch_fund_nav_history_columnar_matches_points():
+    with EastmoneyStub() as stub:
+        points = fetch_fund_nav_history("000001", START, END, session=make_session(), url=stub.url)
+        columns = fetch_fund_nav_history("000001", START, END, session=make_session(), url=stub.url, columnar=True)
+    assert columns.dates.tolist() == [p.nav_date for p in points]
+    assert columns.navs.tolist() == [float(p.nav) for p in points]
+
+
+def test_engine_fetches_all_funds_concurrently_within_host_limit():
+    codes = [f"{i:06d}" for i in range(1, 13)]
+    with EastmoneyStub(delay=0.02) as stub:
+        engine = NavSyncEngine(workers=8, host_limits={"127.0.0.1": 3}, url=stub.url)
+        results = dict(engine.fetch_many(codes, START, END))
+
+    assert sorted(results) == codes
+    assert all(len(points) == 366 for points in results.values())
+    assert len(stub.requests) == len(codes) * 4
+    assert 1 < stub.max_in_flight <= 3
+    # keep-alive：连接数不超过并发上限，远少于请求数
+    assert len(stub.client_ports) <= 3
+
+
+def test_concurrent_fetches_share_engine_pools_until_close():
+    codes = [f"{i:06d}" for i in range(1, 7)]
+    with EastmoneyStub(delay=0.01) as stub:
+        engine = NavSyncEngine(workers=4, host_limits={"127.0.0.1": 3}, url=stub.url, columnar=True)
+        first = engine.fetch_ranges([(code, START, END) for code in codes[:3]])
+        second = engine.fetch_ranges([(code, START, END) for code in codes[3:]])
+        # 一个分片先结束不会关闭其他分片仍在使用的连接与线程池
+        assert len(list(first)) == 3
+        assert len(list(second)) == 3
+        assert len(stub.client_ports) <= 3
+        requests = engine.stats["127.0.0.1"]["requests"]
+        assert requests == len(codes) * 4
+        engine.close()
+        assert engine.stats["127.0.0.1"]["requests"] == requests
+        # 关闭后可继续使用，按需重新创建
+        assert len(list(engine.fetch_ranges([(codes[0], START, END)]))) == 1
+
+
+def test_plan_sync_ranges_incremental():
+    assert plan_sync_ranges("000001", START, END) == [("000001", START, END)]
+    # 已同步到 12-29：只拉 12-30 之后
+    bounds = (START, date(2024, 12, 29))
+    assert plan_sync_ranges("000001", START, END, bounds, START) == [("000001", date(2024, 12, 30), END)]
+    # 历史比请求窗口短：向前回补一次；请求过之后不再重复回补
+    bounds = (date(2024, 6, 1), END)
+    assert plan_sync_ranges("000001", START, END, bounds) == [("000001", START, date(2024, 5, 31))]
+    assert plan_sync_ranges("000001", START, END, bounds, synced_from=START) == []
+    assert plan_sync_ranges("000001", START, END, bounds, START, full=True) == [("000001", START, END)]
+
+
+def test_sync_job_is_incremental(session_factory, monkeypatch):
+    from api import crud, models
+    from api.services import sync_jobs
+
+    db = session_factory()
+    db.add_all([models.Fund(code="000001", name="A"), models.Fund(code="000002", name="B")])
+    db.commit()
+
+    today = [date(2024, 12, 30)]
+    monkeypatch.setattr(sync_jobs, "date", type("FakeDate", (date,), {"today": staticmethod(lambda: today[0])}))
+    try:
+        with EastmoneyStub() as stub:
+            engine = NavSyncEngine(url=stub.url, columnar=True)
+            crud.create_sync_job(db, "first", days=365)
+            assert sync_jobs.execute_sync_job("first", session_factory, engine=engine) == "completed"
+            first = crud.get_sync_job(db, "first")
+            assert first.inserted == 2 * 366
+
+            today[0] = END
+            requests_before = len(stub.requests)
+            crud.create_sync_job(db, "second", days=365)
+            sync_jobs.execute_sync_job("second", session_factory, engine=engine)
+            second = crud.get_sync_job(db, "second")
+            assert second.inserted == 2
+            assert second.requests == 2
+            assert len(stub.requests) - requests_before == 2
+    finally:
+        db.close()
@@ -0,0 +1,78 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models
+from api.services.principal_cache import Principal, PrincipalCache, principal_cache
+
+
+def _principal(username):
+    return Principal(id=1, username=username, email=f"{username}@x.com", role=models.UserRole.basic,
+                     is_active=True, created_at=None)
+
+
+def test_cache_is_bounded_and_expires(monkeypatch):
+    cache = PrincipalCache(max_entries=2, ttl=30)
+    now = [100.0]
+    monkeypatch.setattr("api.services.principal_cache.time.monotonic", lambda: now[0])
+    for name in ("a", "b", "c"):
+        cache.put(_principal(name))
+    assert cache.get("a") is None and cache.get("c").username == "c"
+    now[0] += 31
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (1, 2, 1, 1)
+
+
+def test_current_user_skips_db_until_role_change(session_factory, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import database
+    from api.main import app
+    from api.routers.auth import create_access_token
+
+    db = session_factory()
+    user = models.User(username="bob", email="bob@x.com", password_hash="-")
+    db.add_all([models.User(username="root", email="root@x.com", password_hash="-", role=models.UserRole.admin), user])
+    db.commit()
+
+    baseline = principal_cache.stats()["invalidations"]
+    lookups = []
+    original = crud.get_user_by_username
+    monkeypatch.setattr(crud, "get_user_by_username", lambda db, username: lookups.append(username) or original(db, username))
+
+    def override_get_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_get_db
+    try:
+        client = TestClient(app)
+        root = {"Authorization": f"Bearer {create_access_token({'sub': 'root'})}"}
+        bob = {"Authorization": f"Bearer {create_access_token({'sub': 'bob'})}"}
+
+        assert client.get("/api/users/", headers=root).status_code == 200
+        assert client.get("/api/users/", headers=root).status_code == 200
+        assert lookups == ["root"]
+        assert client.get("/api/users/", headers=bob).status_code == 403
+
+        resp = client.patch(f"/api/users/{user.id}", json={"role": "admin"}, headers=root)
+        assert resp.status_code == 200 and resp.json()["role"] == "admin"
+        assert client.get("/api/users/", headers=bob).status_code == 200
+        assert lookups == ["root", "bob", "bob"]
+
+        client.patch(f"/api/users/{user.id}", json={"is_active": False}, headers=root)
+        assert client.get("/api/users/", headers=bob).status_code == 400
+
+        stats = client.get("/api/users/auth-cache/stats", headers=root).json()
+        assert stats["hits"] >= 4 and stats["misses"] == 4 and stats["invalidations"] == baseline + 2
+    finally:
+        app.dependency_overrides.clear()
+        principal_cache.invalidate()
+        db.close()
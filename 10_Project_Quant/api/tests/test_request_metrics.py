@@ -0,0 +1,111 @@
+import logging
+import sys
+from pathlib import Path
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import database, models
+from api.services.request_metrics import (
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    current_stats,
+    install_query_hooks,
+    metrics_registry,
+)
+
+
+def _sample(body: str, prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("latency_seconds", "Latency.", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(('/a"b',), value)
+    lines = hist.render()
+    assert lines[:2] == ["# HELP latency_seconds Latency.", "# TYPE latency_seconds histogram"]
+    assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a\\"b",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{route="/a\\"b"} 4' in lines
+
+
+def test_metrics_endpoint_reports_routes_and_query_counts(session_factory):
+    from api.main import app
+
+    db = session_factory()
+    db.add_all([models.Fund(code=f"{i:06d}", name=f"基金{i}", fund_type="股票型") for i in range(1, 21)])
+    db.commit()
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    metrics_registry.reset()
+    app.dependency_overrides[database.get_db] = override_db
+    try:
+        client = TestClient(app)
+        assert client.get("/api/funds/", params={"limit": 2}).status_code == 200
+        assert client.get("/api/funds/", params={"limit": 20, "sort_by": "nav"}).status_code == 200
+        assert client.get("/api/funds/999999").status_code == 404
+        assert client.get("/no/such/path").status_code == 404
+        resp = client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert resp.status_code == 200 and resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    list_labels = 'method="GET",route="/api/funds/"'
+    assert _sample(body, f'http_requests_total{{{list_labels},status="200"}}') == 2
+    assert _sample(body, 'http_requests_total{method="GET",route="/api/funds/{code}",status="404"}') == 1
+    assert _sample(body, 'http_requests_total{method="GET",route="<unmatched>",status="404"}') == 1
+    assert _sample(body, f"http_request_duration_seconds_count{{{list_labels}}}") == 2
+    # 列表查询条数与 limit 无关：limit=2 与 limit=20 都落在 ≤5 条的桶里（防 N+1 回归）
+    assert _sample(body, f'http_request_db_queries_bucket{{{list_labels},le="5.0"}}') == 2
+    assert _sample(body, f"http_request_db_queries_sum{{{list_labels}}}") > 0
+
+
+def test_slow_request_log_lists_queries(session_factory, caplog):
+    install_query_hooks()
+    registry = MetricsRegistry()
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry, slow_request_ms=0.001, slow_request_max_queries=2)
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int, db=Depends(get_db)):
+        for i in range(3):
+            db.execute(text(f"SELECT {i} AS n_{item_id}"))
+        return {"queries": current_stats().queries}
+
+    with caplog.at_level(logging.WARNING, logger="api.services.request_metrics"):
+        resp = TestClient(app).get("/items/7", params={"q": "x"})
+
+    # 同步接口在线程池中执行，计数仍记到当前请求
+    assert resp.json() == {"queries": 3}
+    message = caplog.records[-1].getMessage()
+    assert "GET /items/7?q=x route=/items/{item_id} status=200" in message
+    assert "queries=3" in message
+    assert "SELECT 0 AS n_7" in message and "SELECT 1 AS n_7" in message
+    assert "SELECT 2 AS n_7" not in message and "1 more" in message
+    assert 'http_request_db_queries_sum{method="GET",route="/items/{item_id}"} 3' in registry.render()
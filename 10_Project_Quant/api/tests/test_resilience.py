@@ -0,0 +1,170 @@
+import random
+import sys
+import threading
+from datetime import date
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api.services.nav_sync import NavSyncEngine, ResilientSession
+from api.services.resilience import AimdLimiter, CircuitBreaker, CircuitOpenError, RetryPolicy
+from api.tests.eastmoney_stub import EastmoneyStub
+
+START, END = date(2024, 1, 1), date(2024, 3, 31)
+FAST_RETRY = RetryPolicy(max_retries=4, base_delay=0.001, max_delay=0.01)
+
+
+def test_retry_policy_full_jitter_is_bounded():
+    policy = RetryPolicy(base_delay=0.5, max_delay=4.0, rng=random.Random(1))
+    for retry in range(8):
+        assert 0 <= policy.delay(retry) <= min(4.0, 0.5 * 2 ** retry)
+    # Retry-After 作为下限，但不超过 max_delay
+    assert policy.delay(0, retry_after=2.0) >= 2.0
+    assert policy.delay(0, retry_after=60.0) <= 4.0
+
+
+def test_aimd_additive_increase_multiplicative_decrease():
+    limiter = AimdLimiter(max_limit=8, initial=2, latency_target=1.0, cooldown=60)
+    for _ in range(20):
+        limiter.on_success(0.01)
+    assert 4 <= limiter.limit <= 8
+    before = limiter.limit
+    limiter.on_congestion()
+    assert limiter.limit == pytest.approx(before / 2)
+    # 冷却期内的后续拥塞信号不再叠加减小
+    limiter.on_congestion()
+    limiter.on_success(5.0)
+    assert limiter.limit == pytest.approx(before / 2) and limiter.decreases == 1
+
+
+def test_aimd_limit_never_drops_below_min_and_blocks_acquire():
+    limiter = AimdLimiter(max_limit=4, min_limit=1, cooldown=0)
+    for _ in range(10):
+        limiter.on_congestion()
+    assert limiter.limit == 1
+    limiter.acquire()
+    acquired = threading.Event()
+    t = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    t.start()
+    assert not acquired.wait(0.05)
+    limiter.release()
+    assert acquired.wait(1)
+    limiter.release()
+    t.join()
+
+
+def test_circuit_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    threading.Event().wait(0.06)
+    breaker.before_request()  # 半开：放行一个探测请求
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 2
+
+    threading.Event().wait(0.06)
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_request()
+
+
+class _StubAdapter(BaseAdapter):
+    """依次返回/抛出 ``outcomes`` 中的结果，不走网络。"""
+
+    def __init__(self, *outcomes):
+        super().__init__()
+        self.outcomes = list(outcomes)
+
+    def send(self, request, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        resp = requests.Response()
+        resp.status_code, resp.url, resp.request = outcome, request.url, request
+        return resp
+
+    def close(self):
+        pass
+
+
+def test_half_open_probe_releases_on_unexpected_error():
+    sess = ResilientSession({}, 2, retry=FAST_RETRY, breaker_threshold=1, breaker_reset=0.0)
+    decode_error = requests.exceptions.ContentDecodingError("bad gzip")
+    sess.mount("http://", _StubAdapter(requests.ConnectionError("down"), decode_error, 200))
+    breaker = sess._host("stub.test").breaker
+    # 连接错误打开熔断，重置时间为 0：下一次请求作为半开探测放行，探测时抛出不重试的异常
+    with pytest.raises(requests.exceptions.ContentDecodingError):
+        sess.get("http://stub.test/")
+    assert breaker.state == CircuitBreaker.OPEN and breaker.opened == 2
+    # 探测占位已释放，熔断器没有卡在 HALF_OPEN
+    assert sess.get("http://stub.test/").status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert sess.stats()["stub.test"]["failed"] == 1
+
+
+def test_engine_retries_through_intermittent_throttling():
+    codes = [f"{i:06d}" for i in range(1, 9)]
+    calls = {"n": 0}
+    lock = threading.Lock()
+
+    def flaky(query):
+        with lock:
+            calls["n"] += 1
+            n = calls["n"]
+        return (503, 429)[n % 2] if n % 3 == 0 else None
+
+    with EastmoneyStub(fault=flaky) as stub:
+        engine = NavSyncEngine(workers=4, host_limits={"127.0.0.1": 4}, url=stub.url, retry=FAST_RETRY)
+        results = dict(engine.fetch_many(codes, START, END))
+
+    assert sorted(results) == codes
+    assert all(len(points) == 91 for points in results.values())
+    host = engine.stats["127.0.0.1"]
+    assert stub.faults > 0
+    assert host["retries"] == stub.faults == host["throttled"]
+    assert host["failed"] == 0
+    assert host["limit_decreases"] >= 1
+
+
+def test_engine_reports_failed_fund_without_stopping_batch():
+    codes = ["000001", "000002", "000003"]
+    failures = {}
+    with EastmoneyStub(fault=lambda q: 500 if q["fundCode"] == "000002" else None) as stub:
+        engine = NavSyncEngine(workers=3, url=stub.url, retry=FAST_RETRY, breaker_threshold=100)
+        jobs = [(code, START, END) for code in codes]
+        done = [code for code, *_ in engine.fetch_ranges(jobs, on_error=lambda job, exc: failures.update({job[0]: exc}))]
+
+    assert sorted(done) == ["000001", "000003"]
+    assert list(failures) == ["000002"]
+    assert "500" in str(failures["000002"])
+    assert engine.stats["127.0.0.1"]["failed"] == 1
+
+
+def test_breaker_stops_hammering_a_failing_host():
+    codes = [f"{i:06d}" for i in range(1, 21)]
+    failures = []
+    with EastmoneyStub(fault=lambda q: 503) as stub:
+        engine = NavSyncEngine(
+            workers=2, url=stub.url, retry=FAST_RETRY, breaker_threshold=3, breaker_reset=60
+        )
+        list(engine.fetch_ranges([(c, START, END) for c in codes], on_error=lambda job, exc: failures.append(exc)))
+
+    assert len(failures) == len(codes)
+    assert any(isinstance(exc, CircuitOpenError) for exc in failures)
+    # 远少于 20 只基金 × 5 次尝试
+    assert stub.faults < 20
+    assert engine.stats["127.0.0.1"]["circuit"] == CircuitBreaker.OPEN
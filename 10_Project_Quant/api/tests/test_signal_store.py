@@ -0,0 +1,53 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, models, schemas
+from api.benchmarks.bench_backtest_engine import make_series
+from api.services.backtest_engine import GridParams, run_grid_backtest
+from api.services.signal_store import SignalArchive, pack_backtest_output
+
+PARAMS = GridParams(rise_ratio=0.02, fall_ratio=0.02, multiplier=1.2, grid_count=8)
+
+
+def _create(db, task_id):
+    payload = schemas.BacktestCreate(
+        fund_codes=["000000", "000001"], start_date=date(2014, 1, 1), end_date=date(2015, 12, 31), strategy_params={}
+    )
+    return crud.create_backtest(db, payload, user_id=1, task_id=task_id)
+
+
+def test_archive_roundtrip_matches_iter_signals():
+    output = run_grid_backtest(make_series(3, 400), PARAMS)
+    archive = SignalArchive(pack_backtest_output(output))
+    expected = list(output.iter_signals())
+    assert archive.total == len(expected) > 0
+    assert archive.signals() == expected
+    assert archive.signals(5, 3) == expected[5:8]
+    curve = archive.equity_curve()
+    assert curve["dates"][0] == output.dates[0].astype(object).isoformat()
+    np.testing.assert_allclose(curve["values"], np.round(output.equity, 2))
+
+
+def test_rows_and_columnar_storage_read_back_identically(session_factory):
+    db = session_factory()
+    output = run_grid_backtest(make_series(2, 500), PARAMS)
+    as_rows = _create(db, "rows")
+    as_cols = _create(db, "cols")
+    crud.save_backtest_result(db, as_rows, output, storage="rows")
+    crud.save_backtest_result(db, as_cols, output, storage="columnar")
+
+    assert db.query(models.TradeSignal).filter_by(backtest_id=as_cols.id).count() == 0
+    assert as_cols.artifact.signal_count == output.total_signals()
+    assert "equity_curve" not in as_cols.result.detail_metrics
+
+    for skip, limit in ((0, 10), (7, 50), (output.total_signals() - 2, 10)):
+        assert crud.get_backtest_signals(db, as_rows, skip, limit) == crud.get_backtest_signals(db, as_cols, skip, limit)
+    assert crud.get_backtest_equity_curve(db, as_rows) == crud.get_backtest_equity_curve(db, as_cols)
+    db.close()
@@ -0,0 +1,224 @@
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from api import crud, database, models
+from api.database import Base
+from api.services import sync_jobs
+from api.services.leases import lease_deadline
+from api.services.nav_sync import NavSyncEngine
+from api.services.resilience import RetryPolicy
+from api.services.sync_jobs import CronSchedule, SyncJobQueue, SyncScheduler, execute_sync_job
+from api.tests.eastmoney_stub import EastmoneyStub
+
+TODAY = date(2024, 3, 31)
+FAST_RETRY = RetryPolicy(max_retries=1, base_delay=0.001, max_delay=0.01)
+
+
+@pytest.fixture
+def fixed_today(monkeypatch):
+    monkeypatch.setattr(sync_jobs, "date", type("FakeDate", (date,), {"today": staticmethod(lambda: TODAY)}))
+
+
+def _seed_funds(db, n):
+    codes = [f"{i:06d}" for i in range(1, n + 1)]
+    db.add_all([models.Fund(code=code, name=code) for code in codes])
+    db.commit()
+    return codes
+
+
+def test_cron_schedule_next_after():
+    nightly = CronSchedule("0 2 * * *")
+    assert nightly.next_after(datetime(2024, 5, 1, 1, 59, 30)) == datetime(2024, 5, 1, 2, 0)
+    assert nightly.next_after(datetime(2024, 5, 1, 2, 0)) == datetime(2024, 5, 2, 2, 0)
+    assert nightly.next_after(datetime(2024, 12, 31, 23, 0)) == datetime(2025, 1, 1, 2, 0)
+
+    weekdays = CronSchedule("*/15 9-10 * * 1-5")
+    # 2024-05-04 是周六
+    assert weekdays.next_after(datetime(2024, 5, 4, 12, 0)) == datetime(2024, 5, 6, 9, 0)
+    assert weekdays.next_after(datetime(2024, 5, 6, 10, 45)) == datetime(2024, 5, 7, 9, 0)
+
+    # 日与周同时限制时满足其一即触发；7 也表示周日
+    monthly_or_sunday = CronSchedule("30 3 1 * 7")
+    assert monthly_or_sunday.next_after(datetime(2024, 5, 1, 4, 0)) == datetime(2024, 5, 5, 3, 30)
+    assert monthly_or_sunday.next_after(datetime(2024, 5, 26, 4, 0)) == datetime(2024, 6, 1, 3, 30)
+
+    for expr in ("0 2 * *", "60 2 * * *", "0 2 * * mon", "0 2 31 2 *"):
+        with pytest.raises(ValueError):
+            CronSchedule(expr).next_after(datetime(2024, 1, 1))
+
+
+def test_sync_job_shards_progress_and_partial_failure(session_factory, fixed_today):
+    db = session_factory()
+    _seed_funds(db, 5)
+    crud.create_sync_job(db, "job", days=30)
+
+    with EastmoneyStub(fault=lambda q: 502 if q["fundCode"] == "000003" else None) as stub:
+        engine = NavSyncEngine(url=stub.url, columnar=True, retry=FAST_RETRY, breaker_threshold=100)
+        status = execute_sync_job("job", session_factory, engine=engine, shard_size=2, shard_workers=2)
+
+    assert status == "partial"
+    db.expire_all()
+    job = crud.get_sync_job(db, "job")
+    assert (job.total_funds, job.total_shards, job.done_shards) == (5, 3, 3)
+    assert (job.done_funds, job.failed_funds) == (5, 1)
+    assert job.inserted == 4 * 31 and job.requests == 5
+    assert list(job.failures) == ["000003"] and "502" in job.failures["000003"]
+    assert job.fetch_stats["127.0.0.1"]["failed"] == 1
+    assert (job.start_date, job.end_date) == (date(2024, 3, 1), TODAY)
+    assert job.started_at is not None and job.finished_at is not None
+
+    synced = {fund.code: fund.nav_synced_from for fund in db.query(models.Fund)}
+    assert synced.pop("000003") is None
+    assert set(synced.values()) == {date(2024, 3, 1)}
+    # 已结束的任务不会被重复执行
+    assert execute_sync_job("job", session_factory, engine=engine) == "partial"
+    db.close()
+
+
+def test_sync_job_fails_when_every_fund_fails(session_factory, fixed_today):
+    db = session_factory()
+    _seed_funds(db, 2)
+    crud.create_sync_job(db, "down", days=10)
+    with EastmoneyStub(fault=lambda q: 503) as stub:
+        engine = NavSyncEngine(url=stub.url, columnar=True, retry=FAST_RETRY)
+        assert execute_sync_job("down", session_factory, engine=engine) == "failed"
+    db.expire_all()
+    assert crud.get_sync_job(db, "down").failed_funds == 2
+    db.close()
+
+
+def test_sync_endpoints_return_job_immediately(session_factory, fixed_today, monkeypatch):
+    from api.main import app
+
+    db = session_factory()
+    _seed_funds(db, 3)
+    submitted = []
+    monkeypatch.setattr(sync_jobs.sync_job_queue, "submit", submitted.append)
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[database.get_db] = override_db
+    try:
+        client = TestClient(app)
+        resp = client.post("/api/funds/sync", params={"days": 30})
+        assert resp.status_code == 202
+        job_id = resp.json()["job_id"]
+        assert resp.json()["status"] == "pending" and submitted == [job_id]
+        # 参数相同的任务未结束时复用；参数不同则另起一个
+        assert client.post("/api/funds/sync", params={"days": 30}).json()["job_id"] == job_id
+        assert client.post("/api/funds/sync", params={"days": 30, "full": True}).json()["job_id"] != job_id
+
+        with EastmoneyStub() as stub:
+            execute_sync_job(job_id, session_factory, engine=NavSyncEngine(url=stub.url, columnar=True))
+
+        body = client.get(f"/api/funds/sync/jobs/{job_id}").json()
+        assert body["status"] == "completed"
+        assert (body["done_funds"], body["total_funds"], body["inserted"]) == (3, 3, 3 * 31)
+        assert body["failures"] == {}
+        listing = client.get("/api/funds/sync/jobs").json()
+        assert listing["total"] == 2 and listing["items"][-1]["job_id"] == job_id
+        assert client.get("/api/funds/sync/jobs/missing").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+
+
+def test_queue_runs_job_in_background(tmp_path, fixed_today, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    _seed_funds(db, 2)
+
+    queue = SyncJobQueue(session_factory=factory)
+    try:
+        with EastmoneyStub() as stub:
+            monkeypatch.setenv("EASTMONEY_LSJZ_URL", stub.url)
+            job = queue.enqueue(db, days=30)
+            # shutdown(wait=True) 等待已投递的任务执行完
+            queue.shutdown(wait=True)
+    finally:
+        queue.shutdown()
+
+    db.expire_all()
+    job = crud.get_sync_job(db, job.job_id)
+    assert job.status == models.SyncJobStatus.completed and job.inserted == 2 * 31
+    db.close()
+    engine.dispose()
+
+
+def test_recover_and_scheduled_trigger(session_factory, monkeypatch):
+    db = session_factory()
+    crud.create_sync_job(db, "interrupted", days=30)
+    crud.claim_sync_job(db, "interrupted")
+    crud.create_sync_job(db, "live", days=90)
+    crud.claim_sync_job(db, "live")
+    crud.create_sync_job(db, "queued", days=7)
+    # 模拟执行 interrupted 的进程已退出：租约不再续期、已经过期
+    interrupted = crud.get_sync_job(db, "interrupted")
+    interrupted.worker_id = "other-host:1"
+    interrupted.lease_expires_at = lease_deadline(-1)
+    db.commit()
+
+    queue = SyncJobQueue(session_factory=session_factory)
+    submitted = []
+    monkeypatch.setattr(queue, "submit", submitted.append)
+    assert queue.recover(db) == ["queued"] and submitted == ["queued"]
+    db.expire_all()
+    interrupted = crud.get_sync_job(db, "interrupted")
+    assert interrupted.status == models.SyncJobStatus.failed and interrupted.active_key is None
+    assert interrupted.error_message == "Worker interrupted"
+    # 其他进程仍在续期的任务不受影响
+    assert crud.get_sync_job(db, "live").status == models.SyncJobStatus.running
+
+    scheduler = SyncScheduler(queue)
+    scheduler.days = 30
+    job = scheduler.trigger()
+    assert job.trigger == "schedule" and submitted[-1] == job.job_id
+    # 上一次定时任务还没结束时不重复投递
+    assert scheduler.trigger().job_id == job.job_id and len(submitted) == 2
+    db.close()
+
+
+def test_enqueue_and_scheduler_lock_across_processes(session_factory, monkeypatch):
+    db = session_factory()
+    queue = SyncJobQueue(session_factory=session_factory)
+    submitted = []
+    monkeypatch.setattr(queue, "submit", submitted.append)
+    # 另一个进程在本进程检查之后、插入之前建出了同参数的任务
+    other = crud.create_sync_job(db, "other", days=30)
+    lookups = iter([None, other])
+    monkeypatch.setattr(crud, "find_active_sync_job", lambda *args: next(lookups))
+    assert queue.enqueue(db, days=30).job_id == "other" and submitted == []
+    monkeypatch.setattr(crud, "find_active_sync_job", lambda *args: None)
+    with pytest.raises(IntegrityError):
+        queue.enqueue(db, days=30)
+    monkeypatch.undo()
+    monkeypatch.setattr(queue, "submit", submitted.append)
+
+    # 定时锁由其他进程持有且未过期时不投递
+    db.add(models.JobLock(name=sync_jobs.SCHEDULER_LOCK, owner="other-host:1", expires_at=lease_deadline()))
+    db.commit()
+    scheduler = SyncScheduler(queue)
+    scheduler.days = 7
+    assert scheduler.trigger() is None
+    db.query(models.JobLock).update({models.JobLock.expires_at: lease_deadline(-1)})
+    db.commit()
+    assert scheduler.trigger().days == 7
+    db.close()